@@ -50,7 +50,8 @@ from sciencebeam_gym.structured_document.structured_document_loader import (
 )
 
 from sciencebeam_gym.structured_document.lxml import (
-    LxmlStructuredDocument
+    LxmlStructuredDocument,
+    parse_lxml_root
 )
 
 from sciencebeam_gym.preprocess.preprocessing_utils import (
@@ -124,7 +125,8 @@ class DataProps(object):
 
 
 def convert_pdf_bytes_to_structured_document(pdf_content, path=None, page_range=None):
-    return LxmlStructuredDocument(etree.parse(BytesIO(
+    # the page range is already applied by pdftoxml (the remaining pages are renumbered)
+    return LxmlStructuredDocument(parse_lxml_root(BytesIO(
         convert_pdf_bytes_to_lxml(pdf_content, path=path, page_range=page_range)
     )))
 
@@ -18,6 +18,10 @@ from sciencebeam_gym.structured_document.structured_document_loader import (
     load_lxml_structured_document
 )
 
+from sciencebeam_gym.structured_document.tag_overlay import (
+    TagOverlayStructuredDocument
+)
+
 from sciencebeam_gym.structured_document.structured_document_saver import (
     save_structured_document
 )
@@ -122,7 +126,10 @@ def main(argv=None):
     if args.debug:
         logging.getLogger().setLevel('DEBUG')
 
-    structured_document = load_lxml_structured_document(args.lxml_path)
+    # tags are only written to the lxml elements when saving
+    structured_document = TagOverlayStructuredDocument(
+        load_lxml_structured_document(args.lxml_path)
+    )
 
     if args.cv_lxml_path:
         cv_structured_document = load_lxml_structured_document(args.cv_lxml_path)
@@ -24,6 +24,10 @@ from sciencebeam_gym.structured_document.structured_document_loader import (
     load_structured_document
 )
 
+from sciencebeam_gym.structured_document.tag_overlay import (
+    TagOverlayStructuredDocument
+)
+
 from sciencebeam_gym.preprocess.preprocessing_utils import (
     parse_page_range
 )
@@ -104,7 +108,7 @@ def load_and_convert_to_token_props(filename, cv_filename, cv_source_tag_scope,
         if cv_filename:
             cv_structured_document = load_structured_document(cv_filename, page_range=page_range)
             structured_document = merge_with_cv_structured_document(
-                structured_document,
+                TagOverlayStructuredDocument(structured_document),
                 cv_structured_document,
                 cv_source_tag_scope=cv_source_tag_scope
             )
@@ -12,6 +12,10 @@ from sciencebeam_gym.structured_document import (
     SimpleToken
 )
 
+from sciencebeam_gym.structured_document.tag_overlay import (
+    TagOverlayStructuredDocument
+)
+
 from sciencebeam_gym.models.text.feature_extractor import (
     CV_TAG_SCOPE
 )
@@ -145,7 +149,10 @@ class TestLoadAndConvertToTokenProps(object):
         load_structured_document_mock.assert_any_call(
             FILE_1, page_range=PAGE_RANGE
         )
-        structured_document_to_token_props_mock.assert_called_with(
+        structured_document_arg = structured_document_to_token_props_mock.call_args[0][0]
+        assert isinstance(structured_document_arg, TagOverlayStructuredDocument)
+        assert (
+            structured_document_arg.structured_document ==
             load_structured_document_mock.return_value
         )
 
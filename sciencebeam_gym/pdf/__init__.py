@@ -1,2 +1,4 @@
 from sciencebeam_gym.pdf.pdf_to_lxml_wrapper import PdfToLxmlWrapper  # noqa: F401
+from sciencebeam_gym.pdf.pdf_to_lxml_wrapper import PdfToLxmlPool  # noqa: F401
+from sciencebeam_gym.pdf.pdf_to_lxml_wrapper import get_shared_pdf_to_lxml_pool  # noqa: F401
 from sciencebeam_gym.pdf.pdf_to_png import PdfToPng  # noqa: F401
@@ -1,5 +1,9 @@
 import logging
+import multiprocessing
 import subprocess
+import threading
+import time
+from collections import namedtuple
 from subprocess import PIPE
 import os
 from zipfile import ZipFile
@@ -11,6 +15,12 @@ from sciencebeam_utils.utils.io import makedirs
 from sciencebeam_utils.utils.zip import extract_all_with_executable_permission
 
 
+DEFAULT_TIMEOUT = 20
+
+# memory backed (tmpfs) directory, if available
+MEMORY_BACKED_TEMP_DIR = '/dev/shm'
+
+
 def get_logger():
     return logging.getLogger(__name__)
 
@@ -69,6 +79,24 @@ def unzip_if_not_exist(zip_filename, target_directory, ignore_subdirectory=None)
     return target_directory
 
 
+def get_memory_backed_temp_dir():
+    return MEMORY_BACKED_TEMP_DIR if os.path.isdir(MEMORY_BACKED_TEMP_DIR) else None
+
+
+def _create_temp_file_with_content(source_data, temp_dir):
+    f = NamedTemporaryFile(dir=temp_dir, suffix='.pdf')
+    try:
+        f.write(source_data)
+        f.flush()
+    except (IOError, OSError):
+        try:
+            f.close()
+        except (IOError, OSError):
+            pass
+        raise
+    return f
+
+
 class PdfToLxmlWrapper(object):
     def __init__(self):
         temp_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../.temp'))
@@ -77,6 +105,8 @@ class PdfToLxmlWrapper(object):
         self.zip_url = (
             'https://storage.googleapis.com/elife-ml/artefacts/pdf2xml-linux-64.zip'
         )
+        self._pdf2xml_executable_path = None
+        self._lock = threading.Lock()
 
     def download_pdf2xml_zip_if_not_exist(self):
         download_if_not_exist(
@@ -90,26 +120,41 @@ class PdfToLxmlWrapper(object):
             unzip_if_not_exist(self.zip_filename, self.target_directory)
 
     def get_pdf2xml_executable_path(self):
-        self.unzip_pdf2xml_zip_if_target_directory_does_not_exist()
-        # use pdftoxml_server as it already handles timeouts
-        return os.path.join(
-            self.target_directory,
-            'lin-64/pdftoxml'
-        )
+        # only download and unzip once, even with multiple threads
+        with self._lock:
+            if self._pdf2xml_executable_path is None:
+                self.unzip_pdf2xml_zip_if_target_directory_does_not_exist()
+                # use pdftoxml_server as it already handles timeouts
+                self._pdf2xml_executable_path = os.path.join(
+                    self.target_directory,
+                    'lin-64/pdftoxml'
+                )
+            return self._pdf2xml_executable_path
 
-    def process_input(self, source_data, args):
-        with NamedTemporaryFile() as f:
-            f.write(source_data)
-            f.flush()
-            os.fsync(f)
-            return self.process_file(f.name, args)
+    def process_input(self, source_data, args, timeout=DEFAULT_TIMEOUT, temp_dir=None):
+        # pdftoxml needs a seekable file, the process reads it from the page cache (no fsync)
+        if temp_dir is None:
+            temp_dir = get_memory_backed_temp_dir()
+        try:
+            f = _create_temp_file_with_content(source_data, temp_dir)
+        except (IOError, OSError) as e:
+            if temp_dir is None:
+                raise
+            # e.g. the memory backed directory is full (docker's /dev/shm is small by default)
+            get_logger().warning(
+                'failed to write pdf to %s (%s), using default temp directory instead',
+                temp_dir, e
+            )
+            f = _create_temp_file_with_content(source_data, None)
+        with f:
+            return self.process_file(f.name, args, timeout=timeout)
 
-    def process_file(self, source_filename, args):
+    def process_file(self, source_filename, args, timeout=DEFAULT_TIMEOUT):
         pdf2xml = self.get_pdf2xml_executable_path()
         get_logger().info('processing %s using %s', source_filename, pdf2xml)
         cmd = [pdf2xml] + args + [source_filename, '-']
         p = subprocess.Popen(
-            ['timeout', '20s'] + cmd,
+            ['timeout', '%ss' % timeout] + cmd,
             stdout=PIPE,
             stderr=PIPE,
             stdin=None
@@ -137,6 +182,66 @@ class PdfToLxmlWrapper(object):
         return out
 
 
+PdfToLxmlResult = namedtuple('PdfToLxmlResult', ['lxml_content', 'timings'])
+
+
+class PdfToLxmlPool(object):
+    """
+    Runs pdftoxml for documents submitted from multiple threads (e.g. Beam worker threads),
+    with at most max_workers processes at a time (defaults to the number of cpus).
+    The pdftoxml executable is only resolved once (see setup).
+    """
+
+    def __init__(
+            self, max_workers=None, timeout=DEFAULT_TIMEOUT, temp_dir=None,
+            pdf_to_lxml_wrapper=None):
+
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.timeout = timeout
+        self.temp_dir = temp_dir or get_memory_backed_temp_dir()
+        self.pdf_to_lxml_wrapper = pdf_to_lxml_wrapper or PdfToLxmlWrapper()
+        self._semaphore = threading.BoundedSemaphore(self.max_workers)
+
+    def setup(self):
+        """
+        Downloads and unzips pdftoxml if necessary (e.g. in a DoFn's setup).
+        """
+        self.pdf_to_lxml_wrapper.get_pdf2xml_executable_path()
+        return self
+
+    def process_input(self, source_data, args):
+        """
+        Returns a PdfToLxmlResult with the lxml content and the timings in seconds
+        (waiting for a worker and processing the document).
+        """
+        start_time = time.time()
+        with self._semaphore:
+            process_start_time = time.time()
+            lxml_content = self.pdf_to_lxml_wrapper.process_input(
+                source_data, args, timeout=self.timeout, temp_dir=self.temp_dir
+            )
+        end_time = time.time()
+        return PdfToLxmlResult(lxml_content, {
+            'wait': process_start_time - start_time,
+            'process': end_time - process_start_time
+        })
+
+
+_shared_pdf_to_lxml_pool = None
+_shared_pdf_to_lxml_pool_lock = threading.Lock()
+
+
+def get_shared_pdf_to_lxml_pool():
+    """
+    Returns the PdfToLxmlPool shared by all threads of the current process.
+    """
+    global _shared_pdf_to_lxml_pool  # pylint: disable=global-statement
+    with _shared_pdf_to_lxml_pool_lock:
+        if _shared_pdf_to_lxml_pool is None:
+            _shared_pdf_to_lxml_pool = PdfToLxmlPool()
+        return _shared_pdf_to_lxml_pool
+
+
 if __name__ == '__main__':
     logging.basicConfig(level='INFO')
 
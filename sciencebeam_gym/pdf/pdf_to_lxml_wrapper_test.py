@@ -0,0 +1,107 @@
+import errno
+from subprocess import PIPE
+from tempfile import NamedTemporaryFile
+from mock import patch, MagicMock
+
+from sciencebeam_gym.pdf.pdf_to_lxml_wrapper import (
+    PdfToLxmlWrapper,
+    PdfToLxmlPool,
+    get_shared_pdf_to_lxml_pool
+)
+
+import sciencebeam_gym.pdf.pdf_to_lxml_wrapper as pdf_to_lxml_wrapper
+
+PDF_CONTENT_1 = b'pdf content 1'
+LXML_CONTENT_1 = b'lxml content 1'
+
+ARGS_1 = ['-blocks']
+
+PDF2XML_PATH = '/path/to/pdftoxml'
+
+
+def _create_wrapper_with_popen_mock(popen_mock, out=LXML_CONTENT_1, returncode=0):
+    wrapper = PdfToLxmlWrapper()
+    wrapper._pdf2xml_executable_path = PDF2XML_PATH  # pylint: disable=protected-access
+    p = popen_mock.return_value
+    p.communicate.return_value = (out, b'')
+    p.returncode = returncode
+    return wrapper
+
+
+class TestPdfToLxmlWrapper(object):
+    def test_should_pass_timeout_and_args_to_popen_and_return_output(self, tmpdir):
+        with patch.object(pdf_to_lxml_wrapper.subprocess, 'Popen') as popen_mock:
+            wrapper = _create_wrapper_with_popen_mock(popen_mock)
+            lxml_content = wrapper.process_input(
+                PDF_CONTENT_1, ARGS_1, timeout=10, temp_dir=str(tmpdir)
+            )
+            assert lxml_content == LXML_CONTENT_1
+            cmd = popen_mock.call_args[0][0]
+            assert cmd[:4] == ['timeout', '10s', PDF2XML_PATH] + ARGS_1
+            assert cmd[4].startswith(str(tmpdir))
+            assert cmd[5] == '-'
+            assert popen_mock.call_args[1] == dict(stdout=PIPE, stderr=PIPE, stdin=None)
+
+    def test_should_raise_error_if_process_failed(self, tmpdir):
+        with patch.object(pdf_to_lxml_wrapper.subprocess, 'Popen') as popen_mock:
+            wrapper = _create_wrapper_with_popen_mock(popen_mock, returncode=124)
+            try:
+                wrapper.process_input(PDF_CONTENT_1, ARGS_1, temp_dir=str(tmpdir))
+                assert False, 'expected RuntimeError'
+            except RuntimeError:
+                pass
+
+    def test_should_fall_back_to_default_temp_dir_if_writing_to_temp_dir_fails(self):
+        full_temp_dir = '/full/temp/dir'
+        temp_dirs = []
+
+        def fake_named_temporary_file(dir=None, **kwargs):  # pylint: disable=redefined-builtin
+            temp_dirs.append(dir)
+            if dir == full_temp_dir:
+                f = MagicMock(name='full_temp_file')
+                f.write.side_effect = IOError(errno.ENOSPC, 'No space left on device')
+                return f
+            return NamedTemporaryFile(dir=dir, **kwargs)
+
+        wrapper = PdfToLxmlWrapper()
+        with patch.object(
+                pdf_to_lxml_wrapper, 'NamedTemporaryFile',
+                side_effect=fake_named_temporary_file):
+            with patch.object(wrapper, 'process_file') as process_file_mock:
+                process_file_mock.return_value = LXML_CONTENT_1
+                lxml_content = wrapper.process_input(
+                    PDF_CONTENT_1, ARGS_1, temp_dir=full_temp_dir
+                )
+                assert lxml_content == LXML_CONTENT_1
+                assert temp_dirs == [full_temp_dir, None]
+                assert process_file_mock.called
+
+    def test_should_only_unzip_once(self):
+        wrapper = PdfToLxmlWrapper()
+        with patch.object(wrapper, 'unzip_pdf2xml_zip_if_target_directory_does_not_exist') as m:
+            first_path = wrapper.get_pdf2xml_executable_path()
+            assert wrapper.get_pdf2xml_executable_path() == first_path
+            assert m.call_count == 1
+
+
+class TestPdfToLxmlPool(object):
+    def test_should_pass_timeout_and_temp_dir_to_wrapper_and_return_timings(self):
+        wrapper = MagicMock()
+        wrapper.process_input.return_value = LXML_CONTENT_1
+        pool = PdfToLxmlPool(
+            max_workers=2, timeout=10, temp_dir='/tmp/dir', pdf_to_lxml_wrapper=wrapper
+        )
+        result = pool.process_input(PDF_CONTENT_1, ARGS_1)
+        wrapper.process_input.assert_called_with(
+            PDF_CONTENT_1, ARGS_1, timeout=10, temp_dir='/tmp/dir'
+        )
+        assert result.lxml_content == LXML_CONTENT_1
+        assert set(result.timings.keys()) == {'wait', 'process'}
+
+    def test_should_default_max_workers_to_cpu_count(self):
+        with patch.object(pdf_to_lxml_wrapper.multiprocessing, 'cpu_count') as cpu_count:
+            cpu_count.return_value = 32
+            assert PdfToLxmlPool(pdf_to_lxml_wrapper=MagicMock()).max_workers == 32
+
+    def test_should_return_same_shared_pool(self):
+        assert get_shared_pdf_to_lxml_pool() is get_shared_pdf_to_lxml_pool()
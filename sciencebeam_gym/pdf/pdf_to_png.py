@@ -1,6 +1,11 @@
 import logging
 import os
+import re
+import threading
+from multiprocessing.pool import ThreadPool
+from shutil import rmtree
 from subprocess import Popen, PIPE
+from tempfile import mkdtemp
 
 from backports.tempfile import TemporaryDirectory
 
@@ -9,41 +14,177 @@ def get_logger():
     return logging.getLogger(__name__)
 
 
+def get_page_count_from_pdfinfo_output(pdfinfo_output):
+    m = re.search(r'^Pages:\s*(\d+)', pdfinfo_output, re.MULTILINE)
+    if not m:
+        raise IOError('page count not found in pdfinfo output: %.500s' % pdfinfo_output)
+    return int(m.group(1))
+
+
+def get_pdf_page_count(pdf_bytes):
+    p = Popen(['pdfinfo', '-'], stdout=PIPE, stdin=PIPE, stderr=PIPE)
+    out, err = p.communicate(pdf_bytes)
+    if p.returncode != 0:
+        raise IOError(
+            'pdfinfo failed with return code %d, err=%s' % (p.returncode, err)
+        )
+    return get_page_count_from_pdfinfo_output(out.decode('utf-8', errors='replace'))
+
+
+def split_page_range(page_range, chunk_count):
+    """
+    Splits the (inclusive) page range into up to chunk_count consecutive page ranges
+    of similar size.
+    """
+    first_page, last_page = page_range
+    page_count = last_page - first_page + 1
+    if page_count <= 0:
+        return []
+    chunk_count = max(1, min(chunk_count, page_count))
+    chunk_size, remainder = divmod(page_count, chunk_count)
+    page_ranges = []
+    chunk_first_page = first_page
+    for i in range(chunk_count):
+        chunk_last_page = chunk_first_page + chunk_size - 1 + (1 if i < remainder else 0)
+        page_ranges.append((chunk_first_page, chunk_last_page))
+        chunk_first_page = chunk_last_page + 1
+    return page_ranges
+
+
+class _ProcessGroup(object):
+    """
+    Starts processes that can be killed together (e.g. if the rendered pages are no longer needed).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._processes = []
+        self._killed = False
+
+    def popen(self, *args, **kwargs):
+        with self._lock:
+            if self._killed:
+                raise IOError('process group was killed')
+            p = Popen(*args, **kwargs)
+            self._processes.append(p)
+            return p
+
+    def kill(self):
+        with self._lock:
+            self._killed = True
+            for p in self._processes:
+                if p.poll() is None:
+                    try:
+                        p.kill()
+                    except OSError:
+                        # the process may have ended in the meantime
+                        pass
+
+
 class PdfToPng(object):
-    def __init__(self, dpi=None, image_size=None, page_range=None):
+    def __init__(self, dpi=None, image_size=None, page_range=None, parallelism=None):
+        """
+        With parallelism > 1, the pages are split into (up to) that many page ranges,
+        rendered by concurrent pdftoppm processes (the pages are still returned in order).
+        """
         self.dpi = dpi
         self.image_size = image_size
         self.page_range = page_range
+        self.parallelism = parallelism
 
-    def iter_pdf_bytes_to_png_fp(self, pdf_bytes):
+    def _get_cmd(self, page_range):
         cmd = ['pdftoppm', '-png']
-        if self.page_range:
-            cmd += ['-f', str(self.page_range[0]), '-l', str(self.page_range[1])]
+        if page_range:
+            cmd += ['-f', str(page_range[0]), '-l', str(page_range[1])]
         if self.image_size:
             cmd += ['-scale-to-x', str(self.image_size[0]), '-scale-to-y', str(self.image_size[1])]
         elif self.dpi:
             cmd += ['-r', str(self.dpi)]
         cmd += ['-']
-        with TemporaryDirectory() as path:
-            cmd += [os.path.join(path, 'page')]
-
-            p = Popen(cmd, stdout=PIPE, stdin=PIPE, stderr=PIPE)
-            try:
-                p.stdin.write(pdf_bytes)
-            except IOError:
-                # we'll check the returncode
-                pass
-
-            out, err = p.communicate()
-            if p.returncode != 0:
-                get_logger().debug(
-                    'process failed with return code %d: cmd=%s, out=%s, err=%s',
-                    p.returncode, cmd, out, err
-                )
-                raise IOError(
-                    'process failed with return code %d, cmd=%s, err=%s' %
-                    (p.returncode, cmd, err)
+        return cmd
+
+    def _render_pages_to_directory(self, pdf_bytes, page_range, path, popen=None):
+        cmd = self._get_cmd(page_range) + [os.path.join(path, 'page')]
+
+        p = (popen or Popen)(cmd, stdout=PIPE, stdin=PIPE, stderr=PIPE)
+        try:
+            p.stdin.write(pdf_bytes)
+        except IOError:
+            # we'll check the returncode
+            pass
+
+        out, err = p.communicate()
+        if p.returncode != 0:
+            get_logger().debug(
+                'process failed with return code %d: cmd=%s, out=%s, err=%s',
+                p.returncode, cmd, out, err
+            )
+            raise IOError(
+                'process failed with return code %d, cmd=%s, err=%s' %
+                (p.returncode, cmd, err)
+            )
+        return path
+
+    def _render_pages_to_temp_directory(self, pdf_bytes, page_range, popen=None):
+        path = mkdtemp()
+        try:
+            return self._render_pages_to_directory(pdf_bytes, page_range, path, popen=popen)
+        except Exception:
+            rmtree(path, ignore_errors=True)
+            raise
+
+    def _get_parallel_page_ranges(self, pdf_bytes):
+        page_count = get_pdf_page_count(pdf_bytes)
+        if self.page_range:
+            page_range = (max(1, self.page_range[0]), min(page_count, self.page_range[1]))
+        else:
+            page_range = (1, page_count)
+        return split_page_range(page_range, self.parallelism)
+
+    def _iter_pdf_bytes_to_png_fp_in_parallel(self, pdf_bytes):
+        page_ranges = self._get_parallel_page_ranges(pdf_bytes)
+        if not page_ranges:
+            return
+        pool = ThreadPool(len(page_ranges))
+        process_group = _ProcessGroup()
+        async_results = []
+        try:
+            async_results = [
+                pool.apply_async(
+                    self._render_pages_to_temp_directory, (pdf_bytes, page_range),
+                    {'popen': process_group.popen}
                 )
+                for page_range in page_ranges
+            ]
+            pool.close()
+            for async_result in async_results:
+                path = async_result.get()
+                try:
+                    for filename in sorted(os.listdir(path)):
+                        file_path = os.path.join(path, filename)
+                        with open(file_path, 'rb') as f:
+                            yield f
+                        # remove each page once it was consumed
+                        os.remove(file_path)
+                finally:
+                    rmtree(path, ignore_errors=True)
+        finally:
+            # stop any remaining pdftoppm processes (e.g. if not all pages were consumed)
+            # and clean up after them
+            process_group.kill()
+            pool.close()
+            pool.join()
+            for async_result in async_results:
+                if async_result.successful():
+                    rmtree(async_result.get(), ignore_errors=True)
+
+    def iter_pdf_bytes_to_png_fp(self, pdf_bytes):
+        if self.parallelism and self.parallelism > 1:
+            for f in self._iter_pdf_bytes_to_png_fp_in_parallel(pdf_bytes):
+                yield f
+            return
+        with TemporaryDirectory() as path:
+            self._render_pages_to_directory(pdf_bytes, self.page_range, path)
 
             for filename in sorted(os.listdir(path)):
                 with open(os.path.join(path, filename), 'rb') as f:
@@ -1,9 +1,14 @@
+import os
+import threading
+import time
 from subprocess import PIPE
 from contextlib import contextmanager
-from mock import patch
+from mock import patch, MagicMock
 
 from sciencebeam_gym.pdf.pdf_to_png import (
-    PdfToPng
+    PdfToPng,
+    split_page_range,
+    get_page_count_from_pdfinfo_output
 )
 
 import sciencebeam_gym.pdf.pdf_to_png as pdf_to_png
@@ -69,3 +74,106 @@ class TestPdfToPng(object):
                 mock.assert_called_with(
                     ARGS_PREFIX + ['-r', '200'] + ARGS_SUFFIX, **DEFAULT_KWARGS
                 )
+
+
+def _fake_pdftoppm_popen(cmd, **_):
+    # writes one file per page, containing the page number
+    first_page = int(cmd[cmd.index('-f') + 1])
+    last_page = int(cmd[cmd.index('-l') + 1])
+    for page in range(first_page, last_page + 1):
+        with open('%s-%02d.png' % (cmd[-1], page), 'wb') as f:
+            f.write(str(page).encode('utf-8'))
+    p = MagicMock()
+    p.communicate.return_value = (None, None)
+    p.returncode = 0
+    return p
+
+
+class FakeSlowPdftoppmPopen(object):
+    # only renders the first chunk, other chunks wait until they are killed
+    def __init__(self):
+        self.slow_processes = []
+        self.slow_process_started = threading.Event()
+
+    def __call__(self, cmd, **kwargs):
+        if cmd[cmd.index('-f') + 1] == '1':
+            return _fake_pdftoppm_popen(cmd, **kwargs)
+        killed = threading.Event()
+        p = MagicMock()
+        p.poll.return_value = None
+        p.kill.side_effect = killed.set
+        p.communicate.side_effect = lambda: (killed.wait(10), (None, None))[1]
+        p.returncode = -9
+        self.slow_processes.append(p)
+        self.slow_process_started.set()
+        return p
+
+
+@contextmanager
+def patch_parallel_pdftoppm(page_count, popen=_fake_pdftoppm_popen):
+    with patch.object(pdf_to_png, 'Popen') as popen_mock:
+        with patch.object(pdf_to_png, 'get_pdf_page_count') as get_pdf_page_count_mock:
+            popen_mock.side_effect = popen
+            get_pdf_page_count_mock.return_value = page_count
+            yield popen_mock
+
+
+class TestPdfToPngParallel(object):
+    def test_should_render_chunks_and_return_pages_in_order(self):
+        with patch_parallel_pdftoppm(page_count=5) as popen_mock:
+            fps = PdfToPng(parallelism=2).iter_pdf_bytes_to_png_fp(PDF_CONTENT_1)
+            assert [f.read() for f in fps] == [b'1', b'2', b'3', b'4', b'5']
+            assert sorted(
+                tuple(call[0][0][2:6]) for call in popen_mock.call_args_list
+            ) == [('-f', '1', '-l', '3'), ('-f', '4', '-l', '5')]
+
+    def test_should_restrict_chunks_to_page_range_and_page_count(self):
+        with patch_parallel_pdftoppm(page_count=5):
+            fps = PdfToPng(page_range=(2, 10), parallelism=3).iter_pdf_bytes_to_png_fp(
+                PDF_CONTENT_1
+            )
+            assert [f.read() for f in fps] == [b'2', b'3', b'4', b'5']
+
+    def test_should_remove_rendered_pages(self):
+        with patch_parallel_pdftoppm(page_count=3):
+            paths = []
+            for f in PdfToPng(parallelism=3).iter_pdf_bytes_to_png_fp(PDF_CONTENT_1):
+                paths.append(os.path.dirname(f.name))
+            assert paths
+            assert not any(os.path.exists(path) for path in paths)
+
+    def test_should_remove_rendered_pages_if_not_all_pages_were_read(self):
+        with patch_parallel_pdftoppm(page_count=4):
+            fps = PdfToPng(parallelism=2).iter_pdf_bytes_to_png_fp(PDF_CONTENT_1)
+            path = os.path.dirname(next(fps).name)
+            fps.close()
+            assert not os.path.exists(path)
+
+    def test_should_kill_remaining_processes_if_generator_is_closed_after_first_page(self):
+        fake_popen = FakeSlowPdftoppmPopen()
+        with patch_parallel_pdftoppm(page_count=4, popen=fake_popen):
+            fps = PdfToPng(parallelism=2).iter_pdf_bytes_to_png_fp(PDF_CONTENT_1)
+            assert next(fps).read() == b'1'
+            assert fake_popen.slow_process_started.wait(5)
+            start_time = time.time()
+            fps.close()
+            assert time.time() - start_time < 5
+            assert fake_popen.slow_processes[0].kill.called
+
+
+class TestSplitPageRange(object):
+    def test_should_split_page_range_into_chunks_of_similar_size(self):
+        assert split_page_range((1, 10), 3) == [(1, 4), (5, 7), (8, 10)]
+
+    def test_should_not_return_more_chunks_than_pages(self):
+        assert split_page_range((3, 4), 3) == [(3, 3), (4, 4)]
+
+    def test_should_return_empty_list_for_empty_page_range(self):
+        assert split_page_range((5, 4), 3) == []
+
+
+class TestGetPageCountFromPdfinfoOutput(object):
+    def test_should_parse_page_count(self):
+        assert get_page_count_from_pdfinfo_output(
+            'Producer:       xyz\nPages:          12\nEncrypted:      no\n'
+        ) == 12
@@ -0,0 +1,74 @@
+from bisect import bisect_right
+from builtins import str as text
+from collections import defaultdict
+
+from sciencebeam_gym.utils.aho_corasick import (
+    AhoCorasickAutomaton
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_sequences import (
+    SequenceMatch
+)
+
+
+class ExactMatchIndex(object):
+    """
+    Locates verbatim occurrences of the values within the text of the sequences
+    (joined by a space, just like lines are combined for fuzzy matching).
+    All of the values are searched in a single pass, using an Aho-Corasick automaton.
+    Only occurrences starting and ending at token boundaries are considered.
+    """
+
+    def __init__(self, sequences, values):
+        self.sequences = sequences
+        self.sequence_start_offsets = []
+        offset = 0
+        for seq in sequences:
+            self.sequence_start_offsets.append(offset)
+            offset += len(text(seq)) + 1
+        self.text = ' '.join(text(seq) for seq in sequences)
+        self.occurrences_by_value_index = defaultdict(list)
+        for start, end, value_index in AhoCorasickAutomaton(values).iter_matches(self.text):
+            if self._is_token_start(start) and self._is_token_end(end):
+                self.occurrences_by_value_index[value_index].append((start, end))
+
+    def _is_token_start(self, index):
+        return index == 0 or self.text[index - 1] == ' '
+
+    def _is_token_end(self, index):
+        return index == len(self.text) or self.text[index] == ' '
+
+    def get_matches_for_occurrence(self, value, occurrence):
+        start, end = occurrence
+        matches = []
+        i = bisect_right(self.sequence_start_offsets, start) - 1
+        while i < len(self.sequences) and self.sequence_start_offsets[i] < end:
+            seq = self.sequences[i]
+            seq_start = self.sequence_start_offsets[i]
+            seq_end = seq_start + len(text(seq))
+            match_start = max(start, seq_start)
+            match_end = min(end, seq_end)
+            if match_end > match_start:
+                matches.append(SequenceMatch(
+                    value,
+                    seq,
+                    (match_start - start, match_end - start),
+                    (match_start - seq_start, match_end - seq_start)
+                ))
+            i += 1
+        return matches
+
+    def iter_untagged_matches(self, value_index, value, structured_document):
+        """
+        Yields the matches of every occurrence of the value (in document order)
+        that doesn't overlap any already tagged tokens at the time it is requested.
+        """
+        for occurrence in self.occurrences_by_value_index.get(value_index, []):
+            matches = self.get_matches_for_occurrence(value, occurrence)
+            is_untagged = all(
+                not structured_document.get_tag(token)
+                for m in matches
+                for token in m.seq2.tokens_between(m.index2_range)
+            )
+            if is_untagged:
+                yield matches
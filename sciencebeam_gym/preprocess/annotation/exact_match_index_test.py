@@ -0,0 +1,231 @@
+from sciencebeam_utils.utils.collection import (
+    flatten
+)
+
+from sciencebeam_gym.structured_document import (
+    SimpleStructuredDocument,
+    SimpleLine,
+    SimpleToken
+)
+
+from sciencebeam_gym.preprocess.annotation.target_annotation import (
+    TargetAnnotation
+)
+
+from sciencebeam_gym.preprocess.annotation.fuzzy_match import (
+    FuzzyMatchCache
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_profile import (
+    MatchingProfiler
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_sequences import (
+    SequenceWrapperWithPosition
+)
+
+from sciencebeam_gym.preprocess.annotation.exact_match_index import (
+    ExactMatchIndex
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_annotator import (
+    MatchingAnnotator
+)
+
+TAG1 = 'tag1'
+TAG2 = 'tag2'
+
+B_TAG_1 = 'b-' + TAG1
+I_TAG_1 = 'i-' + TAG1
+
+
+def _get_tags_of_tokens(tokens):
+    return [t.get_tag() for t in tokens]
+
+
+def _tokens_for_text(text):
+    return [SimpleToken(s) for s in text.split(' ')]
+
+
+def _document_for_tokens(tokens_by_line):
+    return SimpleStructuredDocument(lines=[SimpleLine(tokens) for tokens in tokens_by_line])
+
+
+def _sequences_for_tokens(doc, tokens_by_line):
+    return [
+        SequenceWrapperWithPosition(doc, tokens, position=i)
+        for i, tokens in enumerate(tokens_by_line)
+    ]
+
+
+def _matched_tokens(matches):
+    return [token for m in matches for token in m.seq2.tokens_between(m.index2_range)]
+
+
+class TestExactMatchIndex(object):
+    def test_should_find_value_within_sequence(self):
+        tokens = _tokens_for_text('pre this is matching post')
+        doc = _document_for_tokens([tokens])
+        index = ExactMatchIndex(_sequences_for_tokens(doc, [tokens]), ['this is matching'])
+        matches_list = list(index.iter_untagged_matches(0, 'this is matching', doc))
+        assert len(matches_list) == 1
+        assert [(m.index1_range, m.index2_range) for m in matches_list[0]] == [
+            ((0, 16), (4, 20))
+        ]
+        assert _matched_tokens(matches_list[0]) == tokens[1:4]
+
+    def test_should_find_value_across_sequences(self):
+        tokens_by_line = [_tokens_for_text('pre this is'), _tokens_for_text('matching post')]
+        doc = _document_for_tokens(tokens_by_line)
+        index = ExactMatchIndex(
+            _sequences_for_tokens(doc, tokens_by_line), ['this is matching']
+        )
+        matches_list = list(index.iter_untagged_matches(0, 'this is matching', doc))
+        assert len(matches_list) == 1
+        assert [
+            (m.seq2.position, m.index1_range, m.index2_range) for m in matches_list[0]
+        ] == [(0, (0, 7), (4, 11)), (1, (8, 16), (0, 8))]
+
+    def test_should_only_find_occurrences_at_token_boundaries(self):
+        tokens = _tokens_for_text('this is matching')
+        doc = _document_for_tokens([tokens])
+        index = ExactMatchIndex(_sequences_for_tokens(doc, [tokens]), ['is match', 'is'])
+        assert list(index.iter_untagged_matches(0, 'is match', doc)) == []
+        matches_list = list(index.iter_untagged_matches(1, 'is', doc))
+        assert [_matched_tokens(matches) for matches in matches_list] == [[tokens[1]]]
+
+    def test_should_skip_occurrences_overlapping_tagged_tokens(self):
+        tokens_by_line = [_tokens_for_text('this is'), _tokens_for_text('this is')]
+        doc = _document_for_tokens(tokens_by_line)
+        index = ExactMatchIndex(_sequences_for_tokens(doc, tokens_by_line), ['this is'])
+        matches_iterator = index.iter_untagged_matches(0, 'this is', doc)
+        tokens_by_line[0][1].set_tag(TAG1)
+        matches_list = list(matches_iterator)
+        assert [_matched_tokens(matches) for matches in matches_list] == [tokens_by_line[1]]
+
+    def test_should_not_find_values_not_in_text(self):
+        tokens = _tokens_for_text('this is matching')
+        doc = _document_for_tokens([tokens])
+        index = ExactMatchIndex(_sequences_for_tokens(doc, [tokens]), ['other', ''])
+        assert list(index.iter_untagged_matches(0, 'other', doc)) == []
+        assert list(index.iter_untagged_matches(1, '', doc)) == []
+
+
+class TestMatchingAnnotatorExactMatch(object):
+    def test_should_annotate_exact_match_across_lines_without_fuzzy_matching(self):
+        matching_tokens_per_line = [
+            _tokens_for_text('this is matching'),
+            _tokens_for_text('and continues here')
+        ]
+        not_matching_tokens = _tokens_for_text('not matching')
+        target_annotations = [
+            TargetAnnotation('this is matching and continues here', TAG1)
+        ]
+        doc = _document_for_tokens([not_matching_tokens] + matching_tokens_per_line)
+        fuzzy_match_cache = FuzzyMatchCache()
+        MatchingAnnotator(
+            target_annotations, use_tag_begin_prefix=True,
+            fuzzy_match_cache=fuzzy_match_cache, use_exact_match=True
+        ).annotate(doc)
+        assert _get_tags_of_tokens(flatten(matching_tokens_per_line)) == (
+            [B_TAG_1] + [I_TAG_1] * 5
+        )
+        assert _get_tags_of_tokens(not_matching_tokens) == [None] * len(not_matching_tokens)
+        assert fuzzy_match_cache.miss_count == 0
+
+    def test_should_only_use_exact_match_starting_at_token_boundary(self):
+        tokens = _tokens_for_text('this is matching')
+        target_annotations = [
+            TargetAnnotation('is matching', TAG1)
+        ]
+        doc = _document_for_tokens([tokens])
+        MatchingAnnotator(target_annotations, use_exact_match=True).annotate(doc)
+        assert _get_tags_of_tokens(tokens) == [None, TAG1, TAG1]
+
+    def test_should_fall_back_to_fuzzy_match_without_exact_match(self):
+        matching_tokens = _tokens_for_text('this is matchinq')
+        target_annotations = [
+            TargetAnnotation('this is matching', TAG1)
+        ]
+        doc = _document_for_tokens([matching_tokens])
+        MatchingAnnotator(target_annotations, use_exact_match=True).annotate(doc)
+        assert _get_tags_of_tokens(matching_tokens) == [TAG1] * len(matching_tokens)
+
+    def test_should_annotate_multiple_exact_matches_with_begin_prefix(self):
+        matching_tokens_per_line = [
+            _tokens_for_text('this is matching'),
+            _tokens_for_text('this is matching')
+        ]
+        target_annotations = [
+            TargetAnnotation('this is matching', TAG1, match_multiple=True)
+        ]
+        doc = _document_for_tokens(matching_tokens_per_line)
+        MatchingAnnotator(
+            target_annotations, use_tag_begin_prefix=True, use_exact_match=True
+        ).annotate(doc)
+        assert (
+            _get_tags_of_tokens(flatten(matching_tokens_per_line)) ==
+            [B_TAG_1, I_TAG_1, I_TAG_1, B_TAG_1, I_TAG_1, I_TAG_1]
+        )
+
+    def test_should_fall_back_to_fuzzy_match_for_multiple_value_target_annotation(self):
+        matching_tokens = _tokens_for_text('this may match')
+        target_annotations = [
+            TargetAnnotation(['this', 'may', 'match'], TAG1)
+        ]
+        doc = _document_for_tokens([matching_tokens])
+        MatchingAnnotator(target_annotations, use_exact_match=True).annotate(doc)
+        assert _get_tags_of_tokens(matching_tokens) == [TAG1] * len(matching_tokens)
+
+    def test_should_not_override_exact_match_annotation(self):
+        matching_tokens = _tokens_for_text('this is matching')
+        target_annotations = [
+            TargetAnnotation('this is matching', TAG1),
+            TargetAnnotation('matching', TAG2)
+        ]
+        doc = _document_for_tokens([matching_tokens])
+        MatchingAnnotator(target_annotations, use_exact_match=True).annotate(doc)
+        assert _get_tags_of_tokens(matching_tokens) == [TAG1] * len(matching_tokens)
+
+    def test_should_record_exact_matches_in_profile(self):
+        matching_tokens = _tokens_for_text('this is matching')
+        doc = _document_for_tokens([matching_tokens])
+        profiler = MatchingProfiler()
+        MatchingAnnotator(
+            [TargetAnnotation('this is matching', TAG1)],
+            profiler=profiler, use_exact_match=True
+        ).annotate(doc)
+        assert profiler.get_stats(TAG1).exact_match_count == 1
+        assert profiler.get_stats(TAG1).alignment_count == 0
+
+    def test_should_not_annotate_distant_exact_match_like_fuzzy_match(self):
+        text_lines = ['this is matching'] + ['other'] * 20 + ['this is matching']
+        target_annotations = [
+            TargetAnnotation('this is matching', TAG1, match_multiple=True)
+        ]
+        tags_by_use_exact_match = {}
+        for use_exact_match in [False, True]:
+            tokens_by_line = [_tokens_for_text(text) for text in text_lines]
+            MatchingAnnotator(
+                target_annotations, use_exact_match=use_exact_match
+            ).annotate(_document_for_tokens(tokens_by_line))
+            tags_by_use_exact_match[use_exact_match] = [
+                tokens[0].get_tag() for tokens in tokens_by_line
+            ]
+        assert tags_by_use_exact_match[True] == tags_by_use_exact_match[False]
+        assert tags_by_use_exact_match[True] == [TAG1] + [None] * 21
+
+    def test_should_fall_back_to_fuzzy_match_for_subsequent_items(self):
+        matching_tokens_per_line = [
+            _tokens_for_text('this is matching'),
+            _tokens_for_text('this is matchinq')
+        ]
+        target_annotations = [
+            TargetAnnotation('this is matching', TAG1, match_multiple=True)
+        ]
+        doc = _document_for_tokens(matching_tokens_per_line)
+        MatchingAnnotator(target_annotations, use_exact_match=True).annotate(doc)
+        assert (
+            _get_tags_of_tokens(flatten(matching_tokens_per_line)) ==
+            [TAG1] * 6
+        )
@@ -1,6 +1,8 @@
 from __future__ import division
 
 import logging
+import sys
+from collections import OrderedDict
 
 from sciencebeam_utils.utils.string import (
     LazyStr
@@ -15,12 +17,21 @@ from sciencebeam_alignment.word_sequence_matcher import (
     WordSequenceMatcher
 )
 
+from sciencebeam_gym.preprocess.annotation.text_normalisation import (
+    remove_default_junk
+)
+
 DEFAULT_SCORING = SimpleScoring(
     match_score=2,
     mismatch_score=-1,
     gap_score=-2
 )
 
+DEFAULT_FUZZY_MATCH_CACHE_MAX_SIZE = 50 * 1024 * 1024
+
+# approximate size of a cached matching block triple
+MATCHING_BLOCK_SIZE = 100
+
 
 def get_logger():
     return logging.getLogger(__name__)
@@ -45,8 +56,9 @@ def DOT_IS_JUNK(s, i):
 
 
 def remove_junk(s, isjunk=None):
-    if isjunk is None:
-        isjunk = DEFAULT_ISJUNK
+    if isjunk is None or isjunk is DEFAULT_ISJUNK:
+        # single pass implementation of DEFAULT_ISJUNK
+        return remove_default_junk(s)
     result = None
     start = 0
     for i in range(len(s)):
@@ -75,8 +87,42 @@ def invert_index_ranges(range_list, start, end):
         yield i, end
 
 
+class JunkIndex(object):
+    """
+    Cumulative junk counts of a string, allowing the number of junk characters
+    within any index range to be looked up in constant time.
+    The counts are only calculated on first use.
+    """
+
+    def __init__(self, s, isjunk):
+        self.s = s
+        self.isjunk = isjunk
+        self._cumulative_counts = None
+
+    def _get_cumulative_counts(self):
+        if self._cumulative_counts is None:
+            s = self.s
+            isjunk = self.isjunk
+            cumulative_counts = [0] * (len(s) + 1)
+            count = 0
+            for i in range(len(s)):
+                if isjunk(s, i):
+                    count += 1
+                cumulative_counts[i + 1] = count
+            self._cumulative_counts = cumulative_counts
+        return self._cumulative_counts
+
+    def count_between(self, start, end):
+        if end <= start:
+            return 0
+        cumulative_counts = self._get_cumulative_counts()
+        return cumulative_counts[end] - cumulative_counts[start]
+
+
 class FuzzyMatchResult(object):
-    def __init__(self, a, b, matching_blocks, isjunk=None):
+    def __init__(
+            self, a, b, matching_blocks, isjunk=None,
+            a_junk_index=None, b_junk_index=None):
         self.a = a
         self.b = b
         self.matching_blocks = matching_blocks
@@ -85,6 +131,8 @@ class FuzzyMatchResult(object):
         self._a_index_range = None
         self._b_index_range = None
         self.isjunk = isjunk or DEFAULT_ISJUNK
+        self.a_junk_index = a_junk_index or JunkIndex(a, self.isjunk)
+        self.b_junk_index = b_junk_index or JunkIndex(b, self.isjunk)
 
     def has_match(self):
         return len(self.non_empty_matching_blocks) > 0
@@ -117,18 +165,26 @@ class FuzzyMatchResult(object):
             )
         return result
 
+    def _get_junk_index(self, s):
+        if s is self.a:
+            return self.a_junk_index
+        if s is self.b:
+            return self.b_junk_index
+        return JunkIndex(s, self.isjunk)
+
     def count_junk_between(self, s, index_range):
         if not self.isjunk:
             return 0
-        return sum(self.isjunk(s, i) for i in range(index_range[0], index_range[1]))
+        return self._get_junk_index(s).count_between(index_range[0], index_range[1])
 
     def count_non_matching_junk(self, s, s_matching_blocks, index_range=None):
         if not self.isjunk:
             return 0
         if index_range is None:
             index_range = (0, len(s))
+        junk_index = self._get_junk_index(s)
         return sum(
-            self.count_junk_between(s, block_index_range)
+            junk_index.count_between(block_index_range[0], block_index_range[1])
             for block_index_range in invert_index_ranges(
                 s_matching_blocks, index_range[0], index_range[1]
             )
@@ -209,6 +265,20 @@ class FuzzyMatchResult(object):
             self._b_index_range = (self.b_start_index(), self.b_end_index())
         return self._b_index_range
 
+    def _with_a(self, a, matching_blocks):
+        # b is unchanged, share its junk index
+        return FuzzyMatchResult(
+            a, self.b, matching_blocks, isjunk=self.isjunk,
+            b_junk_index=self.b_junk_index
+        )
+
+    def _with_b(self, b, matching_blocks):
+        # a is unchanged, share its junk index
+        return FuzzyMatchResult(
+            self.a, b, matching_blocks, isjunk=self.isjunk,
+            a_junk_index=self.a_junk_index
+        )
+
     def a_split_at(self, index, a_pre_split=None, a_post_split=None):
         if a_pre_split is None:
             a_pre_split = self.a[:index]
@@ -216,16 +286,16 @@ class FuzzyMatchResult(object):
             a_post_split = self.a[index:]
         if not self.non_empty_matching_blocks or self.a_end_index() <= index:
             return (
-                FuzzyMatchResult(a_pre_split, self.b, self.non_empty_matching_blocks),
-                FuzzyMatchResult(a_post_split, self.b, [])
+                self._with_a(a_pre_split, self.non_empty_matching_blocks),
+                self._with_a(a_post_split, [])
             )
         return (
-            FuzzyMatchResult(a_pre_split, self.b, [
+            self._with_a(a_pre_split, [
                 (ai, bi, min(size, index - ai))
                 for ai, bi, size in self.non_empty_matching_blocks
                 if ai < index
             ]),
-            FuzzyMatchResult(a_post_split, self.b, [
+            self._with_a(a_post_split, [
                 (max(0, ai - index), bi, size if ai >= index else size + ai - index)
                 for ai, bi, size in self.non_empty_matching_blocks
                 if ai + size > index
@@ -239,16 +309,16 @@ class FuzzyMatchResult(object):
             b_post_split = self.b[index:]
         if not self.non_empty_matching_blocks or self.b_end_index() <= index:
             return (
-                FuzzyMatchResult(self.a, b_pre_split, self.non_empty_matching_blocks),
-                FuzzyMatchResult(self.a, b_post_split, [])
+                self._with_b(b_pre_split, self.non_empty_matching_blocks),
+                self._with_b(b_post_split, [])
             )
         result = (
-            FuzzyMatchResult(self.a, b_pre_split, [
+            self._with_b(b_pre_split, [
                 (ai, bi, min(size, index - bi))
                 for ai, bi, size in self.non_empty_matching_blocks
                 if bi < index
             ]),
-            FuzzyMatchResult(self.a, b_post_split, [
+            self._with_b(b_post_split, [
                 (ai, max(0, bi - index), size if bi >= index else size + bi - index)
                 for ai, bi, size in self.non_empty_matching_blocks
                 if bi + size > index
@@ -280,10 +350,74 @@ class FuzzyMatchResult(object):
         )
 
 
-def fuzzy_match(a, b, exact_word_match_threshold=5):
-    if min(len(a), len(b)) < exact_word_match_threshold:
+class FuzzyMatchCache(object):
+    """
+    Size bounded LRU cache of the matching blocks of previously aligned string pairs.
+    The least recently used entries are evicted once the approximate size of the held
+    strings and matching blocks exceeds max_size (in bytes).
+    """
+
+    def __init__(self, max_size=DEFAULT_FUZZY_MATCH_CACHE_MAX_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.hit_count = 0
+        self.miss_count = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        matching_blocks_and_size = self._entries.pop(key, None)
+        if matching_blocks_and_size is None:
+            self.miss_count += 1
+            return None
+        self.hit_count += 1
+        # re-insert to mark the entry as most recently used
+        self._entries[key] = matching_blocks_and_size
+        return matching_blocks_and_size[0]
+
+    def put(self, key, matching_blocks):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[1]
+        entry_size = (
+            sum(sys.getsizeof(x) for x in key) +
+            len(matching_blocks) * MATCHING_BLOCK_SIZE
+        )
+        if entry_size > self.max_size:
+            return
+        self._entries[key] = (matching_blocks, entry_size)
+        self.size += entry_size
+        while self.size > self.max_size:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def __repr__(self):
+        return '{}(entries={}, size={}, hit_count={}, miss_count={})'.format(
+            'FuzzyMatchCache', len(self), self.size, self.hit_count, self.miss_count
+        )
+
+
+def _get_matching_blocks(matcher_class, a, b):
+    if matcher_class is WordSequenceMatcher:
         sm = WordSequenceMatcher(None, a, b)
     else:
         sm = LocalSequenceMatcher(a=a, b=b, scoring=DEFAULT_SCORING)
-    matching_blocks = sm.get_matching_blocks()
+    return sm.get_matching_blocks()
+
+
+def fuzzy_match(a, b, exact_word_match_threshold=5, cache=None):
+    if min(len(a), len(b)) < exact_word_match_threshold:
+        matcher_class = WordSequenceMatcher
+    else:
+        matcher_class = LocalSequenceMatcher
+    if cache is None:
+        matching_blocks = _get_matching_blocks(matcher_class, a, b)
+    else:
+        key = (matcher_class.__name__, a, b)
+        matching_blocks = cache.get(key)
+        if matching_blocks is None:
+            matching_blocks = _get_matching_blocks(matcher_class, a, b)
+            cache.put(key, matching_blocks)
     return FuzzyMatchResult(a, b, matching_blocks)
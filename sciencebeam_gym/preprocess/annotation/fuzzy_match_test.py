@@ -5,6 +5,8 @@ import logging
 from sciencebeam_gym.preprocess.annotation.fuzzy_match import (
     remove_junk,
     invert_index_ranges,
+    JunkIndex,
+    FuzzyMatchCache,
     FuzzyMatchResult,
     fuzzy_match,
     DOT_IS_JUNK
@@ -52,6 +54,30 @@ class TestInvertIndexRanges(object):
         assert list(invert_index_ranges([(7, 100)], 0, 10)) == list([(0, 7)])
 
 
+class TestJunkIndex(object):
+    def test_should_return_zero_for_empty_range(self):
+        assert JunkIndex('a.b', DOT_IS_JUNK).count_between(1, 1) == 0
+
+    def test_should_count_junk_within_range(self):
+        junk_index = JunkIndex('a.b..c', DOT_IS_JUNK)
+        assert junk_index.count_between(0, 6) == 3
+        assert junk_index.count_between(0, 2) == 1
+        assert junk_index.count_between(2, 4) == 1
+        assert junk_index.count_between(5, 6) == 0
+
+    def test_should_only_call_isjunk_once_per_character(self):
+        calls = []
+
+        def isjunk(s, i):
+            calls.append(i)
+            return DOT_IS_JUNK(s, i)
+
+        junk_index = JunkIndex('a.b..c', isjunk)
+        junk_index.count_between(0, 6)
+        junk_index.count_between(1, 3)
+        assert calls == list(range(6))
+
+
 class TestFuzzyMatch(object):
     def test_match_count_should_be_the_same_independent_of_order(self):
         s1 = 'this is a some sequence'
@@ -60,6 +86,57 @@ class TestFuzzyMatch(object):
         fm_2 = fuzzy_match(choice, s1)
         assert fm_1.match_count() == fm_2.match_count()
 
+    def test_should_return_same_result_using_cache(self):
+        s1 = 'this is a some sequence'
+        choice = 'this is another sequence'
+        cache = FuzzyMatchCache()
+        fm_1 = fuzzy_match(s1, choice, cache=cache)
+        fm_2 = fuzzy_match(s1, choice, cache=cache)
+        assert fm_2.matching_blocks == fm_1.matching_blocks
+        assert fm_2.matching_blocks == fuzzy_match(s1, choice).matching_blocks
+        assert cache.miss_count == 1
+        assert cache.hit_count == 1
+
+
+class TestFuzzyMatchCache(object):
+    def test_should_return_none_and_count_miss_for_unknown_key(self):
+        cache = FuzzyMatchCache()
+        assert cache.get(('matcher', 'a', 'b')) is None
+        assert cache.miss_count == 1
+        assert cache.hit_count == 0
+
+    def test_should_return_cached_matching_blocks_and_count_hit(self):
+        cache = FuzzyMatchCache()
+        cache.put(('matcher', 'a', 'b'), [])
+        assert cache.get(('matcher', 'a', 'b')) == []
+        assert cache.hit_count == 1
+        assert cache.miss_count == 0
+
+    def test_should_distinguish_matcher_kind(self):
+        cache = FuzzyMatchCache()
+        cache.put(('matcher1', 'a', 'b'), [(0, 0, 1)])
+        assert cache.get(('matcher2', 'a', 'b')) is None
+
+    def test_should_evict_least_recently_used_entry_when_exceeding_max_size(self):
+        cache = FuzzyMatchCache()
+        cache.put(('matcher', 'a', '1'), [])
+        entry_size = cache.size
+        cache.max_size = entry_size * 2
+        cache.put(('matcher', 'a', '2'), [])
+        assert cache.get(('matcher', 'a', '1')) == []
+        cache.put(('matcher', 'a', '3'), [])
+        assert len(cache) == 2
+        assert cache.size == entry_size * 2
+        assert cache.get(('matcher', 'a', '1')) == []
+        assert cache.get(('matcher', 'a', '2')) is None
+        assert cache.get(('matcher', 'a', '3')) == []
+
+    def test_should_not_cache_entry_larger_than_max_size(self):
+        cache = FuzzyMatchCache(max_size=1)
+        cache.put(('matcher', 'a', 'b'), [])
+        assert len(cache) == 0
+        assert cache.size == 0
+
 
 class TestFuzzyMatchResult(object):
     def test_exact_match(self):
@@ -191,3 +268,15 @@ class TestFuzzyMatchResult(object):
         assert fm_2.b_gap_ratio() == 1 / 3
         assert fm_2.a_index_range() == (0, 1)
         assert fm_2.b_index_range() == (0, 1)
+
+    def test_b_split_should_share_junk_index_of_a(self):
+        fm = FuzzyMatchResult('abc', 'abc', [(0, 0, 3)])
+        fm_1, fm_2 = fm.b_split_at(2)
+        assert fm_1.a_junk_index is fm.a_junk_index
+        assert fm_2.a_junk_index is fm.a_junk_index
+
+    def test_a_split_should_share_junk_index_of_b(self):
+        fm = FuzzyMatchResult('abc', 'abc', [(0, 0, 3)])
+        fm_1, fm_2 = fm.a_split_at(2)
+        assert fm_1.b_junk_index is fm.b_junk_index
+        assert fm_2.b_junk_index is fm.b_junk_index
@@ -0,0 +1,186 @@
+import logging
+import csv
+import threading
+
+from six.moves import queue
+
+from sciencebeam_utils.utils.csv import (
+    csv_delimiter_by_filename,
+    write_csv_row
+)
+
+
+def get_logger():
+    return logging.getLogger(__name__)
+
+
+class MatchDebugFields(object):
+    ID = 'id'
+    TAG = 'tag'
+    MATCH_MULTIPLE = 'match_multiple'
+    TAG_VALUE_PRE = 'tag_value_pre'
+    TAG_VALUE_CURRENT = 'tag_value_current'
+    START_INDEX = 'start_index'
+    NEXT_START_INDEX = 'next_start_index'
+    REACHED_END = 'reached_end'
+    CHOICE_COMBINED = 'choice_combined'
+    CHOICE_CURRENT = 'choice_current'
+    CHOICE_NEXT = 'choice_next'
+    ACCEPTED = 'accepted'
+    TAG_TO_CHOICE_MATCH = 'tag_to_choice_match'
+    SUB_ANNOTATION = 'sub_annotation'
+    FM_COMBINED = 'fm_combined'
+    FM_COMBINED_DETAILED = 'fm_combined_detailed'
+    FM_CURRENT = 'fm_current'
+    FM_CURRENT_DETAILED = 'fm_current_detailed'
+    FM_NEXT = 'fm_next'
+    FM_NEXT_DETAILED = 'fm_next_detailed'
+
+
+DEFAULT_MATCH_DEBUG_COLUMNS = [
+    MatchDebugFields.ID,
+    MatchDebugFields.TAG,
+    MatchDebugFields.MATCH_MULTIPLE,
+    MatchDebugFields.TAG_VALUE_PRE,
+    MatchDebugFields.TAG_VALUE_CURRENT,
+    MatchDebugFields.START_INDEX,
+    MatchDebugFields.NEXT_START_INDEX,
+    MatchDebugFields.REACHED_END,
+    MatchDebugFields.CHOICE_COMBINED,
+    MatchDebugFields.CHOICE_CURRENT,
+    MatchDebugFields.CHOICE_NEXT,
+    MatchDebugFields.ACCEPTED,
+    MatchDebugFields.TAG_TO_CHOICE_MATCH,
+    MatchDebugFields.SUB_ANNOTATION,
+    MatchDebugFields.FM_COMBINED,
+    MatchDebugFields.FM_COMBINED_DETAILED,
+    MatchDebugFields.FM_CURRENT,
+    MatchDebugFields.FM_CURRENT_DETAILED,
+    MatchDebugFields.FM_NEXT,
+    MatchDebugFields.FM_NEXT_DETAILED
+]
+
+
+class MatchDetailRow(object):
+    """
+    The details of a considered choice, as passed to match detail reporters.
+    Lazy values are only evaluated (once) when requested.
+    """
+
+    def __init__(self, values, lazy_values=None):
+        self._values = values
+        self._lazy_values = lazy_values or {}
+
+    def __contains__(self, key):
+        return key in self._values or key in self._lazy_values
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return self.get(key)
+
+    def get(self, key, default=None):
+        if key in self._values:
+            return self._values[key]
+        f = self._lazy_values.get(key)
+        if f is None:
+            return default
+        value = f()
+        self._values[key] = value
+        return value
+
+
+class MatchDetailSampleFilters(object):
+    ALL = 'all'
+    ACCEPTED = 'accepted'
+    REJECTED = 'rejected'
+
+
+MATCH_DETAIL_SAMPLE_FILTERS = [
+    MatchDetailSampleFilters.ALL,
+    MatchDetailSampleFilters.ACCEPTED,
+    MatchDetailSampleFilters.REJECTED
+]
+
+DEFAULT_MATCH_DETAIL_QUEUE_SIZE = 1000
+
+
+class CsvMatchDetailReporter(object):
+    """
+    Writes the match details as CSV rows, only evaluating the selected fields.
+    Rows can be sampled (every Nth row, optionally only accepted or rejected ones),
+    and written using a background thread.
+    """
+
+    def __init__(
+            self, fp, filename=None, fields=None,
+            sample_every=1, sample_filter=MatchDetailSampleFilters.ALL,
+            use_background_writer=False, queue_size=DEFAULT_MATCH_DETAIL_QUEUE_SIZE):
+        if sample_filter not in MATCH_DETAIL_SAMPLE_FILTERS:
+            raise ValueError('invalid sample filter: %s' % sample_filter)
+        self.fp = fp
+        self.fields = fields or DEFAULT_MATCH_DEBUG_COLUMNS
+        self.sample_every = max(1, sample_every or 1)
+        self.sample_filter = sample_filter
+        self.writer = csv.writer(
+            fp,
+            delimiter=csv_delimiter_by_filename(filename)
+        )
+        self.writer.writerow(self.fields)
+        self.id = 1
+        self._queue = None
+        self._writer_thread = None
+        self._writer_error = None
+        if use_background_writer:
+            self._queue = queue.Queue(maxsize=queue_size)
+            self._writer_thread = threading.Thread(target=self._write_queued_rows)
+            self._writer_thread.daemon = True
+            self._writer_thread.start()
+
+    def _is_selected(self, row):
+        if self.sample_filter == MatchDetailSampleFilters.ALL:
+            return True
+        return bool(row.get(MatchDebugFields.ACCEPTED)) == (
+            self.sample_filter == MatchDetailSampleFilters.ACCEPTED
+        )
+
+    def _write_row(self, row_id, row):
+        write_csv_row(self.writer, [
+            row_id if k == MatchDebugFields.ID else row.get(k)
+            for k in self.fields
+        ])
+
+    def _write_queued_rows(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._writer_error is None:
+                try:
+                    self._write_row(*item)
+                except Exception as e:  # pylint: disable=broad-except
+                    self._writer_error = e
+
+    def __call__(self, row):
+        if self._writer_error is not None:
+            raise self._writer_error
+        if not self._is_selected(row):
+            return
+        row_id = self.id
+        self.id += 1
+        if (row_id - 1) % self.sample_every:
+            return
+        get_logger().debug('logging debug match id %d', row_id)
+        if self._queue is not None:
+            self._queue.put((row_id, row))
+        else:
+            self._write_row(row_id, row)
+
+    def close(self):
+        if self._writer_thread is not None:
+            self._queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+        self.fp.close()
+        if self._writer_error is not None:
+            raise self._writer_error
@@ -0,0 +1,145 @@
+from sciencebeam_gym.structured_document import (
+    SimpleStructuredDocument,
+    SimpleLine,
+    SimpleToken
+)
+
+from sciencebeam_gym.preprocess.annotation.target_annotation import (
+    TargetAnnotation
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_annotator import (
+    MatchingAnnotator
+)
+
+from sciencebeam_gym.preprocess.annotation.match_detail_reporter import (
+    MatchDetailRow,
+    MatchDebugFields,
+    MatchDetailSampleFilters,
+    CsvMatchDetailReporter
+)
+
+TAG1 = 'tag1'
+TAG2 = 'tag2'
+
+
+def _tokens_for_text(text):
+    return [SimpleToken(s) for s in text.split(' ')]
+
+
+def _document_for_tokens(tokens_by_line):
+    return SimpleStructuredDocument(lines=[SimpleLine(tokens) for tokens in tokens_by_line])
+
+
+class TestMatchDetailRow(object):
+    def test_should_return_values_and_default(self):
+        row = MatchDetailRow({'a': 1})
+        assert row.get('a') == 1
+        assert row['a'] == 1
+        assert row.get('b', 2) == 2
+
+    def test_should_evaluate_lazy_value_once_when_requested(self):
+        calls = []
+
+        def get_value():
+            calls.append(1)
+            return 'value'
+
+        row = MatchDetailRow({}, {'a': get_value})
+        assert calls == []
+        assert row.get('a') == 'value'
+        assert row['a'] == 'value'
+        assert calls == [1]
+
+
+def _match_detail_row(tag, accepted, lazy_values=None):
+    return MatchDetailRow({
+        MatchDebugFields.TAG: tag,
+        MatchDebugFields.ACCEPTED: accepted
+    }, lazy_values)
+
+
+def _read_csv_lines(path):
+    with open(path, 'r') as f:
+        return f.read().splitlines()
+
+
+class TestCsvMatchDetailReporter(object):
+    def _create_reporter(self, path, **kwargs):
+        return CsvMatchDetailReporter(
+            open(path, 'w'), path,
+            fields=[MatchDebugFields.ID, MatchDebugFields.TAG, MatchDebugFields.ACCEPTED],
+            **kwargs
+        )
+
+    def test_should_write_all_rows(self, tmpdir):
+        path = str(tmpdir.join('debug.csv'))
+        reporter = self._create_reporter(path)
+        reporter(_match_detail_row(TAG1, True))
+        reporter(_match_detail_row(TAG2, False))
+        reporter.close()
+        assert _read_csv_lines(path) == [
+            'id,tag,accepted', '1,tag1,True', '2,tag2,False'
+        ]
+
+    def test_should_not_evaluate_fields_not_selected(self, tmpdir):
+        path = str(tmpdir.join('debug.csv'))
+        reporter = self._create_reporter(path)
+        reporter(_match_detail_row(TAG1, True, {
+            MatchDebugFields.FM_COMBINED_DETAILED: lambda: 1 / 0
+        }))
+        reporter.close()
+        assert _read_csv_lines(path)[1:] == ['1,tag1,True']
+
+    def test_should_only_write_every_nth_row(self, tmpdir):
+        path = str(tmpdir.join('debug.csv'))
+        reporter = self._create_reporter(path, sample_every=2)
+        for tag in ['a', 'b', 'c']:
+            reporter(_match_detail_row(tag, True))
+        reporter.close()
+        assert _read_csv_lines(path)[1:] == ['1,a,True', '3,c,True']
+
+    def test_should_only_write_accepted_rows(self, tmpdir):
+        path = str(tmpdir.join('debug.csv'))
+        reporter = self._create_reporter(
+            path, sample_filter=MatchDetailSampleFilters.ACCEPTED
+        )
+        reporter(_match_detail_row('a', False))
+        reporter(_match_detail_row('b', True))
+        reporter.close()
+        assert _read_csv_lines(path)[1:] == ['1,b,True']
+
+    def test_should_only_write_rejected_rows(self, tmpdir):
+        path = str(tmpdir.join('debug.csv'))
+        reporter = self._create_reporter(
+            path, sample_filter=MatchDetailSampleFilters.REJECTED
+        )
+        reporter(_match_detail_row('a', False))
+        reporter(_match_detail_row('b', True))
+        reporter.close()
+        assert _read_csv_lines(path)[1:] == ['1,a,False']
+
+    def test_should_write_all_rows_using_background_writer(self, tmpdir):
+        path = str(tmpdir.join('debug.csv'))
+        reporter = self._create_reporter(path, use_background_writer=True, queue_size=2)
+        tags = [str(i) for i in range(10)]
+        for tag in tags:
+            reporter(_match_detail_row(tag, True))
+        reporter.close()
+        assert _read_csv_lines(path)[1:] == [
+            '%d,%s,True' % (i + 1, tag) for i, tag in enumerate(tags)
+        ]
+
+    def test_should_write_details_of_matching_annotator(self, tmpdir):
+        path = str(tmpdir.join('debug.csv'))
+        reporter = CsvMatchDetailReporter(open(path, 'w'), path)
+        matching_tokens = _tokens_for_text('this is matching')
+        doc = _document_for_tokens([matching_tokens])
+        MatchingAnnotator(
+            [TargetAnnotation('this is matching', TAG1)],
+            match_detail_reporter=reporter
+        ).annotate(doc)
+        reporter.close()
+        lines = _read_csv_lines(path)
+        assert len(lines) == 2
+        assert lines[1].startswith('1,tag1,')
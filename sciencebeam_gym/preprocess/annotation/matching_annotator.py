@@ -1,30 +1,16 @@
 from __future__ import division
 
 import logging
-import csv
 from builtins import str as text
 from itertools import tee, islice
 
+import six
 from six.moves import zip_longest
 
-from sciencebeam_utils.utils.compat import (
-    python_2_unicode_compatible
-)
-
-from sciencebeam_utils.utils.csv import (
-    csv_delimiter_by_filename,
-    write_csv_row
-)
-
 from sciencebeam_utils.utils.string import (
     LazyStr
 )
 
-from sciencebeam_utils.utils.collection import (
-    iter_flatten,
-    extract_from_dict
-)
-
 from sciencebeam_gym.structured_document import (
     B_TAG_PREFIX,
     I_TAG_PREFIX
@@ -35,26 +21,52 @@ from sciencebeam_gym.preprocess.annotation.fuzzy_match import (
     fuzzy_match
 )
 
+from sciencebeam_gym.preprocess.annotation.text_normalisation import (
+    normalise_str
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_sequences import (
+    SequenceWrapperWithPosition,
+    PendingSequences,
+    SequenceMatch,
+    PositionedSequenceSet,
+    offset_range_by,
+    skip_whitespaces
+)
+
+from sciencebeam_gym.preprocess.annotation.match_detail_reporter import (
+    MatchDebugFields,
+    MatchDetailRow
+)
+
+from sciencebeam_gym.preprocess.annotation.exact_match_index import (
+    ExactMatchIndex
+)
+
+from sciencebeam_gym.preprocess.annotation.speculative_matching import (
+    from_speculative_match,
+    get_shared_speculative_matching_pool
+)
+
+from sciencebeam_gym.preprocess.annotation.ngram_index import (
+    SequenceNgramIndex
+)
+
 from sciencebeam_gym.preprocess.annotation.annotator import (
     AbstractAnnotator
 )
 
-THIN_SPACE = u'\u2009'
-EN_DASH = u'\u2013'
-EM_DASH = u'\u2014'
-
 DEFAULT_SCORE_THRESHOLD = 0.9
 DEFAULT_MAX_MATCH_GAP = 5
 
+# by default all sequences are considered (no pruning via the n-gram index)
+DEFAULT_MIN_NGRAM_OVERLAP = 0
+
 
 def get_logger():
     return logging.getLogger(__name__)
 
 
-def normalise_str(s):
-    return s.lower().replace(EM_DASH, u'-').replace(EN_DASH, u'-').replace(THIN_SPACE, ' ')
-
-
 def normalise_str_or_list(x):
     if isinstance(x, list):
         return [normalise_str(s) for s in x]
@@ -73,125 +85,6 @@ def normalise_and_remove_junk_str_or_list(x):
         return normalise_and_remove_junk_str(x)
 
 
-class SequenceWrapper(object):
-    def __init__(self, structured_document, tokens, str_filter_f=None):
-        self.structured_document = structured_document
-        self.str_filter_f = str_filter_f
-        self.tokens = tokens
-        self.token_str_list = [structured_document.get_text(t) or '' for t in tokens]
-        if str_filter_f:
-            self.token_str_list = [str_filter_f(s) for s in self.token_str_list]
-        self.tokens_as_str = ' '.join(self.token_str_list)
-
-    def tokens_between(self, index_range):
-        start, end = index_range
-        i = 0
-        for token, token_str in zip(self.tokens, self.token_str_list):
-            if i >= end:
-                break
-            token_end = i + len(token_str)
-            if token_end > start:
-                yield token
-            i = token_end + 1
-
-    def sub_sequence_for_tokens(self, tokens):
-        return SequenceWrapper(self.structured_document, tokens, str_filter_f=self.str_filter_f)
-
-    def untagged_sub_sequences(self):
-        token_tags = [self.structured_document.get_tag(t) for t in self.tokens]
-        tagged_count = len([t for t in token_tags if t])
-        if tagged_count == 0:
-            yield self
-        elif tagged_count == len(self.tokens):
-            pass
-        else:
-            untagged_tokens = []
-            for token, tag in zip(self.tokens, token_tags):
-                if not tag:
-                    untagged_tokens.append(token)
-                elif untagged_tokens:
-                    yield self.sub_sequence_for_tokens(untagged_tokens)
-                    untagged_tokens = []
-            if untagged_tokens:
-                yield self.sub_sequence_for_tokens(untagged_tokens)
-
-    def __str__(self):
-        return self.tokens_as_str
-
-    def __repr__(self):
-        return '{}({})'.format('SequenceWrapper', self.tokens_as_str)
-
-
-class SequenceWrapperWithPosition(SequenceWrapper):
-    def __init__(self, *args, **kwargs):
-        position, kwargs = extract_from_dict(kwargs, 'position')
-        super(SequenceWrapperWithPosition, self).__init__(*args, **kwargs)
-        self.position = position
-
-    def sub_sequence_for_tokens(self, tokens):
-        return SequenceWrapperWithPosition(
-            self.structured_document, tokens,
-            str_filter_f=self.str_filter_f,
-            position=self.position
-        )
-
-    def __repr__(self):
-        return '{}({}, {})'.format('SequenceWrapperWithPosition', self.tokens_as_str, self.position)
-
-
-@python_2_unicode_compatible
-class SequenceMatch(object):
-    def __init__(self, seq1, seq2, index1_range, index2_range):
-        self.seq1 = seq1
-        self.seq2 = seq2
-        self.index1_range = index1_range
-        self.index2_range = index2_range
-
-    def __repr__(self):
-        return u"SequenceMatch('{}'[{}:{}], '{}'[{}:{}])".format(
-            self.seq1,
-            self.index1_range[0],
-            self.index1_range[1],
-            self.seq2,
-            self.index2_range[0],
-            self.index2_range[1]
-        )
-
-
-@python_2_unicode_compatible
-class PositionedSequenceSet(object):
-    def __init__(self):
-        self.data = set()
-
-    def add(self, sequence):
-        self.data.add(sequence.position)
-
-    def is_close_to_any(self, sequence, max_gap):
-        if not max_gap or not self.data:
-            return True
-        position = sequence.position
-        max_distance = max_gap + 1
-        for other_position in self.data:
-            if abs(position - other_position) <= max_distance:
-                return True
-        return False
-
-    def __str__(self):
-        return str(self.data)
-
-
-def offset_range_by(index_range, offset):
-    if not offset:
-        return index_range
-    return (offset + index_range[0], offset + index_range[1])
-
-
-def skip_whitespaces(s, start):
-    while start < len(s) and s[start].isspace():
-        start += 1
-    return start
-
-
 def get_fuzzy_match_filter(
         b_score_threshold, min_match_count, total_match_threshold,
         ratio_min_match_count, ratio_threshold):
@@ -231,53 +124,6 @@ DEFAULT_CHOICE_FUZZY_MATCH_FILTER = get_fuzzy_match_filter(
 )
 
 
-class MatchDebugFields(object):
-    ID = 'id'
-    TAG = 'tag'
-    MATCH_MULTIPLE = 'match_multiple'
-    TAG_VALUE_PRE = 'tag_value_pre'
-    TAG_VALUE_CURRENT = 'tag_value_current'
-    START_INDEX = 'start_index'
-    NEXT_START_INDEX = 'next_start_index'
-    REACHED_END = 'reached_end'
-    CHOICE_COMBINED = 'choice_combined'
-    CHOICE_CURRENT = 'choice_current'
-    CHOICE_NEXT = 'choice_next'
-    ACCEPTED = 'accepted'
-    TAG_TO_CHOICE_MATCH = 'tag_to_choice_match'
-    SUB_ANNOTATION = 'sub_annotation'
-    FM_COMBINED = 'fm_combined'
-    FM_COMBINED_DETAILED = 'fm_combined_detailed'
-    FM_CURRENT = 'fm_current'
-    FM_CURRENT_DETAILED = 'fm_current_detailed'
-    FM_NEXT = 'fm_next'
-    FM_NEXT_DETAILED = 'fm_next_detailed'
-
-
-DEFAULT_MATCH_DEBUG_COLUMNS = [
-    MatchDebugFields.ID,
-    MatchDebugFields.TAG,
-    MatchDebugFields.MATCH_MULTIPLE,
-    MatchDebugFields.TAG_VALUE_PRE,
-    MatchDebugFields.TAG_VALUE_CURRENT,
-    MatchDebugFields.START_INDEX,
-    MatchDebugFields.NEXT_START_INDEX,
-    MatchDebugFields.REACHED_END,
-    MatchDebugFields.CHOICE_COMBINED,
-    MatchDebugFields.CHOICE_CURRENT,
-    MatchDebugFields.CHOICE_NEXT,
-    MatchDebugFields.ACCEPTED,
-    MatchDebugFields.TAG_TO_CHOICE_MATCH,
-    MatchDebugFields.SUB_ANNOTATION,
-    MatchDebugFields.FM_COMBINED,
-    MatchDebugFields.FM_COMBINED_DETAILED,
-    MatchDebugFields.FM_CURRENT,
-    MatchDebugFields.FM_CURRENT_DETAILED,
-    MatchDebugFields.FM_NEXT,
-    MatchDebugFields.FM_NEXT_DETAILED
-]
-
-
 class TargetAnnotationMatchFinder(object):
     def __init__(
         self,
@@ -289,7 +135,11 @@ class TargetAnnotationMatchFinder(object):
         max_gap=DEFAULT_MAX_MATCH_GAP,
         matched_choices=None,
         match_detail_reporter=None,
-        is_sub_match=False
+        is_sub_match=False,
+        fuzzy_match_cache=None,
+        ngram_index=None,
+        min_ngram_overlap=DEFAULT_MIN_NGRAM_OVERLAP,
+        profiler=None
     ):
         if matched_choices is None:
             matched_choices = PositionedSequenceSet()
@@ -302,6 +152,10 @@ class TargetAnnotationMatchFinder(object):
         self.matched_choices = matched_choices
         self.match_detail_reporter = match_detail_reporter
         self.is_sub_match = is_sub_match
+        self.fuzzy_match_cache = fuzzy_match_cache
+        self.ngram_index = ngram_index
+        self.min_ngram_overlap = min_ngram_overlap
+        self.profiler = profiler
         self.current_choices, self.next_choices = tee(choices, 2)
         self.next_choices = islice(self.next_choices, 1, None)
 
@@ -337,6 +191,37 @@ class TargetAnnotationMatchFinder(object):
             for m in matches:
                 yield m
 
+    def _get_match_detail_row(
+            self, s1, current_start_index, start_index, reached_end,
+            choice_str, current_choice_str, next_choice_str,
+            accept_match, tag_to_choice_match, fm_combined, fm, fm_next):
+
+        target_annotation = self.target_annotation
+        return MatchDetailRow({
+            MatchDebugFields.TAG: target_annotation.name,
+            MatchDebugFields.MATCH_MULTIPLE: target_annotation.match_multiple,
+            MatchDebugFields.START_INDEX: current_start_index,
+            MatchDebugFields.NEXT_START_INDEX: start_index,
+            MatchDebugFields.REACHED_END: reached_end,
+            MatchDebugFields.CHOICE_COMBINED: choice_str,
+            MatchDebugFields.CHOICE_CURRENT: current_choice_str,
+            MatchDebugFields.CHOICE_NEXT: next_choice_str,
+            MatchDebugFields.ACCEPTED: accept_match,
+            MatchDebugFields.TAG_TO_CHOICE_MATCH: tag_to_choice_match,
+            MatchDebugFields.SUB_ANNOTATION: self.is_sub_match,
+            MatchDebugFields.FM_COMBINED: fm_combined,
+            MatchDebugFields.FM_CURRENT: fm,
+            MatchDebugFields.FM_NEXT: fm_next
+        }, {
+            MatchDebugFields.TAG_VALUE_PRE: lambda: s1[:current_start_index],
+            MatchDebugFields.TAG_VALUE_CURRENT: lambda: s1[current_start_index:],
+            MatchDebugFields.FM_COMBINED_DETAILED: lambda: (
+                fm_combined and fm_combined.detailed_str()
+            ),
+            MatchDebugFields.FM_CURRENT_DETAILED: lambda: fm and fm.detailed_str(),
+            MatchDebugFields.FM_NEXT_DETAILED: lambda: fm_next and fm_next.detailed_str()
+        })
+
     def _do_find_next_best_matches(self, sequence, current_choices, next_choices):
         target_annotation = self.target_annotation
         seq_match_filter = self.seq_match_filter
@@ -347,6 +232,15 @@ class TargetAnnotationMatchFinder(object):
         start_index = 0
         s1 = text(sequence)
         too_distant_choices = []
+        pruned_choices = []
+        candidate_positions = (
+            self.ngram_index.get_positions_with_min_overlap(s1, self.min_ngram_overlap)
+            if (
+                self.ngram_index is not None and self.min_ngram_overlap and
+                self.ngram_index.is_prunable(s1)
+            )
+            else None
+        )
 
         is_last_match = False
         previous_match = False
@@ -358,6 +252,11 @@ class TargetAnnotationMatchFinder(object):
             current_choice_str = text(choice)
             if not current_choice_str:
                 return
+            if candidate_positions is not None and not (
+                    choice.position in candidate_positions or
+                    (next_choice is not None and next_choice.position in candidate_positions)):
+                pruned_choices.append(choice)
+                continue
             if next_choice:
                 next_choice_str = text(next_choice)
                 choice_str = current_choice_str + ' ' + next_choice_str
@@ -379,7 +278,9 @@ class TargetAnnotationMatchFinder(object):
             tag_to_choice_match = self.is_sub_match or (
                 len(s1) - start_index < len(current_choice_str))
             if not tag_to_choice_match:
-                fm_combined = fuzzy_match(s1, choice_str)
+                fm_combined = fuzzy_match(s1, choice_str, cache=self.fuzzy_match_cache)
+                if self.profiler is not None:
+                    self.profiler.record_alignment(target_annotation.name, s1, choice_str)
                 fm, fm_next = fm_combined.b_split_at(len(current_choice_str))
                 get_logger().debug(
                     'regular match: s1=%s, choice=%s, fm=%s (combined: %s)',
@@ -423,7 +324,9 @@ class TargetAnnotationMatchFinder(object):
                         get_logger().debug('setting start index to: %d', start_index)
             else:
                 s1_sub = s1[start_index:]
-                fm_combined = fuzzy_match(choice_str, s1_sub)
+                fm_combined = fuzzy_match(choice_str, s1_sub, cache=self.fuzzy_match_cache)
+                if self.profiler is not None:
+                    self.profiler.record_alignment(target_annotation.name, choice_str, s1_sub)
                 fm, fm_next = fm_combined.a_split_at(len(current_choice_str))
                 get_logger().debug(
                     'short match: s1_sub=%s, choice=%s, fm=%s (combined: %s)',
@@ -458,30 +361,14 @@ class TargetAnnotationMatchFinder(object):
                         matched_choices.add(next_choice)
                         yield sm
                     is_last_match = True
+            if self.profiler is not None:
+                self.profiler.record_choice(target_annotation.name, accept_match)
             if self.match_detail_reporter:
-                self.match_detail_reporter({
-                    MatchDebugFields.TAG: target_annotation.name,
-                    MatchDebugFields.MATCH_MULTIPLE: target_annotation.match_multiple,
-                    MatchDebugFields.TAG_VALUE_PRE: s1[:current_start_index],
-                    MatchDebugFields.TAG_VALUE_CURRENT: s1[current_start_index:],
-                    MatchDebugFields.START_INDEX: current_start_index,
-                    MatchDebugFields.NEXT_START_INDEX: start_index,
-                    MatchDebugFields.REACHED_END: reached_end,
-                    MatchDebugFields.CHOICE_COMBINED: choice_str,
-                    MatchDebugFields.CHOICE_CURRENT: current_choice_str,
-                    MatchDebugFields.CHOICE_NEXT: next_choice_str,
-                    MatchDebugFields.ACCEPTED: accept_match,
-                    MatchDebugFields.TAG_TO_CHOICE_MATCH: tag_to_choice_match,
-                    MatchDebugFields.SUB_ANNOTATION: self.is_sub_match,
-                    MatchDebugFields.FM_COMBINED: fm_combined,
-                    MatchDebugFields.FM_COMBINED_DETAILED: (
-                        fm_combined and fm_combined.detailed_str()
-                    ),
-                    MatchDebugFields.FM_CURRENT: fm,
-                    MatchDebugFields.FM_CURRENT_DETAILED: fm and fm.detailed_str(),
-                    MatchDebugFields.FM_NEXT: fm_next,
-                    MatchDebugFields.FM_NEXT_DETAILED: fm_next.detailed_str()
-                })
+                self.match_detail_reporter(self._get_match_detail_row(
+                    s1, current_start_index, start_index, reached_end,
+                    choice_str, current_choice_str, next_choice_str,
+                    accept_match, tag_to_choice_match, fm_combined, fm, fm_next
+                ))
             if is_last_match:
                 break
         if too_distant_choices:
@@ -490,29 +377,19 @@ class TargetAnnotationMatchFinder(object):
                 matched_choices,
                 LazyStr(lambda: ' '.join(str(choice.position) for choice in too_distant_choices))
             )
+        if pruned_choices:
+            get_logger().debug(
+                'ignored choices below min n-gram overlap (%s): %d',
+                self.min_ngram_overlap, len(pruned_choices)
+            )
 
 
-class CsvMatchDetailReporter(object):
-    def __init__(self, fp, filename=None, fields=None):
-        self.fp = fp
-        self.fields = fields or DEFAULT_MATCH_DEBUG_COLUMNS
-        self.writer = csv.writer(
-            fp,
-            delimiter=csv_delimiter_by_filename(filename)
-        )
-        self.writer.writerow(self.fields)
-        self.id = 1
-
-    def __call__(self, row):
-        get_logger().debug('logging debug match id %d', self.id)
-        write_csv_row(self.writer, [
-            self.id if k == MatchDebugFields.ID else row.get(k)
-            for k in self.fields
-        ])
-        self.id += 1
-
-    def close(self):
-        self.fp.close()
+def is_exact_match_candidate(target_annotation):
+    # bonding annotations depend on the proximity of fuzzy matched lines
+    return (
+        isinstance(target_annotation.value, six.string_types) and
+        not target_annotation.bonding
+    )
 
 
 def sorted_matches_by_position(matches):
@@ -538,7 +415,7 @@ def distance_between_matches(matches1, matches2):
 
 def _apply_sub_annotations(
         target_annotation, structured_document, matching_tokens,
-        match_detail_reporter, use_tag_begin_prefix):
+        match_detail_reporter, use_tag_begin_prefix, profiler=None):
 
     seq = SequenceWrapperWithPosition(
         structured_document, matching_tokens, normalise_str,
@@ -553,7 +430,8 @@ def _apply_sub_annotations(
             [seq],
             matched_choices=matched_choices,
             match_detail_reporter=match_detail_reporter,
-            is_sub_match=True
+            is_sub_match=True,
+            profiler=profiler
         )
         matches = match_finder.find_next_best_matches()
         matches = list(matches)
@@ -580,7 +458,8 @@ def _apply_annotations_to_matches(
         structured_document,
         matches,
         match_detail_reporter,
-        use_tag_begin_prefix):
+        use_tag_begin_prefix,
+        profiler=None):
 
     first_token = True
     all_matching_tokens = []
@@ -607,20 +486,30 @@ def _apply_annotations_to_matches(
         if target_annotation.sub_annotations:
             _apply_sub_annotations(
                 target_annotation, structured_document, all_matching_tokens,
-                match_detail_reporter, use_tag_begin_prefix
+                match_detail_reporter, use_tag_begin_prefix, profiler=profiler
             )
+    return all_matching_tokens
 
 
 class MatchingAnnotator(AbstractAnnotator):
     def __init__(
             self, target_annotations, match_detail_reporter=None,
-            use_tag_begin_prefix=False):
+            use_tag_begin_prefix=False, fuzzy_match_cache=None,
+            min_ngram_overlap=DEFAULT_MIN_NGRAM_OVERLAP,
+            use_exact_match=False,
+            process_count=None,
+            profiler=None):
 
         self.target_annotations = target_annotations
         self.match_detail_reporter = match_detail_reporter
         self.use_tag_begin_prefix = use_tag_begin_prefix
+        self.fuzzy_match_cache = fuzzy_match_cache
+        self.min_ngram_overlap = min_ngram_overlap
+        self.use_exact_match = use_exact_match
+        self.process_count = process_count
+        self.profiler = profiler
 
-    def annotate(self, structured_document):
+    def get_pending_sequences(self, structured_document):
         pending_sequences = []
         for page in structured_document.get_pages():
             for line in structured_document.get_lines_of_page(page):
@@ -640,15 +529,160 @@ class MatchingAnnotator(AbstractAnnotator):
                         normalise_and_remove_junk_str,
                         position=len(pending_sequences)
                     ))
+        return pending_sequences
+
+    def get_ngram_index(self, pending_sequences):
+        return (
+            SequenceNgramIndex(pending_sequences)
+            if self.min_ngram_overlap
+            else None
+        )
+
+    def get_exact_match_index(self, pending_sequences, target_values):
+        return (
+            ExactMatchIndex(pending_sequences, [
+                target_value if is_exact_match_candidate(target_annotation) else ''
+                for target_annotation, target_value in zip(self.target_annotations, target_values)
+            ])
+            if self.use_exact_match
+            else None
+        )
+
+    def iter_target_annotation_matches(
+            self, structured_document, target_annotation_index, target_value,
+            tracked_pending_sequences, matched_choices, ngram_index, exact_match_index,
+            fuzzy_match_cache=None, visited_positions=None):
+        """
+        Yields the matches for every matched item of the target annotation
+        (a single item unless match_multiple is enabled), followed by an empty list
+        if no further matches were found.
+        The matches are only searched for once requested, the caller is expected to
+        apply the matches and notify tracked_pending_sequences of the tagged tokens.
+        """
+        target_annotation = self.target_annotations[target_annotation_index]
+        if fuzzy_match_cache is None:
+            fuzzy_match_cache = self.fuzzy_match_cache
+        untagged_pending_sequences = tracked_pending_sequences.iter_untagged_sub_sequences(
+            visited_positions=visited_positions
+        )
+        match_finder = TargetAnnotationMatchFinder(
+            target_annotation,
+            target_value,
+            untagged_pending_sequences,
+            matched_choices=matched_choices,
+            match_detail_reporter=self.match_detail_reporter,
+            fuzzy_match_cache=fuzzy_match_cache,
+            ngram_index=ngram_index,
+            min_ngram_overlap=self.min_ngram_overlap,
+            profiler=self.profiler
+        )
+        exact_matches_iterator = (
+            exact_match_index.iter_untagged_matches(
+                target_annotation_index, target_value, structured_document
+            )
+            if exact_match_index is not None and is_exact_match_candidate(target_annotation)
+            else None
+        )
+        item_index = 0
+        while item_index == 0 or target_annotation.match_multiple:
+            matches = None
+            if exact_matches_iterator is not None:
+                matches = self._next_close_exact_matches(
+                    exact_matches_iterator, matched_choices, match_finder.max_gap
+                )
+                if matches is not None and self.profiler is not None:
+                    self.profiler.record_exact_match(target_annotation.name)
+                if matches is None:
+                    get_logger().debug('no further exact match, falling back to fuzzy match')
+                    exact_matches_iterator = None
+            if exact_matches_iterator is None:
+                get_logger().info('calling find_next_best_matches')
+                matches = sorted_matches_by_position(
+                    match_finder.find_next_best_matches()
+                )
+            yield matches or []
+            if not matches:
+                return
+            item_index += 1
+
+    def _next_close_exact_matches(self, exact_matches_iterator, matched_choices, max_gap):
+        # same proximity constraint as applied to the choices of the fuzzy match
+        for matches in exact_matches_iterator:
+            if all(matched_choices.is_close_to_any(m.seq2, max_gap=max_gap) for m in matches):
+                for m in matches:
+                    matched_choices.add(m.seq2)
+                return matches
+            get_logger().debug('ignored too distant exact match: %s', matches)
+        return None
+
+    def _is_parallel(self):
+        return (
+            self.process_count and self.process_count > 1 and
+            len(self.target_annotations) > 1 and
+            # the match details and profile are recorded as the matches are searched for
+            self.match_detail_reporter is None and
+            self.profiler is None
+        )
+
+    def __getstate__(self):
+        # the (potentially large) cache, reporter and profiler are specific to this process
+        state = self.__dict__.copy()
+        state['fuzzy_match_cache'] = None
+        state['match_detail_reporter'] = None
+        state['profiler'] = None
+        return state
+
+    def _is_speculative_result_applicable(
+            self, target_annotation, speculative_result,
+            tracked_pending_sequences, conditional_match):
+        if speculative_result is None:
+            return False
+        _, examined_positions = speculative_result
+        # a conditional match would get applied before searching for subsequent items
+        if conditional_match and target_annotation.match_multiple:
+            return False
+        return examined_positions.isdisjoint(tracked_pending_sequences.changed_positions)
+
+    def annotate(self, structured_document):
+        pending_sequences = self.get_pending_sequences(structured_document)
+        target_values = [
+            normalise_and_remove_junk_str_or_list(target_annotation.value)
+            for target_annotation in self.target_annotations
+        ]
+        if not self._is_parallel():
+            self._annotate_pending_sequences(
+                structured_document, pending_sequences, target_values
+            )
+            return structured_document
+        pool = get_shared_speculative_matching_pool(self.process_count)
+        self._annotate_pending_sequences(
+            structured_document, pending_sequences, target_values,
+            speculative_results=pool.imap_find_matches(
+                self, pending_sequences, target_values
+            )
+        )
+        return structured_document
+
+    def _annotate_pending_sequences(
+            self, structured_document, pending_sequences, target_values,
+            speculative_results=None):
+
+        ngram_index = self.get_ngram_index(pending_sequences)
+        exact_match_index = self.get_exact_match_index(pending_sequences, target_values)
+        tracked_pending_sequences = PendingSequences(pending_sequences)
 
         conditional_match = None
 
         matched_choices_map = dict()
-        for target_annotation in self.target_annotations:
+        for target_annotation_index, target_annotation in enumerate(self.target_annotations):
             get_logger().debug('target annotation: %s', target_annotation)
-            target_value = normalise_and_remove_junk_str_or_list(target_annotation.value)
-            untagged_pending_sequences = iter_flatten(
-                seq.untagged_sub_sequences() for seq in pending_sequences
+            stop_profiling = (
+                self.profiler.start_target_annotation(target_annotation.name)
+                if self.profiler is not None
+                else None
+            )
+            speculative_result = (
+                next(speculative_results) if speculative_results is not None else None
             )
             if target_annotation.bonding:
                 matched_choices = matched_choices_map.setdefault(
@@ -657,19 +691,25 @@ class MatchingAnnotator(AbstractAnnotator):
                 )
             else:
                 matched_choices = PositionedSequenceSet()
-            match_finder = TargetAnnotationMatchFinder(
-                target_annotation,
-                target_value,
-                untagged_pending_sequences,
-                matched_choices=matched_choices,
-                match_detail_reporter=self.match_detail_reporter
-            )
-            item_index = 0
-            while item_index == 0 or target_annotation.match_multiple:
-                get_logger().info('calling find_next_best_matches')
-                matches = sorted_matches_by_position(
-                    match_finder.find_next_best_matches()
+            if self._is_speculative_result_applicable(
+                    target_annotation, speculative_result,
+                    tracked_pending_sequences, conditional_match):
+                matches_by_item = (
+                    [from_speculative_match(x, pending_sequences) for x in speculative_matches]
+                    for speculative_matches in speculative_result[0]
+                )
+            else:
+                if speculative_result is not None:
+                    get_logger().debug(
+                        're-evaluating speculative matches of: %s', target_annotation
+                    )
+                matches_by_item = self.iter_target_annotation_matches(
+                    structured_document, target_annotation_index,
+                    target_values[target_annotation_index],
+                    tracked_pending_sequences, matched_choices,
+                    ngram_index, exact_match_index
                 )
+            for matches in matches_by_item:
                 if not matches:
                     conditional_match = None
                     break
@@ -678,21 +718,23 @@ class MatchingAnnotator(AbstractAnnotator):
                     conditional_match and
                     distance_between_matches(matches, conditional_match['matches']) <= 1
                 ):
-                    _apply_annotations_to_matches(
+                    tracked_pending_sequences.mark_tagged(_apply_annotations_to_matches(
                         conditional_match['target_annotation'],
                         structured_document,
                         conditional_match['matches'],
-                        self.match_detail_reporter, self.use_tag_begin_prefix
-                    )
+                        self.match_detail_reporter, self.use_tag_begin_prefix,
+                        profiler=self.profiler
+                    ))
                 if target_annotation.require_next:
                     conditional_match = dict(
                         target_annotation=target_annotation,
                         matches=matches
                     )
                 else:
-                    _apply_annotations_to_matches(
+                    tracked_pending_sequences.mark_tagged(_apply_annotations_to_matches(
                         target_annotation, structured_document, matches,
-                        self.match_detail_reporter, self.use_tag_begin_prefix
-                    )
-                item_index += 1
-        return structured_document
+                        self.match_detail_reporter, self.use_tag_begin_prefix,
+                        profiler=self.profiler
+                    ))
+            if stop_profiling is not None:
+                stop_profiling()
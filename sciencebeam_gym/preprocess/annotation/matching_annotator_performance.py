@@ -0,0 +1,92 @@
+from __future__ import absolute_import, print_function
+
+import logging
+import timeit
+
+from sciencebeam_gym.structured_document import (
+    SimpleStructuredDocument,
+    SimpleLine,
+    SimpleToken
+)
+
+from sciencebeam_gym.preprocess.annotation.target_annotation import (
+    TargetAnnotation
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_annotator import (
+    MatchingAnnotator,
+    DEFAULT_MAX_MATCH_GAP
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_sequences import (
+    PositionedSequenceSet
+)
+
+BONDED_MATCH_COUNT = 500
+BONDED_MATCH_SPACING = 3
+LINE_COUNT = BONDED_MATCH_COUNT * BONDED_MATCH_SPACING
+
+REFERENCE_COUNT = 50
+
+
+class PositionedSequence(object):
+    def __init__(self, position):
+        self.position = position
+
+
+def _positioned_sequence_set_with_bonded_matches():
+    positioned_sequence_set = PositionedSequenceSet()
+    for i in range(BONDED_MATCH_COUNT):
+        positioned_sequence_set.add(PositionedSequence(i * BONDED_MATCH_SPACING))
+    return positioned_sequence_set
+
+
+POSITIONED_SEQUENCE_SET = _positioned_sequence_set_with_bonded_matches()
+CHOICES = [PositionedSequence(position) for position in range(-100, LINE_COUNT + 100)]
+
+
+def _reference_document_and_target_annotations():
+    lines = []
+    target_annotations = []
+    for i in range(REFERENCE_COUNT):
+        reference_text = 'reference %d by some author et al in some journal' % i
+        lines.append(SimpleLine([SimpleToken(s) for s in reference_text.split(' ')]))
+        lines.append(SimpleLine([SimpleToken(s) for s in 'other text'.split(' ')]))
+        target_annotations.append(TargetAnnotation(
+            reference_text.split(' '), 'reference', bonding=True
+        ))
+    return SimpleStructuredDocument(lines=lines), target_annotations
+
+
+def test_is_close_to_any_with_bonded_matches():
+    for choice in CHOICES:
+        POSITIONED_SEQUENCE_SET.is_close_to_any(choice, max_gap=DEFAULT_MAX_MATCH_GAP)
+
+
+def test_annotate_bonded_references():
+    structured_document, target_annotations = _reference_document_and_target_annotations()
+    MatchingAnnotator(target_annotations).annotate(structured_document)
+
+
+def report_timing(fn, number=1):
+    timeit_result_ms = timeit.timeit(
+        fn + "()",
+        setup="from __main__ import " + fn,
+        number=number
+    ) * 1000
+    print("{} ({}x):\n{:f} ms / it ({:f} ms total)\n".format(
+        fn, number, timeit_result_ms / number, timeit_result_ms
+    ))
+
+
+def main():
+    print("bonded matches: {}, choices: {}\n".format(BONDED_MATCH_COUNT, len(CHOICES)))
+    report_timing("test_is_close_to_any_with_bonded_matches", 10)
+    print("bonded references: {}\n".format(REFERENCE_COUNT))
+    report_timing("test_annotate_bonded_references")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level='WARNING')
+
+    main()
@@ -16,10 +16,20 @@ from sciencebeam_gym.preprocess.annotation.target_annotation import (
     TargetAnnotation
 )
 
+from sciencebeam_gym.preprocess.annotation.fuzzy_match import (
+    FuzzyMatchCache
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_profile import (
+    MatchingProfiler
+)
+
 from sciencebeam_gym.preprocess.annotation.matching_annotator import (
     normalise_str,
-    MatchingAnnotator,
-    SequenceWrapper,
+    MatchingAnnotator
+)
+
+from sciencebeam_gym.preprocess.annotation.text_normalisation import (
     THIN_SPACE,
     EN_DASH,
     EM_DASH
@@ -83,32 +93,6 @@ class TestNormaliseStr(object):
         assert normalise_str(EN_DASH) == '-'
 
 
-class TestSequenceWrapper(object):
-    def test_should_find_all_tokens_without_str_filter(self):
-        text = 'this is matching'
-        tokens = _tokens_for_text(text)
-        doc = _document_for_tokens([tokens])
-        seq = SequenceWrapper(doc, tokens)
-        assert str(seq) == text
-        assert list(seq.tokens_between((0, len(text)))) == tokens
-
-    def test_should_find_tokens_between_without_str_filter(self):
-        text = 'this is matching'
-        tokens = _tokens_for_text(text)
-        doc = _document_for_tokens([tokens])
-        seq = SequenceWrapper(doc, tokens)
-        assert str(seq) == text
-        assert list(seq.tokens_between((6, 7))) == [tokens[1]]
-
-    def test_should_find_tokens_between_adjusted_indices_due_to_str_filter(self):
-        text = 'this is matching'
-        tokens = _tokens_for_text(text)
-        doc = _document_for_tokens([tokens])
-        seq = SequenceWrapper(doc, tokens, str_filter_f=lambda s: s.replace('th', ''))
-        assert str(seq) == 'is is matching'
-        assert list(seq.tokens_between((4, 5))) == [tokens[1]]
-
-
 class TestMatchingAnnotator(object):
     def test_should_not_fail_on_empty_document(self):
         doc = SimpleStructuredDocument(lines=[])
@@ -698,6 +682,61 @@ class TestMatchingAnnotator(object):
             [B_TAG_1, I_TAG_1, I_TAG_1, B_TAG_1, I_TAG_1, I_TAG_1]
         )
 
+    def test_should_annotate_the_same_using_fuzzy_match_cache(self):
+        matching_tokens_per_line = [
+            _tokens_for_text('this is matching'),
+            _tokens_for_text('this is matching')
+        ]
+        copied_tokens_per_line = [_copy_tokens(tokens) for tokens in matching_tokens_per_line]
+        target_annotations = [
+            TargetAnnotation('this is matching', TAG1, match_multiple=True)
+        ]
+        fuzzy_match_cache = FuzzyMatchCache()
+        annotator = MatchingAnnotator(target_annotations, fuzzy_match_cache=fuzzy_match_cache)
+        annotator.annotate(_document_for_tokens(matching_tokens_per_line))
+        assert fuzzy_match_cache.miss_count > 0
+        assert fuzzy_match_cache.hit_count == 0
+        annotator.annotate(_document_for_tokens(copied_tokens_per_line))
+        assert fuzzy_match_cache.hit_count == fuzzy_match_cache.miss_count
+        assert (
+            _get_tags_of_tokens(flatten(copied_tokens_per_line)) ==
+            _get_tags_of_tokens(flatten(matching_tokens_per_line))
+        )
+        assert _get_tags_of_tokens(flatten(copied_tokens_per_line)) == [TAG1] * 6
+
+    def test_should_annotate_the_same_with_min_ngram_overlap(self):
+        matching_tokens = _tokens_for_text('this is matching')
+        similar_tokens = _tokens_for_text('this is matchinx')
+        not_matching_tokens = _tokens_for_text('something completely different')
+        target_annotations = [
+            TargetAnnotation('this is matching', TAG1)
+        ]
+        doc = _document_for_tokens([not_matching_tokens, similar_tokens, matching_tokens])
+        MatchingAnnotator(target_annotations, min_ngram_overlap=0.5).annotate(doc)
+        assert _get_tags_of_tokens(matching_tokens) == [TAG1] * len(matching_tokens)
+        assert _get_tags_of_tokens(similar_tokens) == [None] * len(similar_tokens)
+        assert _get_tags_of_tokens(not_matching_tokens) == [None] * len(not_matching_tokens)
+
+    def test_should_not_align_lines_below_min_ngram_overlap(self):
+        not_matching_texts = ['something completely different', 'other text', 'and more']
+        target_annotations = [
+            TargetAnnotation('this is matching', TAG1)
+        ]
+        alignment_count_by_min_ngram_overlap = {}
+        for min_ngram_overlap in [0, 0.5]:
+            matching_tokens = _tokens_for_text('this is matching')
+            doc = _document_for_tokens(
+                [_tokens_for_text(s) for s in not_matching_texts] + [matching_tokens]
+            )
+            fuzzy_match_cache = FuzzyMatchCache()
+            MatchingAnnotator(
+                target_annotations, fuzzy_match_cache=fuzzy_match_cache,
+                min_ngram_overlap=min_ngram_overlap
+            ).annotate(doc)
+            assert _get_tags_of_tokens(matching_tokens) == [TAG1] * len(matching_tokens)
+            alignment_count_by_min_ngram_overlap[min_ngram_overlap] = fuzzy_match_cache.miss_count
+        assert alignment_count_by_min_ngram_overlap == {0: 4, 0.5: 2}
+
     def test_should_not_override_annotation(self):
         matching_tokens_per_line = [
             _tokens_for_text('this is matching')
@@ -811,6 +850,28 @@ class TestMatchingAnnotator(object):
         assert _get_tags_of_tokens(matching_tokens) == [TAG1] * len(matching_tokens)
         assert _get_tags_of_tokens(same_matching_tokens) == [TAG1] * len(same_matching_tokens)
 
+    def test_should_record_profile_per_target_annotation_name(self):
+        matching_tokens = _tokens_for_text('this is matching')
+        other_tokens = _tokens_for_text('something else')
+        target_annotations = [
+            TargetAnnotation('this is matching', TAG1),
+            TargetAnnotation('not in the document', TAG2)
+        ]
+        doc = _document_for_tokens([other_tokens, matching_tokens])
+        profiler = MatchingProfiler()
+        MatchingAnnotator(target_annotations, profiler=profiler).annotate(doc)
+        assert _get_tags_of_tokens(matching_tokens) == [TAG1] * len(matching_tokens)
+        assert list(profiler.stats_by_tag.keys()) == [TAG1, TAG2]
+        tag1_stats = profiler.get_stats(TAG1)
+        assert tag1_stats.target_annotation_count == 1
+        assert tag1_stats.alignment_count == 2
+        assert tag1_stats.accepted_count == 1
+        assert tag1_stats.rejected_count == 1
+        assert tag1_stats.aligned_character_count > 0
+        tag2_stats = profiler.get_stats(TAG2)
+        assert tag2_stats.accepted_count == 0
+        assert tag2_stats.wall_time >= 0
+
 
 class TestMatchingAnnotatorSubAnnotations(object):
     def test_should_annotate_sub_tag_exactly_matching_without_begin_prefix(self):
@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+
+
+class MatchingProfileFields(object):
+    DOCUMENT = 'document'
+    TAG = 'tag'
+    TARGET_ANNOTATION_COUNT = 'target_annotation_count'
+    WALL_TIME = 'wall_time'
+    ALIGNMENT_COUNT = 'alignment_count'
+    ALIGNED_CHARACTER_COUNT = 'aligned_character_count'
+    EXACT_MATCH_COUNT = 'exact_match_count'
+    ACCEPTED_COUNT = 'accepted_count'
+    REJECTED_COUNT = 'rejected_count'
+
+
+DEFAULT_MATCHING_PROFILE_COLUMNS = [
+    MatchingProfileFields.DOCUMENT,
+    MatchingProfileFields.TAG,
+    MatchingProfileFields.TARGET_ANNOTATION_COUNT,
+    MatchingProfileFields.WALL_TIME,
+    MatchingProfileFields.ALIGNMENT_COUNT,
+    MatchingProfileFields.ALIGNED_CHARACTER_COUNT,
+    MatchingProfileFields.EXACT_MATCH_COUNT,
+    MatchingProfileFields.ACCEPTED_COUNT,
+    MatchingProfileFields.REJECTED_COUNT
+]
+
+
+class TagMatchingStats(object):
+    def __init__(self):
+        self.target_annotation_count = 0
+        self.wall_time = 0.0
+        self.alignment_count = 0
+        self.aligned_character_count = 0
+        self.exact_match_count = 0
+        self.accepted_count = 0
+        self.rejected_count = 0
+
+
+class MatchingProfiler(object):
+    """
+    Collects the matching statistics per target annotation name (tag),
+    e.g. to find out which fields of an xml mapping dominate the annotation time.
+    Sub annotations are recorded under their own name,
+    their wall time is also included in the one of the parent.
+    """
+
+    def __init__(self, timer=time.time):
+        self.timer = timer
+        self.stats_by_tag = OrderedDict()
+
+    def get_stats(self, tag):
+        stats = self.stats_by_tag.get(tag)
+        if stats is None:
+            stats = TagMatchingStats()
+            self.stats_by_tag[tag] = stats
+        return stats
+
+    def start_target_annotation(self, tag):
+        """
+        Records the start of processing a target annotation.
+        Returns a function to be called once the target annotation was processed.
+        """
+        stats = self.get_stats(tag)
+        stats.target_annotation_count += 1
+        start_time = self.timer()
+
+        def stop():
+            stats.wall_time += self.timer() - start_time
+        return stop
+
+    def record_alignment(self, tag, a, b):
+        stats = self.get_stats(tag)
+        stats.alignment_count += 1
+        stats.aligned_character_count += len(a) + len(b)
+
+    def record_exact_match(self, tag):
+        self.get_stats(tag).exact_match_count += 1
+
+    def record_choice(self, tag, accepted):
+        stats = self.get_stats(tag)
+        if accepted:
+            stats.accepted_count += 1
+        else:
+            stats.rejected_count += 1
+
+    def to_csv_dict_rows(self, document=None):
+        return [
+            {
+                MatchingProfileFields.DOCUMENT: document,
+                MatchingProfileFields.TAG: tag,
+                MatchingProfileFields.TARGET_ANNOTATION_COUNT: stats.target_annotation_count,
+                MatchingProfileFields.WALL_TIME: stats.wall_time,
+                MatchingProfileFields.ALIGNMENT_COUNT: stats.alignment_count,
+                MatchingProfileFields.ALIGNED_CHARACTER_COUNT: stats.aligned_character_count,
+                MatchingProfileFields.EXACT_MATCH_COUNT: stats.exact_match_count,
+                MatchingProfileFields.ACCEPTED_COUNT: stats.accepted_count,
+                MatchingProfileFields.REJECTED_COUNT: stats.rejected_count
+            }
+            for tag, stats in self.stats_by_tag.items()
+        ]
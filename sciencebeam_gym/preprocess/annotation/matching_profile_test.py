@@ -0,0 +1,48 @@
+from sciencebeam_gym.preprocess.annotation.matching_profile import (
+    MatchingProfiler,
+    MatchingProfileFields
+)
+
+TAG1 = 'tag1'
+TAG2 = 'tag2'
+
+
+class _FakeTimer(object):
+    def __init__(self, times):
+        self.times = list(times)
+
+    def __call__(self):
+        return self.times.pop(0)
+
+
+class TestMatchingProfiler(object):
+    def test_should_return_no_rows_without_recorded_stats(self):
+        assert MatchingProfiler().to_csv_dict_rows() == []
+
+    def test_should_accumulate_wall_time_per_tag(self):
+        profiler = MatchingProfiler(timer=_FakeTimer([1.0, 3.0, 10.0, 11.0]))
+        stop = profiler.start_target_annotation(TAG1)
+        stop()
+        stop = profiler.start_target_annotation(TAG1)
+        stop()
+        stats = profiler.get_stats(TAG1)
+        assert stats.target_annotation_count == 2
+        assert stats.wall_time == 3.0
+
+    def test_should_record_alignments_and_choices(self):
+        profiler = MatchingProfiler()
+        profiler.record_alignment(TAG1, 'abc', 'de')
+        profiler.record_alignment(TAG1, 'a', 'b')
+        profiler.record_choice(TAG1, True)
+        profiler.record_choice(TAG1, False)
+        profiler.record_choice(TAG1, False)
+        profiler.record_exact_match(TAG2)
+        rows = profiler.to_csv_dict_rows(document='doc1')
+        assert [row[MatchingProfileFields.TAG] for row in rows] == [TAG1, TAG2]
+        assert rows[0][MatchingProfileFields.DOCUMENT] == 'doc1'
+        assert rows[0][MatchingProfileFields.ALIGNMENT_COUNT] == 2
+        assert rows[0][MatchingProfileFields.ALIGNED_CHARACTER_COUNT] == 7
+        assert rows[0][MatchingProfileFields.ACCEPTED_COUNT] == 1
+        assert rows[0][MatchingProfileFields.REJECTED_COUNT] == 2
+        assert rows[1][MatchingProfileFields.EXACT_MATCH_COUNT] == 1
+        assert rows[1][MatchingProfileFields.ALIGNMENT_COUNT] == 0
@@ -0,0 +1,190 @@
+from bisect import bisect_left, bisect_right, insort
+
+from sciencebeam_utils.utils.compat import (
+    python_2_unicode_compatible
+)
+
+from sciencebeam_utils.utils.collection import (
+    extract_from_dict
+)
+
+
+class SequenceWrapper(object):
+    def __init__(self, structured_document, tokens, str_filter_f=None, token_str_list=None):
+        self.structured_document = structured_document
+        self.str_filter_f = str_filter_f
+        self.tokens = tokens
+        if token_str_list is None:
+            token_str_list = [structured_document.get_text(t) or '' for t in tokens]
+            if str_filter_f:
+                token_str_list = [str_filter_f(s) for s in token_str_list]
+        self.token_str_list = token_str_list
+        self.tokens_as_str = ' '.join(self.token_str_list)
+        # start and end offsets of each token within tokens_as_str (both strictly increasing)
+        self.token_start_offsets = []
+        self.token_end_offsets = []
+        i = 0
+        for token_str in self.token_str_list:
+            self.token_start_offsets.append(i)
+            i += len(token_str)
+            self.token_end_offsets.append(i)
+            i += 1
+
+    def tokens_between(self, index_range):
+        start, end = index_range
+        first_index = bisect_right(self.token_end_offsets, start)
+        end_index = bisect_left(self.token_start_offsets, end)
+        return self.tokens[first_index:end_index]
+
+    def sub_sequence_for_tokens(self, tokens, token_str_list=None):
+        return SequenceWrapper(
+            self.structured_document, tokens, str_filter_f=self.str_filter_f,
+            token_str_list=token_str_list
+        )
+
+    def untagged_sub_sequences(self):
+        token_tags = [self.structured_document.get_tag(t) for t in self.tokens]
+        tagged_count = len([t for t in token_tags if t])
+        if tagged_count == 0:
+            yield self
+        elif tagged_count == len(self.tokens):
+            pass
+        else:
+            untagged_start = None
+            for i, tag in enumerate(token_tags):
+                if not tag:
+                    if untagged_start is None:
+                        untagged_start = i
+                elif untagged_start is not None:
+                    yield self.sub_sequence_for_tokens(
+                        self.tokens[untagged_start:i], self.token_str_list[untagged_start:i]
+                    )
+                    untagged_start = None
+            if untagged_start is not None:
+                yield self.sub_sequence_for_tokens(
+                    self.tokens[untagged_start:], self.token_str_list[untagged_start:]
+                )
+
+    def __str__(self):
+        return self.tokens_as_str
+
+    def __repr__(self):
+        return '{}({})'.format('SequenceWrapper', self.tokens_as_str)
+
+
+class SequenceWrapperWithPosition(SequenceWrapper):
+    def __init__(self, *args, **kwargs):
+        position, kwargs = extract_from_dict(kwargs, 'position')
+        super(SequenceWrapperWithPosition, self).__init__(*args, **kwargs)
+        self.position = position
+
+    def sub_sequence_for_tokens(self, tokens, token_str_list=None):
+        return SequenceWrapperWithPosition(
+            self.structured_document, tokens,
+            str_filter_f=self.str_filter_f,
+            token_str_list=token_str_list,
+            position=self.position
+        )
+
+    def __repr__(self):
+        return '{}({}, {})'.format('SequenceWrapperWithPosition', self.tokens_as_str, self.position)
+
+
+class PendingSequences(object):
+    """
+    Keeps track of the untagged sub sequences of the pending sequences (e.g. lines).
+    Only sequences with newly tagged tokens (see mark_tagged) are re-evaluated.
+    """
+
+    def __init__(self, sequences):
+        self.sequences = sequences
+        self._sequence_index_by_token_id = {
+            id(token): i
+            for i, seq in enumerate(sequences)
+            for token in seq.tokens
+        }
+        self._untagged_sub_sequences_list = [
+            list(seq.untagged_sub_sequences())
+            for seq in sequences
+        ]
+        # positions (indices) of sequences with tokens tagged since creation
+        self.changed_positions = set()
+
+    def mark_tagged(self, tokens):
+        changed_sequence_indices = {
+            self._sequence_index_by_token_id.get(id(token))
+            for token in tokens
+        } - {None}
+        for i in changed_sequence_indices:
+            # replace rather than modify the list, in case it is being iterated over
+            self._untagged_sub_sequences_list[i] = list(
+                self.sequences[i].untagged_sub_sequences()
+            )
+        self.changed_positions.update(changed_sequence_indices)
+
+    def iter_untagged_sub_sequences(self, visited_positions=None):
+        # lazily evaluated, in order to reflect tokens tagged while iterating
+        for i in range(len(self.sequences)):
+            if visited_positions is not None:
+                visited_positions.add(i)
+            for sub_sequence in self._untagged_sub_sequences_list[i]:
+                yield sub_sequence
+
+
+@python_2_unicode_compatible
+class SequenceMatch(object):
+    def __init__(self, seq1, seq2, index1_range, index2_range):
+        self.seq1 = seq1
+        self.seq2 = seq2
+        self.index1_range = index1_range
+        self.index2_range = index2_range
+
+    def __repr__(self):
+        return u"SequenceMatch('{}'[{}:{}], '{}'[{}:{}])".format(
+            self.seq1,
+            self.index1_range[0],
+            self.index1_range[1],
+            self.seq2,
+            self.index2_range[0],
+            self.index2_range[1]
+        )
+
+
+@python_2_unicode_compatible
+class PositionedSequenceSet(object):
+    def __init__(self):
+        self.data = set()
+        self._sorted_positions = []
+
+    def add(self, sequence):
+        position = sequence.position
+        if position not in self.data:
+            self.data.add(position)
+            insort(self._sorted_positions, position)
+
+    def is_close_to_any(self, sequence, max_gap):
+        if not max_gap or not self.data:
+            return True
+        position = sequence.position
+        max_distance = max_gap + 1
+        # the first position not below the minimum, which also needs to be within the maximum
+        i = bisect_left(self._sorted_positions, position - max_distance)
+        return (
+            i < len(self._sorted_positions) and
+            self._sorted_positions[i] <= position + max_distance
+        )
+
+    def __str__(self):
+        return str(self.data)
+
+
+def offset_range_by(index_range, offset):
+    if not offset:
+        return index_range
+    return (offset + index_range[0], offset + index_range[1])
+
+
+def skip_whitespaces(s, start):
+    while start < len(s) and s[start].isspace():
+        start += 1
+    return start
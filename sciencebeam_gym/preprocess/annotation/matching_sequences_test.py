@@ -0,0 +1,162 @@
+from sciencebeam_gym.structured_document import (
+    SimpleStructuredDocument,
+    SimpleLine,
+    SimpleToken
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_sequences import (
+    SequenceWrapper,
+    SequenceWrapperWithPosition,
+    PendingSequences,
+    PositionedSequenceSet
+)
+
+TAG1 = 'tag1'
+
+
+def _tokens_for_text(text):
+    return [SimpleToken(s) for s in text.split(' ')]
+
+
+def _document_for_tokens(tokens_by_line):
+    return SimpleStructuredDocument(lines=[SimpleLine(tokens) for tokens in tokens_by_line])
+
+
+class TestSequenceWrapper(object):
+    def test_should_find_all_tokens_without_str_filter(self):
+        text = 'this is matching'
+        tokens = _tokens_for_text(text)
+        doc = _document_for_tokens([tokens])
+        seq = SequenceWrapper(doc, tokens)
+        assert str(seq) == text
+        assert list(seq.tokens_between((0, len(text)))) == tokens
+
+    def test_should_find_tokens_between_without_str_filter(self):
+        text = 'this is matching'
+        tokens = _tokens_for_text(text)
+        doc = _document_for_tokens([tokens])
+        seq = SequenceWrapper(doc, tokens)
+        assert str(seq) == text
+        assert list(seq.tokens_between((6, 7))) == [tokens[1]]
+
+    def test_should_find_tokens_between_adjusted_indices_due_to_str_filter(self):
+        text = 'this is matching'
+        tokens = _tokens_for_text(text)
+        doc = _document_for_tokens([tokens])
+        seq = SequenceWrapper(doc, tokens, str_filter_f=lambda s: s.replace('th', ''))
+        assert str(seq) == 'is is matching'
+        assert list(seq.tokens_between((4, 5))) == [tokens[1]]
+
+    def test_should_find_tokens_between_partially_overlapping_range(self):
+        text = 'this is matching'
+        tokens = _tokens_for_text(text)
+        doc = _document_for_tokens([tokens])
+        seq = SequenceWrapper(doc, tokens)
+        assert list(seq.tokens_between((3, 9))) == tokens
+        assert list(seq.tokens_between((4, 5))) == []
+        assert list(seq.tokens_between((5, 9))) == [tokens[1], tokens[2]]
+        assert list(seq.tokens_between((16, 20))) == []
+
+    def test_should_find_tokens_between_with_blank_token(self):
+        tokens = _tokens_for_text('this  matching')
+        doc = _document_for_tokens([tokens])
+        seq = SequenceWrapper(doc, tokens)
+        assert list(seq.tokens_between((0, 4))) == [tokens[0]]
+        assert list(seq.tokens_between((4, 6))) == [tokens[1]]
+        assert list(seq.tokens_between((6, 14))) == [tokens[2]]
+
+    def test_should_reuse_filtered_token_str_for_untagged_sub_sequences(self):
+        tokens = _tokens_for_text('this is matching')
+        tokens[1].set_tag(TAG1)
+        doc = _document_for_tokens([tokens])
+        filtered = []
+
+        def str_filter_f(s):
+            filtered.append(s)
+            return s.upper()
+
+        seq = SequenceWrapper(doc, tokens, str_filter_f=str_filter_f)
+        sub_sequences = list(seq.untagged_sub_sequences())
+        assert [str(x) for x in sub_sequences] == ['THIS', 'MATCHING']
+        assert [x.tokens for x in sub_sequences] == [[tokens[0]], [tokens[2]]]
+        assert filtered == ['this', 'is', 'matching']
+
+
+class PositionedSequence(object):
+    def __init__(self, position):
+        self.position = position
+
+
+class TestPositionedSequenceSet(object):
+    def test_should_be_close_to_any_if_empty(self):
+        assert PositionedSequenceSet().is_close_to_any(PositionedSequence(100), max_gap=1)
+
+    def test_should_be_close_to_any_without_max_gap(self):
+        positioned_sequence_set = PositionedSequenceSet()
+        positioned_sequence_set.add(PositionedSequence(1))
+        assert positioned_sequence_set.is_close_to_any(PositionedSequence(100), max_gap=None)
+
+    def test_should_be_close_to_position_within_max_gap(self):
+        positioned_sequence_set = PositionedSequenceSet()
+        for position in [10, 20, 30]:
+            positioned_sequence_set.add(PositionedSequence(position))
+        max_gap = 2
+        assert [
+            position
+            for position in range(40)
+            if positioned_sequence_set.is_close_to_any(
+                PositionedSequence(position), max_gap=max_gap
+            )
+        ] == list(range(7, 14)) + list(range(17, 24)) + list(range(27, 34))
+
+    def test_should_ignore_duplicate_positions(self):
+        positioned_sequence_set = PositionedSequenceSet()
+        positioned_sequence_set.add(PositionedSequence(10))
+        positioned_sequence_set.add(PositionedSequence(10))
+        assert str(positioned_sequence_set) == str({10})
+        assert not positioned_sequence_set.is_close_to_any(PositionedSequence(20), max_gap=1)
+
+
+class TestPendingSequences(object):
+    def _pending_sequences_for_tokens_per_line(self, tokens_per_line):
+        doc = _document_for_tokens(tokens_per_line)
+        return PendingSequences([
+            SequenceWrapperWithPosition(doc, tokens, position=i)
+            for i, tokens in enumerate(tokens_per_line)
+        ])
+
+    def test_should_return_all_sequences_without_tagged_tokens(self):
+        tokens_per_line = [_tokens_for_text('this is'), _tokens_for_text('matching')]
+        pending_sequences = self._pending_sequences_for_tokens_per_line(tokens_per_line)
+        assert [
+            str(x) for x in pending_sequences.iter_untagged_sub_sequences()
+        ] == ['this is', 'matching']
+
+    def test_should_only_update_sequences_with_newly_tagged_tokens(self):
+        tokens_per_line = [_tokens_for_text('this is'), _tokens_for_text('matching')]
+        pending_sequences = self._pending_sequences_for_tokens_per_line(tokens_per_line)
+        second_sequence = list(pending_sequences.iter_untagged_sub_sequences())[1]
+        tokens_per_line[0][0].set_tag(TAG1)
+        pending_sequences.mark_tagged([tokens_per_line[0][0]])
+        untagged_sub_sequences = list(pending_sequences.iter_untagged_sub_sequences())
+        assert [str(x) for x in untagged_sub_sequences] == ['is', 'matching']
+        assert untagged_sub_sequences[1] is second_sequence
+
+    def test_should_reflect_tokens_tagged_while_iterating(self):
+        tokens_per_line = [_tokens_for_text('this is'), _tokens_for_text('matching')]
+        pending_sequences = self._pending_sequences_for_tokens_per_line(tokens_per_line)
+        untagged_sub_sequences = pending_sequences.iter_untagged_sub_sequences()
+        assert str(next(untagged_sub_sequences)) == 'this is'
+        tokens_per_line[1][0].set_tag(TAG1)
+        pending_sequences.mark_tagged([tokens_per_line[1][0]])
+        assert list(untagged_sub_sequences) == []
+
+    def test_should_record_visited_and_changed_positions(self):
+        tokens_per_line = [_tokens_for_text('this is'), _tokens_for_text('matching')]
+        pending_sequences = self._pending_sequences_for_tokens_per_line(tokens_per_line)
+        visited_positions = set()
+        next(pending_sequences.iter_untagged_sub_sequences(visited_positions))
+        assert visited_positions == {0}
+        tokens_per_line[1][0].set_tag(TAG1)
+        pending_sequences.mark_tagged([tokens_per_line[1][0]])
+        assert pending_sequences.changed_positions == {1}
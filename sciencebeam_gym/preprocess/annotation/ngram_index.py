@@ -0,0 +1,63 @@
+from __future__ import division
+
+from builtins import str as text
+from collections import defaultdict
+
+
+DEFAULT_NGRAM_SIZE = 3
+
+
+def get_char_ngrams(s, n=DEFAULT_NGRAM_SIZE):
+    # whitespace is ignored, making the n-grams independent of how words were split
+    s = ''.join(s.split())
+    if len(s) <= n:
+        return {s} if s else set()
+    return {s[i:i + n] for i in range(len(s) - n + 1)}
+
+
+class SequenceNgramIndex(object):
+    """
+    Inverted index of the character n-grams of positioned sequences (e.g. lines).
+    Used to find the sequences that are worth aligning against a value.
+    """
+
+    def __init__(self, sequences, n=DEFAULT_NGRAM_SIZE):
+        self.n = n
+        self.positions_by_ngram = defaultdict(set)
+        self.ngram_count_by_position = {}
+        for sequence in sequences:
+            ngrams = get_char_ngrams(text(sequence), n)
+            self.ngram_count_by_position[sequence.position] = len(ngrams)
+            for ngram in ngrams:
+                self.positions_by_ngram[ngram].add(sequence.position)
+
+    def is_prunable(self, value):
+        # shorter values would only consist of a single n-gram (the whole value),
+        # not overlapping with longer sequences containing the value
+        return len(''.join(value.split())) > self.n
+
+    def get_overlap_by_position(self, value):
+        """
+        Returns the n-gram overlap of the value with every sequence sharing at least one
+        n-gram. The overlap is relative to the number of n-grams of the shorter of the two,
+        in order to also consider partial values (spanning lines) or lines partially
+        containing the value.
+        """
+        value_ngrams = get_char_ngrams(value, self.n)
+        common_count_by_position = defaultdict(int)
+        for ngram in value_ngrams:
+            for position in self.positions_by_ngram.get(ngram, ()):
+                common_count_by_position[position] += 1
+        return {
+            position: common_count / min(
+                len(value_ngrams), self.ngram_count_by_position[position]
+            )
+            for position, common_count in common_count_by_position.items()
+        }
+
+    def get_positions_with_min_overlap(self, value, min_overlap):
+        return {
+            position
+            for position, overlap in self.get_overlap_by_position(value).items()
+            if overlap >= min_overlap
+        }
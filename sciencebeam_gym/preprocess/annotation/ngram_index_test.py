@@ -0,0 +1,91 @@
+from __future__ import division
+
+from sciencebeam_gym.structured_document import (
+    SimpleStructuredDocument,
+    SimpleLine,
+    SimpleToken
+)
+
+from sciencebeam_gym.preprocess.annotation.target_annotation import (
+    TargetAnnotation
+)
+
+from sciencebeam_gym.preprocess.annotation.ngram_index import (
+    get_char_ngrams,
+    SequenceNgramIndex
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_annotator import (
+    MatchingAnnotator
+)
+
+TAG1 = 'tag1'
+
+
+class PositionedText(object):
+    def __init__(self, text, position):
+        self.text = text
+        self.position = position
+
+    def __str__(self):
+        return self.text
+
+
+def _positioned_texts(texts):
+    return [PositionedText(s, i) for i, s in enumerate(texts)]
+
+
+def _get_tags_of_tokens(tokens):
+    return [t.get_tag() for t in tokens]
+
+
+def _tokens_for_text(text):
+    return [SimpleToken(s) for s in text.split(' ')]
+
+
+class TestGetCharNgrams(object):
+    def test_should_return_empty_set_for_empty_str(self):
+        assert get_char_ngrams('', 3) == set()
+
+    def test_should_return_whole_str_if_shorter_than_n(self):
+        assert get_char_ngrams('ab', 3) == {'ab'}
+
+    def test_should_return_ngrams_ignoring_whitespace(self):
+        assert get_char_ngrams('ab cd', 3) == {'abc', 'bcd'}
+
+
+class TestSequenceNgramIndex(object):
+    def test_should_return_full_overlap_for_identical_text(self):
+        index = SequenceNgramIndex(_positioned_texts(['this is matching', 'other']))
+        assert index.get_overlap_by_position('this is matching') == {0: 1.0}
+
+    def test_should_return_full_overlap_for_line_within_longer_value(self):
+        index = SequenceNgramIndex(_positioned_texts(['this is', 'matching']))
+        overlap_by_position = index.get_overlap_by_position('this is matching')
+        assert overlap_by_position == {0: 1.0, 1: 1.0}
+
+    def test_should_return_partial_overlap(self):
+        index = SequenceNgramIndex(_positioned_texts(['abcdx']))
+        assert index.get_overlap_by_position('abcde') == {0: 2 / 3}
+
+    def test_should_only_return_positions_with_min_overlap(self):
+        index = SequenceNgramIndex(_positioned_texts(['abcdx', 'abcde', 'xyz']))
+        assert index.get_positions_with_min_overlap('abcde', 0.9) == {1}
+        assert index.get_positions_with_min_overlap('abcde', 0.5) == {0, 1}
+
+    def test_should_only_be_prunable_by_values_longer_than_n(self):
+        index = SequenceNgramIndex(_positioned_texts(['volume 12 issue 3']))
+        assert not index.is_prunable('12')
+        assert not index.is_prunable('1 2')
+        assert index.is_prunable('1234')
+
+
+class TestMatchingAnnotatorMinNgramOverlap(object):
+    def test_should_annotate_short_value_within_longer_line(self):
+        tokens = _tokens_for_text('Volume 12 issue 3')
+        target_annotations = [
+            TargetAnnotation('12', TAG1)
+        ]
+        doc = SimpleStructuredDocument(lines=[SimpleLine(tokens)])
+        MatchingAnnotator(target_annotations, min_ngram_overlap=0.5).annotate(doc)
+        assert _get_tags_of_tokens(tokens) == [None, TAG1, None, None]
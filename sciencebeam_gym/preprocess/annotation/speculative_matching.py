@@ -0,0 +1,263 @@
+import atexit
+import errno
+import logging
+import multiprocessing
+import os
+import pickle
+import shutil
+import threading
+from itertools import count
+from tempfile import mkdtemp
+
+from sciencebeam_gym.structured_document import (
+    SimpleStructuredDocument,
+    SimpleLine,
+    SimpleToken
+)
+
+from sciencebeam_gym.preprocess.annotation.fuzzy_match import (
+    FuzzyMatchCache
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_sequences import (
+    PendingSequences,
+    SequenceMatch,
+    PositionedSequenceSet
+)
+
+
+def get_logger():
+    return logging.getLogger(__name__)
+
+
+class SpeculativeSnapshotDocument(SimpleStructuredDocument):
+    """
+    Read-only (as far as the original document is concerned) copy of the text of the
+    pending sequences, one line per pending sequence.
+    Optionally records the positions of lines whose tags were read.
+    """
+
+    def __init__(self, token_texts_by_line):
+        lines = []
+        for position, token_texts in enumerate(token_texts_by_line):
+            tokens = [SimpleToken(token_text) for token_text in token_texts]
+            for token in tokens:
+                token.position = position
+            lines.append(SimpleLine(tokens))
+        super(SpeculativeSnapshotDocument, self).__init__(lines=lines)
+        self.read_positions = None
+
+    def get_tag(self, parent, scope=None, level=None):
+        if self.read_positions is not None:
+            self.read_positions.add(parent.position)
+        return super(SpeculativeSnapshotDocument, self).get_tag(
+            parent, scope=scope, level=level
+        )
+
+    def reset_tags(self):
+        tagged_tokens = [token for token in self.iter_all_tokens() if token.attrib]
+        for token in tagged_tokens:
+            token.attrib = {}
+        return tagged_tokens
+
+
+def to_speculative_match(m, token_index_by_id):
+    sub_sequence_start = token_index_by_id[id(m.seq2.tokens[0])]
+    return (
+        m.seq1,
+        m.seq2.position,
+        (sub_sequence_start, sub_sequence_start + len(m.seq2.tokens)),
+        m.index1_range,
+        m.index2_range
+    )
+
+
+def from_speculative_match(speculative_match, pending_sequences):
+    seq1, position, (sub_sequence_start, sub_sequence_end), index1_range, index2_range = (
+        speculative_match
+    )
+    seq = pending_sequences[position]
+    if sub_sequence_start > 0 or sub_sequence_end < len(seq.tokens):
+        seq = seq.sub_sequence_for_tokens(
+            seq.tokens[sub_sequence_start:sub_sequence_end],
+            seq.token_str_list[sub_sequence_start:sub_sequence_end]
+        )
+    return SequenceMatch(seq1, seq, index1_range, index2_range)
+
+
+class SpeculativeMatcher(object):
+    """
+    Finds the matches of single target annotations against a snapshot of the
+    pending sequences, as if no other target annotation had tagged any tokens.
+    Records the positions of all of the examined sequences, allowing the caller
+    to verify whether the result still applies.
+    """
+
+    def __init__(self, annotator, token_texts_by_line, target_values):
+        self.annotator = annotator
+        self.target_values = target_values
+        self.structured_document = SpeculativeSnapshotDocument(token_texts_by_line)
+        self.pending_sequences = annotator.get_pending_sequences(self.structured_document)
+        self.token_index_by_id = {
+            id(token): i
+            for seq in self.pending_sequences
+            for i, token in enumerate(seq.tokens)
+        }
+        self.ngram_index = annotator.get_ngram_index(self.pending_sequences)
+        self.exact_match_index = annotator.get_exact_match_index(
+            self.pending_sequences, target_values
+        )
+        self.tracked_pending_sequences = PendingSequences(self.pending_sequences)
+
+    def find_matches(self, target_annotation_index):
+        structured_document = self.structured_document
+        target_annotation = self.annotator.target_annotations[target_annotation_index]
+        if target_annotation.bonding:
+            # depends on the matches of other target annotations
+            return None
+        examined_positions = set()
+        structured_document.read_positions = examined_positions
+        try:
+            items = []
+            for matches in self.annotator.iter_target_annotation_matches(
+                    structured_document, target_annotation_index,
+                    self.target_values[target_annotation_index],
+                    self.tracked_pending_sequences, PositionedSequenceSet(),
+                    self.ngram_index, self.exact_match_index,
+                    fuzzy_match_cache=FuzzyMatchCache(),
+                    visited_positions=examined_positions):
+                items.append([
+                    to_speculative_match(m, self.token_index_by_id)
+                    for m in matches
+                ])
+                if matches and not target_annotation.require_next:
+                    # only the tags are relevant for subsequent matches of this annotation
+                    for m in matches:
+                        for token in m.seq2.tokens_between(m.index2_range):
+                            if not structured_document.get_tag(token):
+                                structured_document.set_tag(token, target_annotation.name)
+                    self.tracked_pending_sequences.mark_tagged(
+                        [token for m in matches for token in m.seq2.tokens]
+                    )
+        finally:
+            structured_document.read_positions = None
+            self.tracked_pending_sequences.mark_tagged(structured_document.reset_tags())
+        return items, examined_positions
+
+
+# the temporary directory of the pool and the matcher of the document
+# most recently seen by the current worker process
+_worker_state = {}
+
+
+def _get_document_path(temp_dir, document_id):
+    return os.path.join(temp_dir, 'document-%s.pickle' % document_id)
+
+
+def _init_worker(temp_dir):
+    _worker_state['temp_dir'] = temp_dir
+
+
+def _find_speculative_matches(task):
+    document_id, target_annotation_index = task
+    if _worker_state.get('document_id') != document_id:
+        _worker_state.pop('matcher', None)
+        with open(_get_document_path(_worker_state['temp_dir'], document_id), 'rb') as f:
+            _worker_state['matcher'] = SpeculativeMatcher(*pickle.load(f))
+        _worker_state['document_id'] = document_id
+    return _worker_state['matcher'].find_matches(target_annotation_index)
+
+
+def _get_multiprocessing_context():
+    # avoid forking the (potentially multi-threaded) current process where possible
+    get_context = getattr(multiprocessing, 'get_context', None)
+    if get_context is None:
+        return multiprocessing
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        return get_context('forkserver')
+    return get_context('spawn')
+
+
+def _remove_if_exists(path):
+    try:
+        os.remove(path)
+    except OSError as e:
+        if e.errno != errno.ENOENT:
+            raise
+
+
+class SpeculativeMatchingPool(object):
+    """
+    Process pool finding the matches of the target annotations of documents
+    speculatively (see SpeculativeMatcher).
+    The worker processes are kept, in order to be reused by subsequent documents.
+    Each document is only passed to the workers once (via a temporary file),
+    the tasks only refer to it by its id.
+    """
+
+    def __init__(self, process_count):
+        self.process_count = process_count
+        self._temp_dir = mkdtemp(prefix='speculative-matching-')
+        self._pool = _get_multiprocessing_context().Pool(
+            process_count, initializer=_init_worker, initargs=(self._temp_dir,)
+        )
+        self._document_ids = count()
+
+    def imap_find_matches(self, annotator, pending_sequences, target_values):
+        """
+        Returns an iterator over the speculative results of the target annotations
+        of the annotator (in order). Each worker only unpickles the document once.
+        """
+        token_texts_by_line = [
+            [seq.structured_document.get_text(token) for token in seq.tokens]
+            for seq in pending_sequences
+        ]
+        document_id = next(self._document_ids)
+        document_path = _get_document_path(self._temp_dir, document_id)
+        with open(document_path, 'wb') as f:
+            pickle.dump(
+                (annotator, token_texts_by_line, target_values), f, pickle.HIGHEST_PROTOCOL
+            )
+        get_logger().debug(
+            'speculative matching document: id=%s, size=%s',
+            document_id, os.path.getsize(document_path)
+        )
+        task_count = len(annotator.target_annotations)
+        results = self._pool.imap(_find_speculative_matches, [
+            (document_id, target_annotation_index)
+            for target_annotation_index in range(task_count)
+        ])
+        return self._iter_results_and_remove_document(results, task_count, document_path)
+
+    def _iter_results_and_remove_document(self, results, task_count, document_path):
+        try:
+            for index, result in enumerate(results):
+                if index == task_count - 1:
+                    # all of the workers are done with the document
+                    _remove_if_exists(document_path)
+                yield result
+        finally:
+            _remove_if_exists(document_path)
+
+    def close(self):
+        self._pool.close()
+        self._pool.join()
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+
+
+_shared_speculative_matching_pool_by_process_count = {}
+_shared_speculative_matching_pool_lock = threading.Lock()
+
+
+def get_shared_speculative_matching_pool(process_count):
+    """
+    Returns the SpeculativeMatchingPool with the given number of processes,
+    shared by all threads of the current process (and closed on exit).
+    """
+    with _shared_speculative_matching_pool_lock:
+        pool = _shared_speculative_matching_pool_by_process_count.get(process_count)
+        if pool is None:
+            pool = SpeculativeMatchingPool(process_count)
+            _shared_speculative_matching_pool_by_process_count[process_count] = pool
+            atexit.register(pool.close)
+        return pool
@@ -0,0 +1,169 @@
+import os
+import pickle
+
+from sciencebeam_gym.structured_document import (
+    SimpleStructuredDocument,
+    SimpleLine,
+    SimpleToken
+)
+
+from sciencebeam_gym.preprocess.annotation.target_annotation import (
+    TargetAnnotation
+)
+
+from sciencebeam_gym.preprocess.annotation.fuzzy_match import (
+    FuzzyMatchCache
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_profile import (
+    MatchingProfiler
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_annotator import (
+    MatchingAnnotator,
+    normalise_and_remove_junk_str_or_list
+)
+
+from sciencebeam_gym.preprocess.annotation.speculative_matching import (
+    SpeculativeMatcher,
+    to_speculative_match,
+    from_speculative_match,
+    SpeculativeMatchingPool,
+    get_shared_speculative_matching_pool
+)
+
+TAG1 = 'tag1'
+TAG2 = 'tag2'
+TAG3 = 'tag3'
+
+
+def _get_tags_of_tokens(tokens):
+    return [t.get_tag() for t in tokens]
+
+
+def _tokens_for_text_lines(text_lines):
+    return [[SimpleToken(s) for s in line.split(' ')] for line in text_lines]
+
+
+def _document_for_tokens(tokens_by_line):
+    return SimpleStructuredDocument(lines=[SimpleLine(tokens) for tokens in tokens_by_line])
+
+
+class TestSpeculativeMatcher(object):
+    def test_should_find_matches_and_examined_positions(self):
+        text_lines = ['other', 'this is matching', 'post']
+        annotator = MatchingAnnotator([TargetAnnotation('this is matching', TAG1)])
+        matcher = SpeculativeMatcher(
+            annotator, [line.split(' ') for line in text_lines], ['this is matching']
+        )
+        items, examined_positions = matcher.find_matches(0)
+        assert [[m[1] for m in matches] for matches in items] == [[1]]
+        assert examined_positions == {0, 1, 2}
+
+    def test_should_not_tag_snapshot_document(self):
+        text_lines = ['this is matching', 'this is matching']
+        annotator = MatchingAnnotator([
+            TargetAnnotation('this is matching', TAG1, match_multiple=True)
+        ])
+        matcher = SpeculativeMatcher(
+            annotator, [line.split(' ') for line in text_lines], ['this is matching']
+        )
+        items, _ = matcher.find_matches(0)
+        assert len([matches for matches in items if matches]) == 2
+        assert not any(
+            matcher.structured_document.get_tag(token)
+            for token in matcher.structured_document.iter_all_tokens()
+        )
+
+    def test_should_skip_bonding_target_annotations(self):
+        annotator = MatchingAnnotator([TargetAnnotation(['a', 'b'], TAG1, bonding=True)])
+        matcher = SpeculativeMatcher(annotator, [['a', 'b']], [['a', 'b']])
+        assert matcher.find_matches(0) is None
+
+
+class TestSpeculativeMatch(object):
+    def test_should_restore_sub_sequence_match(self):
+        tokens_by_line = _tokens_for_text_lines(['pre this is matching post'])
+        doc = _document_for_tokens(tokens_by_line)
+        annotator = MatchingAnnotator([TargetAnnotation('this is matching', TAG1)])
+        pending_sequences = annotator.get_pending_sequences(doc)
+        speculative_match = (
+            'this is matching', 0, (1, 4), (0, 16), (0, 16)
+        )
+        m = from_speculative_match(speculative_match, pending_sequences)
+        assert m.seq2.tokens == tokens_by_line[0][1:4]
+        assert str(m.seq2) == 'this is matching'
+        assert m.seq2.position == 0
+        token_index_by_id = {id(token): i for i, token in enumerate(tokens_by_line[0])}
+        assert to_speculative_match(m, token_index_by_id) == speculative_match
+
+
+class TestSpeculativeMatchingPool(object):
+    def test_should_return_same_shared_pool(self):
+        assert get_shared_speculative_matching_pool(2) is get_shared_speculative_matching_pool(2)
+
+    def test_should_not_pickle_cache_and_profiler_of_annotator(self):
+        annotator = MatchingAnnotator(
+            [TargetAnnotation('this is matching', TAG1)],
+            fuzzy_match_cache=FuzzyMatchCache(), profiler=MatchingProfiler()
+        )
+        unpickled_annotator = pickle.loads(pickle.dumps(annotator))
+        assert unpickled_annotator.fuzzy_match_cache is None
+        assert unpickled_annotator.profiler is None
+        assert annotator.fuzzy_match_cache is not None
+        assert len(unpickled_annotator.target_annotations) == 1
+
+    def test_should_remove_document_once_all_results_were_received(self):
+        text_lines = ['this is matching', 'also good']
+        annotator = MatchingAnnotator([
+            TargetAnnotation('this is matching', TAG1),
+            TargetAnnotation('also good', TAG2)
+        ])
+        pending_sequences = annotator.get_pending_sequences(
+            _document_for_tokens(_tokens_for_text_lines(text_lines))
+        )
+        target_values = [
+            normalise_and_remove_junk_str_or_list(target_annotation.value)
+            for target_annotation in annotator.target_annotations
+        ]
+        pool = SpeculativeMatchingPool(2)
+        try:
+            results = pool.imap_find_matches(annotator, pending_sequences, target_values)
+            assert len(os.listdir(pool._temp_dir)) == 1  # pylint: disable=protected-access
+            items, _ = next(results)
+            assert [[m[1] for m in matches] for matches in items] == [[0]]
+            items, _ = next(results)
+            assert [[m[1] for m in matches] for matches in items] == [[1]]
+            assert not os.listdir(pool._temp_dir)  # pylint: disable=protected-access
+        finally:
+            pool.close()
+        assert not os.path.exists(pool._temp_dir)  # pylint: disable=protected-access
+
+    def test_should_annotate_the_same_using_multiple_processes(self):
+        text_lines = [
+            'pre this is matching post',
+            'also good',
+            'this is matching again',
+            'other',
+            'and the last one'
+        ]
+        target_annotations = [
+            TargetAnnotation('this is matching', TAG1, match_multiple=True),
+            TargetAnnotation('also good', TAG2),
+            TargetAnnotation('this is matching again', TAG3),
+            TargetAnnotation(['and the', 'last one'], TAG2, bonding=True)
+        ]
+        serial_tokens_by_line = _tokens_for_text_lines(text_lines)
+        MatchingAnnotator(target_annotations).annotate(
+            _document_for_tokens(serial_tokens_by_line)
+        )
+        parallel_annotator = MatchingAnnotator(target_annotations, process_count=2)
+        # the second document reuses the workers of the first one
+        for _ in range(2):
+            parallel_tokens_by_line = _tokens_for_text_lines(text_lines)
+            parallel_annotator.annotate(_document_for_tokens(parallel_tokens_by_line))
+            assert [
+                _get_tags_of_tokens(tokens) for tokens in parallel_tokens_by_line
+            ] == [
+                _get_tags_of_tokens(tokens) for tokens in serial_tokens_by_line
+            ]
@@ -3,6 +3,7 @@ from __future__ import absolute_import
 import logging
 import json
 import re
+from io import BytesIO
 from itertools import chain
 
 from six.moves.configparser import ConfigParser
@@ -28,6 +29,10 @@ from sciencebeam_utils.utils.collection import (
     strip_all
 )
 
+from sciencebeam_gym.preprocess.annotation.text_normalisation import (
+    strip_whitespace
+)
+
 
 def get_logger():
     return logging.getLogger(__name__)
@@ -67,6 +72,48 @@ class TargetAnnotation(object):
             self.value
         )
 
+    def to_dict(self):
+        return {
+            'value': self.value,
+            'name': self.name,
+            'match_multiple': self.match_multiple,
+            'bonding': self.bonding,
+            'require_next': self.require_next,
+            'sub_annotations': (
+                [sub_annotation.to_dict() for sub_annotation in self.sub_annotations]
+                if self.sub_annotations is not None
+                else None
+            )
+        }
+
+    @staticmethod
+    def from_dict(d):
+        sub_annotations = d.get('sub_annotations')
+        return TargetAnnotation(
+            d['value'], d['name'],
+            match_multiple=d.get('match_multiple', False),
+            bonding=d.get('bonding', False),
+            require_next=d.get('require_next', False),
+            sub_annotations=(
+                [TargetAnnotation.from_dict(x) for x in sub_annotations]
+                if sub_annotations is not None
+                else None
+            )
+        )
+
+
+def serialize_target_annotations(target_annotations):
+    return json.dumps([
+        target_annotation.to_dict() for target_annotation in target_annotations
+    ]).encode('utf-8')
+
+
+def deserialize_target_annotations(data):
+    return [
+        TargetAnnotation.from_dict(d)
+        for d in json.loads(data.decode('utf-8'))
+    ]
+
 
 def parse_xml_mapping(xml_mapping_filename):
     with open(xml_mapping_filename, 'r') as f:
@@ -81,28 +128,6 @@ def parse_xml_mapping(xml_mapping_filename):
         }
 
 
-def relace_recursive(s, old, new):
-    previous = None
-    while s != previous:
-        previous = s
-        s = s.replace(old, new)
-    return s
-
-
-def strip_whitespace(s):
-    replacements = [
-        ('\t', ' '),
-        ('  ', ' '),
-        ('\r', '\n'),
-        (' \n', '\n'),
-        ('\n ', '\n'),
-        ('\n\n', '\n')
-    ]
-    for old, new in replacements:
-        s = relace_recursive(s, old, new)
-    return s
-
-
 def get_stripped_text_content(node, **kwargs):
     return strip_whitespace(get_text_content(node, **kwargs).strip())
 
@@ -134,6 +159,13 @@ def apply_pattern(s, compiled_pattern):
     return s
 
 
+def evaluate_xpath(parent, xpath):
+    # xpath may be a string or a compiled etree.XPath
+    if isinstance(xpath, etree.XPath):
+        return xpath(parent)
+    return parent.xpath(xpath)
+
+
 def iter_parents(children):
     for child in children:
         p = child.getparent()
@@ -154,7 +186,7 @@ def extract_children_source_list(parent, children_source_list):
     for children_source in children_source_list:
         xpath = children_source.get('xpath')
         if xpath:
-            matching_nodes = exclude_parents(parent.xpath(xpath))
+            matching_nodes = exclude_parents(evaluate_xpath(parent, xpath))
             if not matching_nodes:
                 get_logger().debug(
                     'child xpath does not match any item, skipping: xpath=%s (xml=%s)',
@@ -215,7 +247,7 @@ def parse_xpaths(s):
 
 
 def match_xpaths(parent, xpaths):
-    return chain(*[parent.xpath(s) for s in xpaths])
+    return chain(*[evaluate_xpath(parent, s) for s in xpaths])
 
 
 def extract_children(
@@ -301,97 +333,272 @@ def extract_using_regex(s, compiled_pattern):
     return result
 
 
-def extract_sub_annotations(parent_node, sub_xpaths, mapping, parent_key):
-    if not sub_xpaths:
-        return None
-    sub_annotations = []
-    for sub_tag, sub_xpath in sub_xpaths.items():
+def compile_xpaths(xpaths):
+    return [etree.XPath(xpath) for xpath in xpaths] if xpaths else xpaths
+
+
+def compile_children_source_list(children_source_list):
+    return [
+        dict(children_source, xpath=etree.XPath(children_source['xpath']))
+        if children_source and children_source.get('xpath')
+        else children_source
+        for children_source in children_source_list
+    ]
+
+
+class CompiledSubFieldMapping(object):
+    def __init__(self, mapping, parent_key, sub_tag, sub_xpath):
         sub_key_prefix = parent_key + XmlMappingSuffix.SUB + '.' + sub_tag
-        extract_re_compiled_pattern = re_compile_or_none(
+        self.name = sub_tag
+        self.xpath = etree.XPath(sub_xpath)
+        self.extract_re_compiled_pattern = re_compile_or_none(
             mapping.get(sub_key_prefix + XmlMappingSuffix.EXTRACT_REGEX)
         )
-        get_logger().debug('sub_key_prefix: %s', sub_key_prefix)
-        get_logger().debug(
-            'extract_re_compiled_pattern (%s, %s): %s',
-            parent_key, sub_tag, extract_re_compiled_pattern
+
+
+class CompiledFieldMapping(object):
+    """
+    The mapping of a single field, with flags, JSON, regular expressions and
+    xpaths already parsed and compiled.
+    """
+
+    def __init__(self, mapping, k):
+        def get_mapping_flag(suffix):
+            return mapping.get(k + suffix) == 'true'
+
+        self.name = k
+        self.match_multiple = get_mapping_flag(XmlMappingSuffix.MATCH_MULTIPLE)
+        self.bonding = get_mapping_flag(XmlMappingSuffix.BONDING)
+        self.require_next = get_mapping_flag(XmlMappingSuffix.REQUIRE_NEXT)
+        self.unmatched_parent_text = get_mapping_flag(XmlMappingSuffix.UNMATCHED_PARENT_TEXT)
+        self.children_xpaths = compile_xpaths(
+            parse_xpaths(mapping.get(k + XmlMappingSuffix.CHILDREN))
+        )
+        self.children_concat = [
+            compile_children_source_list(children_concat_item)
+            for children_concat_item in parse_json_with_default(
+                mapping.get(k + XmlMappingSuffix.CHILDREN_CONCAT), []
+            )
+        ]
+        self.children_range = [
+            {
+                key: (
+                    compile_children_source_list([value])[0]
+                    if key in ('min', 'max')
+                    else value
+                )
+                for key, value in range_item.items()
+            }
+            for range_item in parse_json_with_default(
+                mapping.get(k + XmlMappingSuffix.CHILDREN_RANGE), []
+            )
+        ]
+        self.re_compiled_pattern = re_compile_or_none(
+            mapping.get(k + XmlMappingSuffix.REGEX)
+        )
+        self.extract_re_compiled_pattern = re_compile_or_none(
+            mapping.get(k + XmlMappingSuffix.EXTRACT_REGEX)
         )
+        self.priority = int(mapping.get(k + XmlMappingSuffix.PRIORITY, '0'))
+        self.sub_fields = [
+            CompiledSubFieldMapping(mapping, k, sub_tag, sub_xpath)
+            for sub_tag, sub_xpath in get_sub_mapping(mapping, k).items()
+        ]
+        self.xpaths = compile_xpaths(parse_xpaths(mapping[k]))
+
+
+class CompiledXmlMapping(object):
+    """
+    The parsed xml mapping (see parse_xml_mapping), compiled once per mapping file
+    rather than once per document.
+    Pickling only retains the raw mapping, which gets compiled again when unpickled
+    (etree.XPath objects can't be pickled).
+    """
+
+    def __init__(self, xml_mapping):
+        self.xml_mapping = xml_mapping
+        self.fields_by_root_tag = {
+            root_tag: [
+                CompiledFieldMapping(mapping, k)
+                for k in mapping.keys()
+                if '.' not in k
+            ]
+            for root_tag, mapping in xml_mapping.items()
+        }
+
+    def __getstate__(self):
+        return {'xml_mapping': self.xml_mapping}
+
+    def __setstate__(self, state):
+        self.__init__(state['xml_mapping'])
+
+    def __contains__(self, root_tag):
+        return root_tag in self.fields_by_root_tag
+
+    def sections(self):
+        return list(self.fields_by_root_tag.keys())
+
+    def get_fields(self, root_tag):
+        return self.fields_by_root_tag[root_tag]
+
+
+def compile_xml_mapping(xml_mapping):
+    if isinstance(xml_mapping, CompiledXmlMapping):
+        return xml_mapping
+    return CompiledXmlMapping(xml_mapping)
 
-        for e in match_xpaths(parent_node, [sub_xpath]):
+
+def extract_sub_annotations(parent_node, sub_fields):
+    if not sub_fields:
+        return None
+    sub_annotations = []
+    for sub_field in sub_fields:
+        for e in sub_field.xpath(parent_node):
             value = get_stripped_text_content(e)
             if value:
                 value = strip_whitespace(value).strip()
-            if extract_re_compiled_pattern is not None and value:
-                value = extract_using_regex(value, extract_re_compiled_pattern)
+            if sub_field.extract_re_compiled_pattern is not None and value:
+                value = extract_using_regex(value, sub_field.extract_re_compiled_pattern)
             if value:
-                sub_annotations.append(TargetAnnotation(value, sub_tag))
+                sub_annotations.append(TargetAnnotation(value, sub_field.name))
     return sub_annotations
 
 
-def xml_root_to_target_annotations(xml_root, xml_mapping):
-    if xml_root.tag not in xml_mapping:
-        raise Exception("unrecognised tag: {} (available: {})".format(
-            xml_root.tag, xml_mapping.sections())
-        )
-
-    mapping = xml_mapping[xml_root.tag]
-
-    field_names = [k for k in mapping.keys() if '.' not in k]
+def _split_top_level(s, separator):
+    # splits by the separator, ignoring separators within predicates, parentheses or quotes
+    parts = []
+    current = []
+    depth = 0
+    quote = None
+    for c in s:
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in '"\'':
+            quote = c
+        elif c in '[(':
+            depth += 1
+        elif c in '])':
+            depth -= 1
+        elif c == separator and not depth:
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(c)
+    parts.append(''.join(current))
+    return parts
+
+
+PLAIN_XPATH_STEP_PATTERN = re.compile(r'^[A-Za-z_][\w.\-]*$')
+
+# xpath expressions that may select nodes outside of the subtree of the context node
+NON_LOCAL_XPATH_PATTERN = re.compile(
+    r'(^|[\[(|,=<>!])\s*/|\.\.|\b(ancestor|ancestor-or-self|parent|preceding|'
+    r'preceding-sibling|following|following-sibling)::|\bid\s*\('
+)
 
-    def get_mapping_flag(k, suffix):
-        return mapping.get(k + suffix) == 'true'
 
-    def get_match_multiple(k):
-        return get_mapping_flag(k, XmlMappingSuffix.MATCH_MULTIPLE)
+def is_local_xpath(xpath):
+    return not NON_LOCAL_XPATH_PATTERN.search(xpath.strip())
 
-    def get_bonding_flag(k):
-        return get_mapping_flag(k, XmlMappingSuffix.BONDING)
 
-    def get_require_next_flag(k):
-        return get_mapping_flag(k, XmlMappingSuffix.REQUIRE_NEXT)
+def get_plain_xpath_prefixes(xpath):
+    """
+    Returns the leading plain child element steps of each of the union parts of the xpath,
+    e.g. ['front', 'article-meta'] for 'front/article-meta/contrib[@contrib-type]'.
+    """
+    prefixes = []
+    for part in _split_top_level(xpath, '|'):
+        prefix = []
+        for step in _split_top_level(part.strip(), '/'):
+            step = step.strip()
+            if not PLAIN_XPATH_STEP_PATTERN.match(step):
+                break
+            prefix.append(step)
+        prefixes.append(prefix)
+    return prefixes
+
+
+def _iter_field_xpath_strs(field):
+    for xpath in field.xpaths:
+        yield xpath.path
+    for xpath in field.children_xpaths or []:
+        yield xpath.path
+    children_sources = list(iter_flatten_if_nested(field.children_concat)) + [
+        range_item.get(key)
+        for range_item in field.children_range
+        for key in ('min', 'max')
+    ]
+    for children_source in children_sources:
+        if children_source and children_source.get('xpath') is not None:
+            yield children_source['xpath'].path
+    for sub_field in field.sub_fields:
+        yield sub_field.xpath.path
+
+
+FULL_SUBTREE = 'full'
+
+
+def get_reachable_element_tree(fields):
+    """
+    Returns the tree (nested dicts by tag) of the elements the fields could select nodes
+    within, with FULL_SUBTREE for elements whose subtree is required in full.
+    FULL_SUBTREE is returned if that can't be determined (e.g. absolute xpaths).
+    """
+    for field in fields:
+        if not all(is_local_xpath(xpath) for xpath in _iter_field_xpath_strs(field)):
+            return FULL_SUBTREE
+    tree = {}
+    for field in fields:
+        for xpath in field.xpaths:
+            for prefix in get_plain_xpath_prefixes(xpath.path):
+                if not prefix:
+                    return FULL_SUBTREE
+                node = tree
+                for tag in prefix[:-1]:
+                    node = node.setdefault(tag, {})
+                    if node == FULL_SUBTREE:
+                        break
+                else:
+                    node[prefix[-1]] = FULL_SUBTREE
+    return tree
+
+
+def xml_root_to_target_annotations(xml_root, xml_mapping, xml_pos_by_node=None):
+    """
+    Extracts the target annotations using the xml mapping,
+    which may either be the parsed mapping or a CompiledXmlMapping
+    (preferred when processing multiple documents).
+    xml_pos_by_node defaults to the document order of all of the nodes of xml_root.
+    """
+    compiled_xml_mapping = compile_xml_mapping(xml_mapping)
+    if xml_root.tag not in compiled_xml_mapping:
+        raise Exception("unrecognised tag: {} (available: {})".format(
+            xml_root.tag, compiled_xml_mapping.sections())
+        )
 
-    get_unmatched_parent_text_flag = (
-        lambda k: get_mapping_flag(k, XmlMappingSuffix.UNMATCHED_PARENT_TEXT)
-    )
+    fields = compiled_xml_mapping.get_fields(xml_root.tag)
 
-    get_logger().debug('fields: %s', field_names)
+    get_logger().debug('fields: %s', [field.name for field in fields])
 
     target_annotations_with_pos = []
-    xml_pos_by_node = {node: i for i, node in enumerate(xml_root.iter())}
-    for k in field_names:
-        match_multiple = get_match_multiple(k)
-        bonding = get_bonding_flag(k)
-        require_next = get_require_next_flag(k)
-        unmatched_parent_text = get_unmatched_parent_text_flag(k)
-        children_xpaths = parse_xpaths(mapping.get(k + XmlMappingSuffix.CHILDREN))
-        children_concat = parse_json_with_default(
-            mapping.get(k + XmlMappingSuffix.CHILDREN_CONCAT), []
-        )
-        children_range = parse_json_with_default(
-            mapping.get(k + XmlMappingSuffix.CHILDREN_RANGE), []
-        )
-        re_compiled_pattern = re_compile_or_none(
-            mapping.get(k + XmlMappingSuffix.REGEX)
-        )
-        extract_re_compiled_pattern = re_compile_or_none(
-            mapping.get(k + XmlMappingSuffix.EXTRACT_REGEX)
-        )
-        get_logger().debug('extract_re_compiled_pattern (%s): %s', k, extract_re_compiled_pattern)
-
-        priority = int(mapping.get(k + XmlMappingSuffix.PRIORITY, '0'))
-        sub_xpaths = get_sub_mapping(mapping, k)
-        get_logger().debug('sub_xpaths (%s): %s', k, sub_xpaths)
-
-        xpaths = parse_xpaths(mapping[k])
-        get_logger().debug('xpaths(%s): %s', k, xpaths)
-        for e in match_xpaths(xml_root, xpaths):
+    if xml_pos_by_node is None:
+        xml_pos_by_node = {node: i for i, node in enumerate(xml_root.iter())}
+    for field in fields:
+        k = field.name
+        re_compiled_pattern = field.re_compiled_pattern
+        extract_re_compiled_pattern = field.extract_re_compiled_pattern
+        priority = field.priority
+        for e in match_xpaths(xml_root, field.xpaths):
             e_pos = xml_pos_by_node.get(e)
 
-            sub_annotations = extract_sub_annotations(e, sub_xpaths, mapping, k)
+            sub_annotations = extract_sub_annotations(e, field.sub_fields)
             get_logger().debug('sub_annotations (%s): %s', k, sub_annotations)
 
-            if children_xpaths:
+            if field.children_xpaths:
                 text_content_list, standalone_values = extract_children(
-                    e, children_xpaths, children_concat, children_range, unmatched_parent_text
+                    e, field.children_xpaths, field.children_concat, field.children_range,
+                    field.unmatched_parent_text
                 )
             else:
                 text_content_list = filter_truthy(strip_all([get_stripped_text_content(e)]))
@@ -416,9 +623,9 @@ def xml_root_to_target_annotations(xml_root, xml_mapping):
                     TargetAnnotation(
                         value,
                         k,
-                        match_multiple=match_multiple,
-                        bonding=bonding,
-                        require_next=require_next,
+                        match_multiple=field.match_multiple,
+                        bonding=field.bonding,
+                        require_next=field.require_next,
                         sub_annotations=sub_annotations
                     )
                 ))
@@ -429,8 +636,8 @@ def xml_root_to_target_annotations(xml_root, xml_mapping):
                         TargetAnnotation(
                             standalone_value,
                             k,
-                            match_multiple=match_multiple,
-                            bonding=bonding,
+                            match_multiple=field.match_multiple,
+                            bonding=field.bonding,
                             sub_annotations=sub_annotations
                         )
                     ))
@@ -446,3 +653,60 @@ def xml_root_to_target_annotations(xml_root, xml_mapping):
         ' ' + str(a) for a in target_annotations
     ]))
     return target_annotations
+
+
+def iterparse_target_annotations(xml_content, xml_mapping):
+    """
+    Extracts the target annotations like xml_root_to_target_annotations,
+    but without building the full tree. Only the elements the mapping can reach are kept
+    while parsing, everything else is discarded as soon as it was parsed.
+    The document order positions still take all of the nodes into account.
+    Like xml_from_string_with_recover, xml errors are recovered from.
+    """
+    if isinstance(xml_content, six.text_type):
+        xml_content = xml_content.encode('utf-8')
+    compiled_xml_mapping = compile_xml_mapping(xml_mapping)
+    xml_root = None
+    xml_pos_by_node = {}
+    position = 0
+    # the reachable element tree of every open element (None if discarded)
+    open_element_trees = []
+    for event, node in etree.iterparse(
+            BytesIO(xml_content), events=('start', 'end', 'comment', 'pi'), recover=True):
+        if event == 'end':
+            open_element_trees.pop()
+            if open_element_trees and open_element_trees[-1] != FULL_SUBTREE:
+                if node.tag not in (open_element_trees[-1] or {}):
+                    node.getparent().remove(node)
+            continue
+        if xml_root is None and event != 'start':
+            # outside of the root element
+            continue
+        if event == 'start' and xml_root is None:
+            xml_root = node
+            element_tree = (
+                get_reachable_element_tree(compiled_xml_mapping.get_fields(xml_root.tag))
+                if xml_root.tag in compiled_xml_mapping
+                else FULL_SUBTREE
+            )
+        elif not open_element_trees:
+            # outside of the root element
+            continue
+        else:
+            parent_element_tree = open_element_trees[-1]
+            element_tree = (
+                parent_element_tree
+                if parent_element_tree in (FULL_SUBTREE, None)
+                else parent_element_tree.get(node.tag)
+            )
+        if element_tree is not None:
+            xml_pos_by_node[node] = position
+        position += 1
+        if event == 'start':
+            open_element_trees.append(element_tree)
+    get_logger().debug(
+        'kept %d out of %d nodes', len(xml_pos_by_node), position
+    )
+    return xml_root_to_target_annotations(
+        xml_root, compiled_xml_mapping, xml_pos_by_node=xml_pos_by_node
+    )
@@ -1,12 +1,24 @@
 from __future__ import division
 
 import json
+import pickle
 
+from lxml import etree
 from lxml.builder import E
 
 from sciencebeam_gym.preprocess.annotation.target_annotation import (
     strip_whitespace,
     xml_root_to_target_annotations,
+    serialize_target_annotations,
+    deserialize_target_annotations,
+    TargetAnnotation,
+    compile_xml_mapping,
+    iterparse_target_annotations,
+    get_plain_xpath_prefixes,
+    get_reachable_element_tree,
+    is_local_xpath,
+    FULL_SUBTREE,
+    CompiledXmlMapping,
     XmlMappingSuffix
 )
 
@@ -623,3 +635,167 @@ class TestXmlRootToTargetAnnotations(object):
         assert [(ta.name, ta.value) for ta in target_annotations] == [
             (TAG2, 'tag2.1'), (TAG2, 'tag2.2'), (TAG1, 'tag1.1'), (TAG1, 'tag1.2')
         ]
+
+
+def _get_range_children_xml_root_and_mapping():
+    xml_root = E.article(
+        E.entry(
+            E.child1(SOME_VALUE),
+            E.fpage('101'),
+            E.lpage('103'),
+            E.sub(SOME_VALUE_2)
+        )
+    )
+    xml_mapping = {
+        'article': {
+            TAG1: 'entry',
+            TAG1 + XmlMappingSuffix.CHILDREN: 'child1|fpage|lpage',
+            TAG1 + XmlMappingSuffix.CHILDREN_RANGE: json.dumps([{
+                'min': {
+                    'xpath': 'fpage'
+                },
+                'max': {
+                    'xpath': 'lpage'
+                }
+            }]),
+            TAG1 + XmlMappingSuffix.SUB + '.' + TAG2: './sub'
+        }
+    }
+    return xml_root, xml_mapping
+
+
+def _to_comparable_target_annotations(target_annotations):
+    return [
+        (t.name, t.value, [(s.name, s.value) for s in t.sub_annotations or []])
+        for t in target_annotations
+    ]
+
+
+class TestCompiledXmlMapping(object):
+    def test_should_return_same_target_annotations_as_parsed_mapping(self):
+        xml_root, xml_mapping = _get_range_children_xml_root_and_mapping()
+        compiled_xml_mapping = compile_xml_mapping(xml_mapping)
+        assert isinstance(compiled_xml_mapping, CompiledXmlMapping)
+        target_annotations = xml_root_to_target_annotations(xml_root, compiled_xml_mapping)
+        assert _to_comparable_target_annotations(target_annotations) == (
+            _to_comparable_target_annotations(
+                xml_root_to_target_annotations(xml_root, xml_mapping)
+            )
+        )
+        assert _to_comparable_target_annotations(target_annotations) == [
+            (TAG1, [SOME_VALUE, '101', '102', '103'], [(TAG2, SOME_VALUE_2)])
+        ]
+
+    def test_should_not_compile_already_compiled_mapping(self):
+        compiled_xml_mapping = compile_xml_mapping({'article': {TAG1: 'title'}})
+        assert compile_xml_mapping(compiled_xml_mapping) is compiled_xml_mapping
+
+    def test_should_list_sections(self):
+        compiled_xml_mapping = compile_xml_mapping({'article': {TAG1: 'title'}})
+        assert compiled_xml_mapping.sections() == ['article']
+        assert 'article' in compiled_xml_mapping
+        assert 'other' not in compiled_xml_mapping
+
+    def test_should_be_picklable(self):
+        xml_root, xml_mapping = _get_range_children_xml_root_and_mapping()
+        compiled_xml_mapping = pickle.loads(pickle.dumps(compile_xml_mapping(xml_mapping)))
+        assert _to_comparable_target_annotations(
+            xml_root_to_target_annotations(xml_root, compiled_xml_mapping)
+        ) == _to_comparable_target_annotations(
+            xml_root_to_target_annotations(xml_root, xml_mapping)
+        )
+
+
+def _get_reachable_element_tree_for_mapping(mapping):
+    return get_reachable_element_tree(compile_xml_mapping({'article': mapping}).get_fields(
+        'article'
+    ))
+
+
+class TestGetPlainXpathPrefixes(object):
+    def test_should_return_all_steps_of_plain_xpath(self):
+        assert get_plain_xpath_prefixes('front/article-meta') == [['front', 'article-meta']]
+
+    def test_should_stop_at_step_with_predicate(self):
+        assert get_plain_xpath_prefixes('a/b[c/d]/e') == [['a']]
+
+    def test_should_split_union(self):
+        assert get_plain_xpath_prefixes('a/b|c[d|e]') == [['a', 'b'], []]
+
+    def test_should_return_empty_prefix_for_absolute_or_relative_xpath(self):
+        assert get_plain_xpath_prefixes('//a') == [[]]
+        assert get_plain_xpath_prefixes('./a') == [[]]
+
+
+class TestIsLocalXpath(object):
+    def test_should_accept_child_and_descendant_xpaths(self):
+        assert is_local_xpath('a/b[@x="/"]')
+        assert is_local_xpath('.//*')
+        assert is_local_xpath('fpage|lpage')
+
+    def test_should_reject_xpaths_selecting_outside_of_subtree(self):
+        assert not is_local_xpath('/article/a')
+        assert not is_local_xpath('a|//b')
+        assert not is_local_xpath('a[../b]')
+        assert not is_local_xpath('following-sibling::a')
+
+
+class TestGetReachableElementTree(object):
+    def test_should_keep_full_subtree_of_plain_xpath(self):
+        assert _get_reachable_element_tree_for_mapping({
+            TAG1: 'front/title',
+            TAG2: 'back/ack[@x]'
+        }) == {'front': {'title': FULL_SUBTREE}, 'back': FULL_SUBTREE}
+
+    def test_should_keep_everything_for_non_local_children_xpath(self):
+        assert _get_reachable_element_tree_for_mapping({
+            TAG1: 'front/title',
+            TAG1 + XmlMappingSuffix.CHILDREN: '../other'
+        }) == FULL_SUBTREE
+
+
+class TestIterparseTargetAnnotations(object):
+    def test_should_return_same_target_annotations_as_full_tree(self):
+        xml_root, xml_mapping = _get_range_children_xml_root_and_mapping()
+        xml_root.insert(0, etree.Comment('comment'))
+        xml_root.append(E.back(E.other(E.entry('not reachable')), 'tail'))
+        xml_root.append(E.entry('second'))
+        xml_mapping['article'][TAG2] = 'entry'
+        xml_mapping['article'][TAG2 + XmlMappingSuffix.PRIORITY] = '1'
+        assert _to_comparable_target_annotations(
+            iterparse_target_annotations(etree.tostring(xml_root), xml_mapping)
+        ) == _to_comparable_target_annotations(
+            xml_root_to_target_annotations(xml_root, xml_mapping)
+        )
+
+    def test_should_recover_from_xml_errors(self):
+        target_annotations = iterparse_target_annotations(
+            b'<article><title>some &unknown; title</title>',
+            {'article': {TAG1: 'title'}}
+        )
+        assert [t.name for t in target_annotations] == [TAG1]
+
+
+def _to_comparable_target_annotation_dicts(target_annotations):
+    return [t.to_dict() for t in target_annotations]
+
+
+class TestSerializeTargetAnnotations(object):
+    def test_should_serialize_and_deserialize_target_annotations(self):
+        target_annotations = [
+            TargetAnnotation(SOME_VALUE, TAG1, require_next=True),
+            TargetAnnotation(
+                [SOME_VALUE, SOME_VALUE_2], TAG2, match_multiple=True, bonding=True,
+                sub_annotations=[TargetAnnotation(SOME_VALUE_2, TAG1)]
+            )
+        ]
+        assert _to_comparable_target_annotation_dicts(
+            deserialize_target_annotations(serialize_target_annotations(target_annotations))
+        ) == _to_comparable_target_annotation_dicts(target_annotations)
+
+    def test_should_serialize_extracted_target_annotations(self):
+        xml_root, xml_mapping = _get_range_children_xml_root_and_mapping()
+        target_annotations = xml_root_to_target_annotations(xml_root, xml_mapping)
+        assert _to_comparable_target_annotations(
+            deserialize_target_annotations(serialize_target_annotations(target_annotations))
+        ) == _to_comparable_target_annotations(target_annotations)
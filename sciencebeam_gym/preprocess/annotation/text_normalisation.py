@@ -0,0 +1,90 @@
+from __future__ import absolute_import
+
+import re
+
+import six
+
+
+try:
+    # pylint: disable=no-name-in-module
+    from sciencebeam_gym.preprocess.annotation.text_normalisation_fast import (
+        native_strip_whitespace,
+        native_remove_default_junk
+    )
+    native_enabled = True
+except ImportError:
+    native_enabled = False
+
+
+THIN_SPACE = u'\u2009'
+EN_DASH = u'\u2013'
+EM_DASH = u'\u2014'
+
+
+NORMALISE_STR_TRANSLATE_TABLE = {
+    ord(EM_DASH): u'-',
+    ord(EN_DASH): u'-',
+    ord(THIN_SPACE): u' '
+}
+
+# applied until nothing changes, the result is equivalent to the native single pass
+# (str.replace outperforms regular expressions with a replacement function in Python)
+STRIP_WHITESPACE_REPLACEMENTS = [
+    ('\t', ' '),
+    ('  ', ' '),
+    ('\r', '\n'),
+    (' \n', '\n'),
+    ('\n ', '\n'),
+    ('\n\n', '\n')
+]
+
+# characters that are junk regardless of the preceding character are matched first,
+# a dot after an alphanumeric character still needs to be checked for the alpha condition
+DEFAULT_JUNK_PATTERN = re.compile(
+    r'\*|(?<=\.)[ ,]|(?<=(.))\1|(?<=[^\W_])(?P<dot>\.)',
+    re.DOTALL | re.UNICODE
+)
+
+
+def python_strip_whitespace(s):
+    for old, new in STRIP_WHITESPACE_REPLACEMENTS:
+        while old in s:
+            s = s.replace(old, new)
+    return s
+
+
+def _replace_default_junk(m):
+    if m.group('dot') is not None and not m.string[m.start() - 1].isalpha():
+        return m.group(0)
+    return u''
+
+
+def python_remove_default_junk(s):
+    return DEFAULT_JUNK_PATTERN.sub(_replace_default_junk, s)
+
+
+def strip_whitespace(s):
+    """
+    Replaces runs of spaces, tabs, carriage returns and line feeds by a single line feed
+    (if the run contains a line break) or a single space.
+    """
+    if native_enabled and isinstance(s, six.text_type):
+        return native_strip_whitespace(s)
+    return python_strip_whitespace(s)
+
+
+def normalise_str(s):
+    s = s.lower()
+    if EM_DASH in s or EN_DASH in s or THIN_SPACE in s:
+        return s.translate(NORMALISE_STR_TRANSLATE_TABLE)
+    return s
+
+
+def remove_default_junk(s):
+    """
+    Removes the characters considered junk by fuzzy_match.DEFAULT_ISJUNK:
+    space or comma after a dot, a dot after a letter, repeating characters and asterisks.
+    """
+    if native_enabled and isinstance(s, six.text_type):
+        return native_remove_default_junk(s)
+    return python_remove_default_junk(s)
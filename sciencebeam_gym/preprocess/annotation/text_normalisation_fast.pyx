@@ -0,0 +1,69 @@
+# cython: language_level=3
+# Native implementations of text_normalisation (see there for the pure Python version)
+
+
+cdef inline bint _is_stripped_whitespace(Py_UCS4 c):
+    return c == u' ' or c == u'\t' or c == u'\r' or c == u'\n'
+
+
+def native_strip_whitespace(unicode s):
+    cdef Py_ssize_t n = len(s)
+    cdef Py_ssize_t i = 0
+    cdef Py_ssize_t j
+    cdef Py_ssize_t start = 0
+    cdef Py_UCS4 c
+    cdef bint has_line_break
+    cdef list parts = None
+    while i < n:
+        c = s[i]
+        if not _is_stripped_whitespace(c):
+            i += 1
+            continue
+        j = i
+        has_line_break = False
+        while j < n and _is_stripped_whitespace(s[j]):
+            if s[j] == u'\n' or s[j] == u'\r':
+                has_line_break = True
+            j += 1
+        if j - i > 1 or c == u'\t' or c == u'\r':
+            if parts is None:
+                parts = []
+            parts.append(s[start:i])
+            parts.append(u'\n' if has_line_break else u' ')
+            start = j
+        i = j
+    if parts is None:
+        return s
+    parts.append(s[start:])
+    return u''.join(parts)
+
+
+def native_remove_default_junk(unicode s):
+    cdef Py_ssize_t n = len(s)
+    cdef Py_ssize_t i
+    cdef Py_ssize_t start = 0
+    cdef Py_UCS4 c
+    cdef Py_UCS4 previous
+    cdef bint is_junk
+    cdef list parts = None
+    for i in range(n):
+        c = s[i]
+        is_junk = c == u'*'
+        if not is_junk and i > 0:
+            previous = s[i - 1]
+            is_junk = (
+                (previous == u'.' and (c == u' ' or c == u',')) or
+                (c == u'.' and previous.isalpha()) or
+                previous == c
+            )
+        if is_junk:
+            if parts is None:
+                parts = []
+            if i > start:
+                parts.append(s[start:i])
+            start = i + 1
+    if parts is None:
+        return s
+    if n > start:
+        parts.append(s[start:])
+    return u''.join(parts)
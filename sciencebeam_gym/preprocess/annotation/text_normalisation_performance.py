@@ -0,0 +1,122 @@
+from __future__ import absolute_import, print_function
+
+import logging
+import random
+import timeit
+
+from sciencebeam_gym.preprocess.annotation import text_normalisation
+from sciencebeam_gym.preprocess.annotation.text_normalisation import (
+    python_strip_whitespace,
+    python_remove_default_junk,
+    normalise_str,
+    THIN_SPACE,
+    EN_DASH,
+    EM_DASH
+)
+
+from sciencebeam_gym.preprocess.annotation.fuzzy_match import (
+    DEFAULT_ISJUNK
+)
+
+TOKEN_COUNT = 100000
+
+CHARACTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789.,*-'
+WHITESPACE = [' ', ' ', ' ', '\t', '\n', ' \n ', '\r\n']
+
+
+def _token_strings():
+    random.seed(1)
+    return [
+        ''.join(random.choice(CHARACTERS) for _ in range(random.randint(1, 12))) +
+        random.choice(WHITESPACE)
+        for _ in range(TOKEN_COUNT)
+    ]
+
+
+TOKEN_STRINGS = _token_strings()
+
+
+def legacy_normalise_str(s):
+    return s.lower().replace(EM_DASH, u'-').replace(EN_DASH, u'-').replace(THIN_SPACE, ' ')
+
+
+def legacy_remove_default_junk(s):
+    result = None
+    start = 0
+    for i in range(len(s)):
+        if DEFAULT_ISJUNK(s, i):
+            if result is None:
+                result = []
+            if i > start:
+                result.append(s[start:i])
+            start = i + 1
+    if result is None:
+        return s
+    if len(s) > start:
+        result.append(s[start:])
+    return ''.join(result)
+
+
+def _apply_to_token_strings(f):
+    for s in TOKEN_STRINGS:
+        f(s)
+
+
+def test_python_strip_whitespace():
+    _apply_to_token_strings(python_strip_whitespace)
+
+
+def test_native_strip_whitespace():
+    _apply_to_token_strings(text_normalisation.native_strip_whitespace)
+
+
+def test_legacy_normalise_str():
+    _apply_to_token_strings(legacy_normalise_str)
+
+
+def test_normalise_str():
+    _apply_to_token_strings(normalise_str)
+
+
+def test_legacy_remove_default_junk():
+    _apply_to_token_strings(legacy_remove_default_junk)
+
+
+def test_python_remove_default_junk():
+    _apply_to_token_strings(python_remove_default_junk)
+
+
+def test_native_remove_default_junk():
+    _apply_to_token_strings(text_normalisation.native_remove_default_junk)
+
+
+def report_timing(fn, number=1):
+    timeit_result_ms = timeit.timeit(
+        fn + "()",
+        setup="from __main__ import " + fn,
+        number=number
+    ) * 1000
+    print("{} ({}x):\n{:f} ms / it ({:f} ms total)\n".format(
+        fn, number, timeit_result_ms / number, timeit_result_ms
+    ))
+
+
+def main():
+    print("token strings: {}, native enabled: {}\n".format(
+        len(TOKEN_STRINGS), text_normalisation.native_enabled
+    ))
+    report_timing("test_python_strip_whitespace", 3)
+    if text_normalisation.native_enabled:
+        report_timing("test_native_strip_whitespace", 3)
+    report_timing("test_legacy_normalise_str", 3)
+    report_timing("test_normalise_str", 3)
+    report_timing("test_legacy_remove_default_junk", 3)
+    report_timing("test_python_remove_default_junk", 3)
+    if text_normalisation.native_enabled:
+        report_timing("test_native_remove_default_junk", 3)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level='WARNING')
+
+    main()
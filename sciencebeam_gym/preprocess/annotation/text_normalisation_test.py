@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import pytest
+
+from sciencebeam_gym.preprocess.annotation import text_normalisation
+from sciencebeam_gym.preprocess.annotation.text_normalisation import (
+    python_strip_whitespace,
+    python_remove_default_junk,
+    normalise_str,
+    EM_DASH,
+    EN_DASH,
+    THIN_SPACE
+)
+
+STRIP_WHITESPACE_CASES = [
+    ('', ''),
+    ('a b', 'a b'),
+    ('a\tb', 'a b'),
+    ('a \t  b', 'a b'),
+    ('a\rb', 'a\nb'),
+    ('a \r\n b', 'a\nb'),
+    ('a \n \n \n b', 'a\nb'),
+    (' a\n', ' a\n'),
+    ('a  b', 'a  b')
+]
+
+REMOVE_DEFAULT_JUNK_CASES = [
+    ('', ''),
+    ('abc', 'abc'),
+    ('P.O. Box', 'POBox'),
+    ('Mr Beam*', 'Mr Beam'),
+    ('Mr Beeeam', 'Mr Beam'),
+    ('a., b', 'a b'),
+    ('1.5', '1.5'),
+    ('x².', 'x².'),
+    ('é.', 'é')
+]
+
+STRIP_WHITESPACE_IMPLEMENTATIONS = [python_strip_whitespace]
+REMOVE_DEFAULT_JUNK_IMPLEMENTATIONS = [python_remove_default_junk]
+if text_normalisation.native_enabled:
+    STRIP_WHITESPACE_IMPLEMENTATIONS.append(text_normalisation.native_strip_whitespace)
+    REMOVE_DEFAULT_JUNK_IMPLEMENTATIONS.append(text_normalisation.native_remove_default_junk)
+
+
+class TestStripWhitespace(object):
+    @pytest.mark.parametrize('strip_whitespace', STRIP_WHITESPACE_IMPLEMENTATIONS)
+    @pytest.mark.parametrize('s, expected', STRIP_WHITESPACE_CASES)
+    def test_should_strip_whitespace(self, strip_whitespace, s, expected):
+        assert strip_whitespace(s) == expected
+
+
+class TestRemoveDefaultJunk(object):
+    @pytest.mark.parametrize('remove_default_junk', REMOVE_DEFAULT_JUNK_IMPLEMENTATIONS)
+    @pytest.mark.parametrize('s, expected', REMOVE_DEFAULT_JUNK_CASES)
+    def test_should_remove_default_junk(self, remove_default_junk, s, expected):
+        assert remove_default_junk(s) == expected
+
+
+class TestNormaliseStr(object):
+    def test_should_lower_case_and_replace_dashes_and_thin_space(self):
+        assert normalise_str('A' + EM_DASH + EN_DASH + THIN_SPACE + 'B') == 'a-- b'
@@ -1,4 +1,5 @@
 import argparse
+import gzip
 import logging
 import os
 
@@ -19,8 +20,18 @@ from sciencebeam_gym.preprocess.annotation.annotator import (
 )
 
 from sciencebeam_gym.preprocess.annotation.matching_annotator import (
-    MatchingAnnotator,
-    CsvMatchDetailReporter
+    MatchingAnnotator
+)
+
+from sciencebeam_gym.preprocess.annotation.match_detail_reporter import (
+    CsvMatchDetailReporter,
+    MatchDetailSampleFilters,
+    MATCH_DETAIL_SAMPLE_FILTERS
+)
+
+from sciencebeam_gym.preprocess.annotation.matching_profile import (
+    MatchingProfiler,
+    DEFAULT_MATCHING_PROFILE_COLUMNS
 )
 
 from sciencebeam_gym.preprocess.annotation.target_annotation import (
@@ -98,77 +109,126 @@ def parse_args(argv=None):
         '--debug-match', type=str, required=False,
         help='debug matches and save as csv'
     )
+    parser.add_argument(
+        '--debug-match-sample-every', type=int, default=1,
+        help='only save every nth debug match'
+    )
+    parser.add_argument(
+        '--debug-match-filter', type=str, default=MatchDetailSampleFilters.ALL,
+        choices=MATCH_DETAIL_SAMPLE_FILTERS,
+        help='only save accepted or rejected debug matches'
+    )
+    parser.add_argument(
+        '--debug-match-async', action='store_true', required=False,
+        help='save debug matches using a background thread'
+    )
     parser.add_argument(
         '--annotation-evaluation-csv', type=str, required=False,
         help='Annotation evaluation CSV output file'
     )
+    parser.add_argument(
+        '--matching-profile-csv', type=str, required=False,
+        help='Matching profile CSV output file (statistics per target annotation name)'
+    )
     args = parser.parse_args(argv)
     return args
 
 
-def iter_svg_pages_for_lxml(lxml_root, add_background=True):
+def lxml_page_to_svg_root(page, add_background=True):
     previous_block = None
     previous_svg_block = None
-    for page in lxml_root.xpath('//DOCUMENT/PAGE'):
-        svg_root = etree.Element(SVG_DOC, nsmap=SVG_NSMAP)
-        page_width = page.attrib.get('width')
-        page_height = page.attrib.get('height')
-        if page_width and page_height:
-            svg_root.attrib['viewBox'] = '0 0 %s %s' % (page_width, page_height)
-        if add_background:
-            svg_root.append(etree.Element(SVG_RECT, attrib={
-                'width': '100%',
-                'height': '100%',
-                'fill': 'white',
-                'class': 'background'
-            }))
-        for text in page.xpath('.//TEXT'):
-            svg_g = etree.Element(SVG_G, nsmap=SVG_NSMAP, attrib={
-                'class': SvgStyleClasses.LINE
-            })
-            for token in text.xpath('./TOKEN'):
-                x = float(token.attrib.get('x'))
-                y = float(token.attrib.get('y'))
-                height = float(token.attrib.get('height'))
-                width = float(token.attrib.get('width'))
-                base = float(token.attrib.get('base', y))
-                y_center = y + height / 2.0
-                attrib = {
-                    'x': str(x),
-                    'y': str(base),
-                    'font-size': token.attrib.get('font-size'),
-                    'font-family': token.attrib.get('font-name'),
-                    'fill': token.attrib.get('font-color'),
-                    SVGE_BOUNDING_BOX: svg_format_bounding_box(BoundingBox(
-                        x, y, width, height
-                    ))
-                }
-                angle = float(token.attrib.get('angle', '0'))
-                if token.attrib.get('rotation') == '1' and angle == 90.0:
-                    attrib['x'] = '0'
-                    attrib['y'] = '0'
-                    attrib['transform'] = 'translate({x} {y}) rotate({angle})'.format(
-                        x=str(x),
-                        y=str(y_center),
-                        angle=str(-angle)
-                    )
-                svg_g.append(
-                    ElementWithText(SVG_TEXT, token.text, attrib=attrib)
+    svg_root = etree.Element(SVG_DOC, nsmap=SVG_NSMAP)
+    page_width = page.attrib.get('width')
+    page_height = page.attrib.get('height')
+    if page_width and page_height:
+        svg_root.attrib['viewBox'] = '0 0 %s %s' % (page_width, page_height)
+    if add_background:
+        svg_root.append(etree.Element(SVG_RECT, attrib={
+            'width': '100%',
+            'height': '100%',
+            'fill': 'white',
+            'class': 'background'
+        }))
+    for text in page.xpath('.//TEXT'):
+        svg_g = etree.Element(SVG_G, nsmap=SVG_NSMAP, attrib={
+            'class': SvgStyleClasses.LINE
+        })
+        for token in text.xpath('./TOKEN'):
+            x = float(token.attrib.get('x'))
+            y = float(token.attrib.get('y'))
+            height = float(token.attrib.get('height'))
+            width = float(token.attrib.get('width'))
+            base = float(token.attrib.get('base', y))
+            y_center = y + height / 2.0
+            attrib = {
+                'x': str(x),
+                'y': str(base),
+                'font-size': token.attrib.get('font-size'),
+                'font-family': token.attrib.get('font-name'),
+                'fill': token.attrib.get('font-color'),
+                SVGE_BOUNDING_BOX: svg_format_bounding_box(BoundingBox(
+                    x, y, width, height
+                ))
+            }
+            angle = float(token.attrib.get('angle', '0'))
+            if token.attrib.get('rotation') == '1' and angle == 90.0:
+                attrib['x'] = '0'
+                attrib['y'] = '0'
+                attrib['transform'] = 'translate({x} {y}) rotate({angle})'.format(
+                    x=str(x),
+                    y=str(y_center),
+                    angle=str(-angle)
                 )
-            text_parent = text.getparent()
-            if text_parent.tag == 'BLOCK':
-                if text_parent != previous_block:
-                    previous_svg_block = etree.Element(SVG_G, nsmap=SVG_NSMAP, attrib={
-                        'class': SvgStyleClasses.BLOCK
-                    })
-                    svg_root.append(previous_svg_block)
-                    previous_block = text_parent
-                previous_svg_block.append(svg_g)
-            else:
-                previous_block = None
-                previous_svg_block = None
-                svg_root.append(svg_g)
-        yield svg_root
+            svg_g.append(
+                ElementWithText(SVG_TEXT, token.text, attrib=attrib)
+            )
+        text_parent = text.getparent()
+        if text_parent.tag == 'BLOCK':
+            if text_parent != previous_block:
+                previous_svg_block = etree.Element(SVG_G, nsmap=SVG_NSMAP, attrib={
+                    'class': SvgStyleClasses.BLOCK
+                })
+                svg_root.append(previous_svg_block)
+                previous_block = text_parent
+            previous_svg_block.append(svg_g)
+        else:
+            previous_block = None
+            previous_svg_block = None
+            svg_root.append(svg_g)
+    return svg_root
+
+
+def iter_svg_pages_for_lxml(lxml_root, add_background=True):
+    for page in lxml_root.xpath('//DOCUMENT/PAGE'):
+        yield lxml_page_to_svg_root(page, add_background=add_background)
+
+
+def iter_svg_pages_for_lxml_source(source, add_background=True):
+    """
+    Streaming variant of iter_svg_pages_for_lxml, parsing the lxml (file or filename)
+    page by page and releasing each source page once it was converted.
+    """
+    for _, page in etree.iterparse(source, tag='PAGE'):
+        parent = page.getparent()
+        if parent is None or parent.tag != 'DOCUMENT':
+            continue
+        yield lxml_page_to_svg_root(page, add_background=add_background)
+        page.clear()
+        while page.getprevious() is not None:
+            del parent[0]
+
+
+def open_lxml_file(lxml_path):
+    # iterparse doesn't decompress files transparently (unlike etree.parse)
+    if lxml_path.endswith('.gz'):
+        return gzip.open(lxml_path, 'rb')
+    return open(lxml_path, 'rb')
+
+
+def iter_svg_pages_for_lxml_path(lxml_path, add_background=True):
+    with open_lxml_file(lxml_path) as f:
+        for svg_root in iter_svg_pages_for_lxml_source(f, add_background=add_background):
+            yield svg_root
 
 
 def convert(args):
@@ -177,16 +237,21 @@ def convert(args):
     if not svg_filename_pattern:
         svg_filename_pattern = svg_pattern_for_lxml_path(args.lxml_path)
     logger.debug('svg_filename_pattern: %s', svg_filename_pattern)
-    lxml_root = etree.parse(args.lxml_path).getroot()
 
     match_detail_reporter = None
+    matching_profiler = None
     if args.annotate:
         annotators = DEFAULT_ANNOTATORS
         if args.debug_match:
             match_detail_reporter = CsvMatchDetailReporter(
                 open_csv_output(args.debug_match),
-                args.debug_match
+                args.debug_match,
+                sample_every=args.debug_match_sample_every,
+                sample_filter=args.debug_match_filter,
+                use_background_writer=args.debug_match_async
             )
+        if args.matching_profile_csv:
+            matching_profiler = MatchingProfiler()
         if args.xml_path:
             xml_mapping = parse_xml_mapping(args.xml_mapping_path)
             target_annotations = xml_root_to_target_annotations(
@@ -195,17 +260,18 @@ def convert(args):
             )
             annotators = annotators + [MatchingAnnotator(
                 target_annotations, match_detail_reporter=match_detail_reporter,
-                use_tag_begin_prefix=True
+                use_tag_begin_prefix=True,
+                profiler=matching_profiler
             )]
         annotator = Annotator(annotators)
     else:
         annotator = None
 
     if annotator:
-        svg_roots = list(iter_svg_pages_for_lxml(lxml_root))
+        svg_roots = list(iter_svg_pages_for_lxml_path(args.lxml_path))
         annotator.annotate(SvgStructuredDocument(svg_roots))
     else:
-        svg_roots = iter_svg_pages_for_lxml(lxml_root)
+        svg_roots = iter_svg_pages_for_lxml_path(args.lxml_path)
     for page_index, svg_root in enumerate(svg_roots):
         if annotator:
             svg_root = visualize_svg_annotations(svg_root)
@@ -227,6 +293,14 @@ def convert(args):
                     document=os.path.basename(args.lxml_path)
                 )
             )
+    if matching_profiler is not None:
+        write_dict_csv(
+            args.matching_profile_csv,
+            DEFAULT_MATCHING_PROFILE_COLUMNS,
+            matching_profiler.to_csv_dict_rows(
+                document=os.path.basename(args.lxml_path)
+            )
+        )
     if match_detail_reporter:
         match_detail_reporter.close()
 
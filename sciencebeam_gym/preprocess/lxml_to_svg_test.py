@@ -1,3 +1,7 @@
+import gzip
+from io import BytesIO
+
+from lxml import etree
 from lxml.builder import E
 
 from sciencebeam_gym.utils.bounding_box import (
@@ -14,7 +18,9 @@ from sciencebeam_gym.structured_document.svg import (
 )
 
 from sciencebeam_gym.preprocess.lxml_to_svg import (
-    iter_svg_pages_for_lxml
+    iter_svg_pages_for_lxml,
+    iter_svg_pages_for_lxml_source,
+    iter_svg_pages_for_lxml_path
 )
 
 SOME_TEXT = "some text"
@@ -206,3 +212,46 @@ class TestIterSvgPagesForLxml(object):
         assert svg_text.getparent().tag == SVG_G
         assert svg_text.getparent().getparent().tag == SVG_G
         assert svg_text.getparent().getparent().getparent().tag == SVG_DOC
+
+
+class TestIterSvgPagesForLxmlSource(object):
+    def test_should_return_same_svg_pages_as_iter_svg_pages_for_lxml(self):
+        lxml_root = E.DOCUMENT(
+            E.PAGE(
+                E.BLOCK(E.TEXT(E.TOKEN(SOME_TEXT, COMMON_LXML_TOKEN_ATTRIBS))),
+                E.TEXT(E.TOKEN(SOME_TEXT, COMMON_LXML_TOKEN_ATTRIBS)),
+                width='600',
+                height='800'
+            ),
+            E.PAGE(
+                E.TEXT(E.TOKEN(SOME_TEXT, COMMON_LXML_TOKEN_ATTRIBS))
+            ),
+            E.PAGE()
+        )
+        expected_svg_pages = list(iter_svg_pages_for_lxml(lxml_root))
+        svg_pages = list(iter_svg_pages_for_lxml_source(BytesIO(etree.tostring(lxml_root))))
+        assert (
+            [etree.tostring(svg_page) for svg_page in svg_pages] ==
+            [etree.tostring(svg_page) for svg_page in expected_svg_pages]
+        )
+
+
+class TestIterSvgPagesForLxmlPath(object):
+    def test_should_read_plain_and_gzipped_lxml_file(self, tmpdir):
+        lxml_root = E.DOCUMENT(
+            E.PAGE(E.TEXT(E.TOKEN(SOME_TEXT, COMMON_LXML_TOKEN_ATTRIBS))),
+            E.PAGE()
+        )
+        expected_svg_pages = [
+            etree.tostring(svg_page) for svg_page in iter_svg_pages_for_lxml(lxml_root)
+        ]
+        lxml_file = tmpdir.join('file.lxml')
+        lxml_file.write_binary(etree.tostring(lxml_root))
+        gzipped_lxml_file = tmpdir.join('file.lxml.gz')
+        with gzip.open(str(gzipped_lxml_file), 'wb') as f:
+            f.write(etree.tostring(lxml_root))
+        for path in [lxml_file, gzipped_lxml_file]:
+            assert [
+                etree.tostring(svg_page)
+                for svg_page in iter_svg_pages_for_lxml_path(str(path))
+            ] == expected_svg_pages
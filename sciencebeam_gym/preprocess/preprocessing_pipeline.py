@@ -52,7 +52,8 @@ from sciencebeam_gym.structured_document.svg import (
 )
 
 from sciencebeam_gym.preprocess.annotation.target_annotation import (
-    parse_xml_mapping
+    parse_xml_mapping,
+    compile_xml_mapping
 )
 
 from sciencebeam_gym.preprocess.color_map import (
@@ -65,11 +66,18 @@ from sciencebeam_gym.preprocess.annotation.annotation_evaluation import (
     to_csv_dict_rows as to_annotation_evaluation_csv_dict_rows
 )
 
+from sciencebeam_gym.preprocess.annotation.matching_profile import (
+    MatchingProfiler,
+    DEFAULT_MATCHING_PROFILE_COLUMNS
+)
+
 from sciencebeam_gym.preprocess.preprocessing_utils import (
     convert_pdf_bytes_to_lxml,
     convert_and_annotate_lxml_content,
+    annotate_lxml_content,
     pdf_bytes_to_png_pages,
     svg_page_to_blockified_png_bytes,
+    structured_document_page_to_blockified_png_bytes,
     save_pages,
     save_svg_roots,
     filter_list_props_by_indices,
@@ -77,11 +85,19 @@ from sciencebeam_gym.preprocess.preprocessing_utils import (
     parse_page_range
 )
 
+from sciencebeam_gym.preprocess.target_annotation_cache import (
+    TargetAnnotationCache
+)
+
 from sciencebeam_gym.preprocess.preprocessing_transforms import (
     WritePropsToTFRecord
 )
 
 
+# either the annotated svg pages or the annotated (lxml) structured document
+ANNOTATED_DOCUMENT_KEYS = {'svg_pages', 'structured_document'}
+
+
 def get_logger():
     return logging.getLogger(__name__)
 
@@ -95,6 +111,65 @@ class MetricCounters(object):
     CONVERT_LXML_TO_SVG_ANNOT_ERROR = 'ConvertPdfToSvgAnnot_error_count'
 
 
+def convert_and_annotate(v, xml_mapping, opt, target_annotation_cache=None):
+    matching_profiler = MatchingProfiler() if opt.matching_profile_csv else None
+    kwargs = dict(
+        name=v['source_filename'],
+        fuzzy_match_cache_size=opt.fuzzy_match_cache_size,
+        min_ngram_overlap=opt.min_ngram_overlap,
+        use_exact_match=opt.use_exact_match,
+        matching_process_count=opt.matching_process_count,
+        matching_profiler=matching_profiler,
+        stream_xml=opt.stream_xml,
+        target_annotation_cache=target_annotation_cache
+    )
+    if opt.save_svg:
+        result = {
+            'svg_pages': list(convert_and_annotate_lxml_content(
+                v['lxml_content'], v['xml_content'], xml_mapping, **kwargs
+            ))
+        }
+    else:
+        # we only need the svg (and its visualisation) if we are saving it
+        result = {
+            'structured_document': annotate_lxml_content(
+                v['lxml_content'], v['xml_content'], xml_mapping, **kwargs
+            )
+        }
+    if matching_profiler is not None:
+        result['matching_profile'] = matching_profiler.to_csv_dict_rows(
+            document=basename(v['source_filename'])
+        )
+    return result
+
+
+def get_annotated_structured_document(v):
+    if 'svg_pages' in v:
+        return SvgStructuredDocument(v['svg_pages'])
+    return v['structured_document']
+
+
+def get_annotated_page_count(v):
+    if 'svg_pages' in v:
+        return len(v['svg_pages'])
+    return len(v['structured_document'].get_pages())
+
+
+def get_blockified_png_pages(v, color_map, image_size=None):
+    if 'svg_pages' in v:
+        return [
+            svg_page_to_blockified_png_bytes(svg_page, color_map, image_size=image_size)
+            for svg_page in v['svg_pages']
+        ]
+    structured_document = v['structured_document']
+    return [
+        structured_document_page_to_blockified_png_bytes(
+            structured_document, page, color_map, image_size=image_size
+        )
+        for page in structured_document.get_pages()
+    ]
+
+
 def configure_pipeline(p, opt):
     image_size = (
         (opt.image_width, opt.image_height)
@@ -103,7 +178,13 @@ def configure_pipeline(p, opt):
     )
     page_range = opt.pages
     first_page = page_range[0] if page_range else 1
-    xml_mapping = parse_xml_mapping(opt.xml_mapping_path)
+    # compiled once, rather than for every document
+    xml_mapping = compile_xml_mapping(parse_xml_mapping(opt.xml_mapping_path))
+    target_annotation_cache = (
+        TargetAnnotationCache(opt.target_annotation_cache_path, xml_mapping)
+        if opt.target_annotation_cache_path
+        else None
+    )
     if opt.lxml_path:
         lxml_xml_file_pairs = (
             p |
@@ -198,7 +279,8 @@ def configure_pipeline(p, opt):
                         v['pdf_content'],
                         dpi=opt.png_dpi,
                         image_size=image_size,
-                        page_range=page_range
+                        page_range=page_range,
+                        parallelism=opt.png_parallelism
                     ))
                 }),
                 {'pdf_content'}  # we no longer need the pdf_content
@@ -246,12 +328,9 @@ def configure_pipeline(p, opt):
         (with_pdf_png_pages if opt.save_tfrecords else lxml_xml_file_pairs) |
         "ConvertLxmlToSvgAndAnnotate" >> TransformAndCount(
             MapOrLog(lambda v: remove_keys_from_dict(
-                extend_dict(v, {
-                    'svg_pages': list(convert_and_annotate_lxml_content(
-                        v['lxml_content'], v['xml_content'], xml_mapping,
-                        name=v['source_filename']
-                    ))
-                }),
+                extend_dict(v, convert_and_annotate(
+                    v, xml_mapping, opt, target_annotation_cache=target_annotation_cache
+                )),
                 # Won't need the XML anymore
                 {'lxml_content', 'xml_content'}
             ), log_fn=lambda e, v: (
@@ -261,10 +340,24 @@ def configure_pipeline(p, opt):
                 )
             ), error_count=MetricCounters.CONVERT_LXML_TO_SVG_ANNOT_ERROR),
             MetricCounters.PAGE,
-            lambda v: len(v['svg_pages'])
+            get_annotated_page_count
         )
     )
 
+    if opt.matching_profile_csv:
+        matching_profile_csv_name, matching_profile_ext = (
+            os.path.splitext(opt.matching_profile_csv)
+        )
+        _ = (  # flake8: noqa
+            annotation_results |
+            "FlattenMatchingProfiles" >> beam.FlatMap(lambda v: v['matching_profile']) |
+            "WriteMatchingProfileToCsv" >> WriteDictCsv(
+                join_if_relative_path(opt.output_path, matching_profile_csv_name),
+                file_name_suffix=matching_profile_ext,
+                columns=DEFAULT_MATCHING_PROFILE_COLUMNS
+            )
+        )
+
     if opt.save_svg:
         _ = (
             annotation_results |
@@ -290,10 +383,10 @@ def configure_pipeline(p, opt):
                 beam.Map(lambda v: remove_keys_from_dict(
                     extend_dict(v, {
                         'annotation_evaluation': evaluate_document_by_page(
-                            SvgStructuredDocument(v['svg_pages'])
+                            get_annotated_structured_document(v)
                         )
                     }),
-                    None if opt.min_annotation_percentage else {'svg_pages'}
+                    None if opt.min_annotation_percentage else ANNOTATED_DOCUMENT_KEYS
                 )),
                 log_fn=lambda x: get_logger().info(
                     'annotation evaluation result: %s: %s',
@@ -312,12 +405,11 @@ def configure_pipeline(p, opt):
             ) |
             "GenerateBlockPng" >> beam.Map(lambda v: remove_keys_from_dict(
                 extend_dict(v, {
-                    'block_png_pages': [
-                        svg_page_to_blockified_png_bytes(svg_page, color_map, image_size=image_size)
-                        for svg_page in v['svg_pages']
-                    ]
+                    'block_png_pages': get_blockified_png_pages(
+                        v, color_map, image_size=image_size
+                    )
                 }),
-                {'svg_pages'}
+                ANNOTATED_DOCUMENT_KEYS
             ))
         )
 
@@ -444,6 +536,11 @@ def add_main_args(parser):
         '--png-dpi', type=int, default=90,
         help='dpi of rendered pdf pages'
     )
+    parser.add_argument(
+        '--png-parallelism', type=int, required=False,
+        help='number of concurrent pdftoppm processes to render the pages of a pdf'
+        ' (each rendering a part of the page range)'
+    )
 
     parser.add_argument(
         '--image-width', type=int, required=False,
@@ -472,6 +569,35 @@ def add_main_args(parser):
         help='path to xml mapping file'
     )
 
+    parser.add_argument(
+        '--fuzzy-match-cache-size', type=int, required=False,
+        help='enables a per document alignment cache of the given maximum size (in bytes)'
+    )
+    parser.add_argument(
+        '--min-ngram-overlap', type=float, default=0,
+        help='only align target annotations against lines with at least the given'
+        ' character n-gram overlap (0 to align against all lines)'
+    )
+    parser.add_argument(
+        '--use-exact-match', default=False, action='store_true',
+        help='look for verbatim occurrences of target annotations before using fuzzy matching'
+    )
+    parser.add_argument(
+        '--target-annotation-cache-path', type=str, required=False,
+        help='path to cache the target annotations extracted from the xml files'
+        ' (keyed by the hash of the xml content and xml mapping)'
+    )
+    parser.add_argument(
+        '--stream-xml', default=False, action='store_true',
+        help='only keep the parts of the xml reachable by the xml mapping while parsing'
+        ' (reduces the memory usage for large xml files)'
+    )
+    parser.add_argument(
+        '--matching-process-count', type=int, required=False,
+        help='speculatively match the target annotations of a document'
+        ' using the given number of processes (useful for large documents)'
+    )
+
     parser.add_argument(
         '--pages', type=parse_page_range, default=None,
         help='only processes the selected pages'
@@ -493,6 +619,10 @@ def add_main_args(parser):
         '--annotation-evaluation-csv', type=str, required=False,
         help='Annotation evaluation CSV output file'
     )
+    parser.add_argument(
+        '--matching-profile-csv', type=str, required=False,
+        help='Matching profile CSV output file (statistics per target annotation name)'
+    )
     parser.add_argument(
         '--output-path', required=False,
         help='Output directory to write results to.'
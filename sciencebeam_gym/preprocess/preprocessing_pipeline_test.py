@@ -21,6 +21,11 @@ from sciencebeam_utils.utils.collection import (
     extend_dict
 )
 
+from sciencebeam_gym.structured_document import (
+    SimpleStructuredDocument,
+    SimplePage
+)
+
 from sciencebeam_gym.preprocess.preprocessing_pipeline import (
     parse_args,
     configure_pipeline,
@@ -77,7 +82,9 @@ def patch_preprocessing_pipeline(**kwargs):
         'pdf_bytes_to_png_pages',
         'convert_pdf_bytes_to_lxml',
         'convert_and_annotate_lxml_content',
+        'annotate_lxml_content',
         'svg_page_to_blockified_png_bytes',
+        'structured_document_page_to_blockified_png_bytes',
         'save_svg_roots',
         'save_pages',
         'evaluate_document_by_page',
@@ -355,6 +362,50 @@ class TestConfigurePipeline(BeamTest):
             assert mocks['pdf_bytes_to_png_pages'].called
             assert mocks['pdf_bytes_to_png_pages'].call_args[1].get('page_range') == opt.pages
 
+    def test_should_annotate_lxml_without_converting_to_svg_if_not_saving_svg(self):
+        with patch_preprocessing_pipeline() as mocks:
+            opt = get_default_args()
+            opt.save_svg = False
+            opt.save_tfrecords = True
+            with TestPipeline() as p:
+                mocks['find_file_pairs_grouped_by_parent_directory_or_name'].return_value = [
+                    (PDF_FILE_1, XML_FILE_1)
+                ]
+                mocks['annotate_lxml_content'].return_value = SimpleStructuredDocument(
+                    [SimplePage([]), SimplePage([])]
+                )
+                mocks['pdf_bytes_to_png_pages'].return_value = [
+                    fake_pdf_png_page(i) for i in [1, 2]
+                ]
+                mocks['structured_document_page_to_blockified_png_bytes'].side_effect = [
+                    fake_block_png_page(i) for i in [1, 2]
+                ]
+                configure_pipeline(p, opt)
+
+                p_result = p.run()
+                assert get_counter_value(p_result, MetricCounters.PAGE) == 2
+
+            assert not mocks['convert_and_annotate_lxml_content'].called
+            assert not mocks['save_svg_roots'].called
+            mocks['tfrecords'].assert_called_with(opt.output_path + '/data', [
+                _expected_tfrecord_props(PDF_FILE_1, page_no=i)
+                for i in [1, 2]
+            ])
+
+    def test_should_pass_png_parallelism_to_pdf_bytes_to_png_pages(self):
+        with patch_preprocessing_pipeline() as mocks:
+            opt = get_default_args()
+            opt.save_png = True
+            opt.png_parallelism = 4
+            with TestPipeline() as p:
+                mocks['find_file_pairs_grouped_by_parent_directory_or_name'].return_value = [
+                    (PDF_FILE_1, XML_FILE_1)
+                ]
+                _setup_mocks_for_pages(mocks, [1, 2])
+                configure_pipeline(p, opt)
+
+            assert mocks['pdf_bytes_to_png_pages'].call_args[1].get('parallelism') == 4
+
 
 class TestParseArgs(object):
     def test_should_raise_error_without_arguments(self):
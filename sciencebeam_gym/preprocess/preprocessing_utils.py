@@ -24,7 +24,12 @@ from sciencebeam_gym.utils.pages_zip import (
 )
 
 from sciencebeam_gym.preprocess.lxml_to_svg import (
-    iter_svg_pages_for_lxml
+    iter_svg_pages_for_lxml_source
+)
+
+from sciencebeam_gym.structured_document.lxml import (
+    LxmlStructuredDocument,
+    parse_lxml_root
 )
 
 from sciencebeam_gym.structured_document.svg import (
@@ -36,12 +41,17 @@ from sciencebeam_gym.preprocess.annotation.annotator import (
     DEFAULT_ANNOTATORS
 )
 
+from sciencebeam_gym.preprocess.annotation.fuzzy_match import (
+    FuzzyMatchCache
+)
+
 from sciencebeam_gym.preprocess.annotation.matching_annotator import (
     MatchingAnnotator
 )
 
 from sciencebeam_gym.preprocess.annotation.target_annotation import (
-    xml_root_to_target_annotations
+    xml_root_to_target_annotations,
+    iterparse_target_annotations
 )
 
 from sciencebeam_gym.preprocess.visualize_svg_annotation import (
@@ -56,8 +66,8 @@ from sciencebeam_gym.preprocess.blockify_annotations import (
 )
 
 from sciencebeam_gym.pdf import (
-    PdfToLxmlWrapper,
-    PdfToPng
+    PdfToPng,
+    get_shared_pdf_to_lxml_pool
 )
 
 
@@ -65,72 +75,170 @@ def get_logger():
     return logging.getLogger(__name__)
 
 
-def convert_pdf_bytes_to_lxml(pdf_content, path=None, page_range=None):
-    stop_watch_recorder = StopWatchRecorder()
+def convert_pdf_bytes_to_lxml(pdf_content, path=None, page_range=None, pdf_to_lxml_pool=None):
+    if pdf_to_lxml_pool is None:
+        pdf_to_lxml_pool = get_shared_pdf_to_lxml_pool()
 
     args = '-blocks -noImageInline -noImage -fullFontName'.split()
     if page_range:
         args += ['-f', str(page_range[0]), '-l', str(page_range[1])]
 
-    stop_watch_recorder.start('convert to lxml')
-    lxml_content = PdfToLxmlWrapper().process_input(
+    result = pdf_to_lxml_pool.process_input(
         pdf_content,
         args
     )
-    stop_watch_recorder.stop()
+    lxml_content = result.lxml_content
 
     get_logger().info(
         'converted to lxml: path=%s, pdf size=%s, lxml size=%s, timings=[%s]',
         path, format(len(pdf_content), ','), format(len(lxml_content), ','),
-        stop_watch_recorder
+        ', '.join(
+            '%s: %.3fs' % (key, value)
+            for key, value in sorted(iteritems(result.timings))
+        )
     )
 
     return lxml_content
 
 
-def convert_and_annotate_lxml_content(lxml_content, xml_content, xml_mapping, name=None):
-    stop_watch_recorder = StopWatchRecorder()
+def extract_target_annotations(
+        xml_content, xml_mapping, stop_watch_recorder, stream_xml=False):
 
-    stop_watch_recorder.start('parse lxml')
-    lxml_root = etree.fromstring(lxml_content)
+    if stream_xml:
+        # only keeps the parts of the xml reachable by the mapping
+        stop_watch_recorder.start('parse xml and extract target annotations')
+        return iterparse_target_annotations(
+            xml_content,
+            xml_mapping
+        )
 
     # use a more lenient way to parse xml as xml errors are not uncomment
     stop_watch_recorder.start('parse xml')
     xml_root = xml_from_string_with_recover(xml_content)
 
     stop_watch_recorder.start('extract target annotations')
-    target_annotations = xml_root_to_target_annotations(
+    return xml_root_to_target_annotations(
         xml_root,
         xml_mapping
     )
+
+
+def _get_target_annotations(
+        xml_content, xml_mapping, stop_watch_recorder, stream_xml=False,
+        target_annotation_cache=None):
+
+    target_annotations = None
+    if target_annotation_cache is not None:
+        stop_watch_recorder.start('load cached target annotations')
+        target_annotations = target_annotation_cache.get(xml_content)
+    if target_annotations is None:
+        target_annotations = extract_target_annotations(
+            xml_content, xml_mapping, stop_watch_recorder, stream_xml=stream_xml
+        )
+        if target_annotation_cache is not None:
+            stop_watch_recorder.start('cache target annotations')
+            target_annotation_cache.put(xml_content, target_annotations)
     stop_watch_recorder.stop()
+    return target_annotations
+
+
+def _create_annotator(
+        target_annotations, fuzzy_match_cache=None, min_ngram_overlap=0, use_exact_match=False,
+        matching_process_count=None, matching_profiler=None):
 
     annotators = DEFAULT_ANNOTATORS + [MatchingAnnotator(
         target_annotations,
-        use_tag_begin_prefix=True
+        use_tag_begin_prefix=True,
+        fuzzy_match_cache=fuzzy_match_cache,
+        min_ngram_overlap=min_ngram_overlap,
+        use_exact_match=use_exact_match,
+        process_count=matching_process_count,
+        profiler=matching_profiler
     )]
-    annotator = Annotator(annotators)
+    return Annotator(annotators)
+
 
-    stop_watch_recorder.start('convert to svg')
-    svg_roots = list(iter_svg_pages_for_lxml(lxml_root))
+def _annotate_lxml_content(
+        lxml_content, xml_content, xml_mapping, annotate_fn, name=None,
+        fuzzy_match_cache_size=None, min_ngram_overlap=0, use_exact_match=False,
+        matching_process_count=None, matching_profiler=None, stream_xml=False,
+        target_annotation_cache=None):
+
+    stop_watch_recorder = StopWatchRecorder()
+
+    target_annotations = _get_target_annotations(
+        xml_content, xml_mapping, stop_watch_recorder, stream_xml=stream_xml,
+        target_annotation_cache=target_annotation_cache
+    )
+
+    fuzzy_match_cache = (
+        FuzzyMatchCache(max_size=fuzzy_match_cache_size)
+        if fuzzy_match_cache_size
+        else None
+    )
+    annotator = _create_annotator(
+        target_annotations,
+        fuzzy_match_cache=fuzzy_match_cache,
+        min_ngram_overlap=min_ngram_overlap,
+        use_exact_match=use_exact_match,
+        matching_process_count=matching_process_count,
+        matching_profiler=matching_profiler
+    )
+
+    result = annotate_fn(lxml_content, annotator, stop_watch_recorder)
+    stop_watch_recorder.stop()
+
+    get_logger().info(
+        'processed: name=%s, lxml size=%s, xml size=%s, timings=[%s] (native align impl=%s)',
+        name, format(len(lxml_content), ','), format(len(xml_content), ','),
+        stop_watch_recorder, align_native_enabled
+    )
+    if fuzzy_match_cache is not None:
+        get_logger().info('fuzzy match cache: name=%s, %s', name, fuzzy_match_cache)
+
+    return result
+
+
+def _convert_to_svg_and_annotate(lxml_content, annotator, stop_watch_recorder):
+    stop_watch_recorder.start('parse lxml and convert to svg')
+    svg_roots = list(iter_svg_pages_for_lxml_source(BytesIO(lxml_content)))
 
     stop_watch_recorder.start('annotate svg')
     annotator.annotate(SvgStructuredDocument(svg_roots))
 
     stop_watch_recorder.start('add visualisation')
-    svg_roots = [
+    return [
         visualize_svg_annotations(svg_root)
         for svg_root in svg_roots
     ]
-    stop_watch_recorder.stop()
 
-    get_logger().info(
-        'processed: name=%s, lxml size=%s, xml size=%s, timings=[%s] (native align impl=%s)',
-        name, format(len(lxml_content), ','), format(len(xml_content), ','),
-        stop_watch_recorder, align_native_enabled
+
+def _parse_and_annotate_lxml(lxml_content, annotator, stop_watch_recorder):
+    stop_watch_recorder.start('parse lxml')
+    structured_document = LxmlStructuredDocument(parse_lxml_root(BytesIO(lxml_content)))
+
+    stop_watch_recorder.start('annotate lxml')
+    annotator.annotate(structured_document)
+    return structured_document
+
+
+def convert_and_annotate_lxml_content(lxml_content, xml_content, xml_mapping, **kwargs):
+    """
+    Converts the lxml to svg pages, annotates and visualises them (e.g. for saving the svg).
+    """
+    return _annotate_lxml_content(
+        lxml_content, xml_content, xml_mapping, _convert_to_svg_and_annotate, **kwargs
     )
 
-    return svg_roots
+
+def annotate_lxml_content(lxml_content, xml_content, xml_mapping, **kwargs):
+    """
+    Annotates the lxml directly (without converting it to svg),
+    returning the annotated LxmlStructuredDocument.
+    """
+    return _annotate_lxml_content(
+        lxml_content, xml_content, xml_mapping, _parse_and_annotate_lxml, **kwargs
+    )
 
 
 def save_svg_roots(output_filename, svg_pages):
@@ -140,33 +248,46 @@ def save_svg_roots(output_filename, svg_pages):
     ))
 
 
-def pdf_bytes_to_png_pages(pdf_bytes, dpi, image_size, page_range=None):
-    pdf_to_png = PdfToPng(dpi=dpi, image_size=image_size, page_range=page_range)
+def pdf_bytes_to_png_pages(pdf_bytes, dpi, image_size, page_range=None, parallelism=None):
+    pdf_to_png = PdfToPng(
+        dpi=dpi, image_size=image_size, page_range=page_range, parallelism=parallelism
+    )
     return (
         fp.read()
         for fp in pdf_to_png.iter_pdf_bytes_to_png_fp(pdf_bytes)
     )
 
 
-def svg_page_to_blockified_png_bytes(svg_page, color_map, image_size=None):
-    structured_document = SvgStructuredDocument(svg_page)
+def _get_page_bounding_box_with_size(structured_document, page):
+    try:
+        page_bounding_box = structured_document.get_bounding_box(page)
+    except KeyError:
+        # e.g. lxml page without width or height
+        page_bounding_box = None
+    if page_bounding_box is None or not page_bounding_box.width or not page_bounding_box.height:
+        raise RuntimeError(
+            'page size missing, available attributes: %s' % (
+                getattr(page, 'attrib', {}).keys()
+            )
+        )
+    return page_bounding_box
+
+
+def structured_document_page_to_blockified_png_bytes(
+        structured_document, page, color_map, image_size=None):
+
     blocks = expand_blocks(
         merge_blocks(
             annotation_document_page_to_annotation_blocks(
                 structured_document,
-                structured_document.get_pages()[0]
+                page
             )
         )
     )
-    viewbox = svg_page.attrib.get('viewBox')
-    if not viewbox:
-        raise RuntimeError(
-            'viewbox missing on svg, available attributes: %s' % svg_page.attrib.keys()
-        )
-    _, _, width, height = viewbox.split()
+    page_bounding_box = _get_page_bounding_box_with_size(structured_document, page)
     image = annotated_blocks_to_image(
         blocks, color_map,
-        width=float(width), height=float(height), background='white',
+        width=page_bounding_box.width, height=page_bounding_box.height, background='white',
         scale_to_size=image_size
     )
     out = BytesIO()
@@ -174,6 +295,19 @@ def svg_page_to_blockified_png_bytes(svg_page, color_map, image_size=None):
     return out.getvalue()
 
 
+def svg_page_to_blockified_png_bytes(svg_page, color_map, image_size=None):
+    viewbox = svg_page.attrib.get('viewBox')
+    if not viewbox:
+        raise RuntimeError(
+            'viewbox missing on svg, available attributes: %s' % svg_page.attrib.keys()
+        )
+    structured_document = SvgStructuredDocument(svg_page)
+    return structured_document_page_to_blockified_png_bytes(
+        structured_document, structured_document.get_pages()[0], color_map,
+        image_size=image_size
+    )
+
+
 def filter_list_props_by_indices(d, indices, list_props):
     return {
         k: (
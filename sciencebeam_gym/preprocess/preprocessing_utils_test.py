@@ -1,13 +1,26 @@
 from mock import patch, MagicMock, DEFAULT
 
+import pytest
+
 from lxml import etree
+from lxml.builder import E
 
 from sciencebeam_gym.structured_document.svg import (
     SVG_DOC
 )
 
+from sciencebeam_gym.pdf.pdf_to_lxml_wrapper import (
+    PdfToLxmlResult
+)
+
+from sciencebeam_gym.structured_document.lxml import (
+    LxmlStructuredDocument
+)
+
 from sciencebeam_gym.preprocess.preprocessing_utils import (
     svg_page_to_blockified_png_bytes,
+    structured_document_page_to_blockified_png_bytes,
+    annotate_lxml_content,
     convert_pdf_bytes_to_lxml,
     parse_page_range,
 )
@@ -31,6 +44,43 @@ class TestSvgPageToBlockifiedPngBytes(object):
             assert (kwargs.get('width'), kwargs.get('height')) == (100.1, 200.9)
 
 
+class TestStructuredDocumentPageToBlockifiedPngBytes(object):
+    def test_should_pass_lxml_page_width_and_height_to_annotated_blocks_to_image(self):
+        with patch.multiple(PROCESSING_UTILS, annotated_blocks_to_image=DEFAULT) as mocks:
+            structured_document = LxmlStructuredDocument(E.DOCUMENT(
+                E.PAGE(width='100.1', height='200.9')
+            ))
+            structured_document_page_to_blockified_png_bytes(
+                structured_document, structured_document.get_pages()[0], {}, (100, 200)
+            )
+            call_args = mocks['annotated_blocks_to_image'].call_args
+            kwargs = call_args[1]
+            assert (kwargs.get('width'), kwargs.get('height')) == (100.1, 200.9)
+
+    def test_should_raise_runtime_error_if_lxml_page_has_no_size(self):
+        structured_document = LxmlStructuredDocument(E.DOCUMENT(E.PAGE()))
+        with pytest.raises(RuntimeError) as excinfo:
+            structured_document_page_to_blockified_png_bytes(
+                structured_document, structured_document.get_pages()[0], {}
+            )
+        assert 'page size missing' in str(excinfo.value)
+
+
+class TestAnnotateLxmlContent(object):
+    def test_should_annotate_lxml_tokens_matching_xml(self):
+        lxml_content = etree.tostring(E.DOCUMENT(E.PAGE(E.TEXT(
+            E.TOKEN('Some', x='10', y='10', width='10', height='10'),
+            E.TOKEN('Title', x='30', y='10', width='10', height='10')
+        ), width='100', height='100')))
+        xml_content = b'<article><title>Some Title</title></article>'
+        xml_mapping = {'article': {'title': 'title'}}
+        structured_document = annotate_lxml_content(lxml_content, xml_content, xml_mapping)
+        assert [
+            structured_document.get_tag_value(token)
+            for token in structured_document.iter_all_tokens()
+        ] == ['title', 'title']
+
+
 DEFAULT_PDF_TO_LXML_ARGS = ['-blocks', '-noImageInline', '-noImage', '-fullFontName']
 
 LXML_CONTENT_1 = b'lxml content 1'
@@ -39,10 +89,11 @@ LXML_CONTENT_1 = b'lxml content 1'
 class TestConvertPdfBytesToLxml(object):
     def test_should_pass_pdf_content_and_default_args_to_process_input(self):
         mock = MagicMock()
-        with patch.multiple(PROCESSING_UTILS, PdfToLxmlWrapper=mock):
-            mock.return_value.process_input.return_value = LXML_CONTENT_1
+        with patch.multiple(PROCESSING_UTILS, get_shared_pdf_to_lxml_pool=mock):
+            pool = mock.return_value
+            pool.process_input.return_value = PdfToLxmlResult(LXML_CONTENT_1, {})
             lxml_content = convert_pdf_bytes_to_lxml(PDF_CONTENT_1)
-            mock.return_value.process_input.assert_called_with(
+            pool.process_input.assert_called_with(
                 PDF_CONTENT_1,
                 DEFAULT_PDF_TO_LXML_ARGS
             )
@@ -50,15 +101,23 @@ class TestConvertPdfBytesToLxml(object):
 
     def test_should_pass_include_page_range_in_args(self):
         mock = MagicMock()
-        with patch.multiple(PROCESSING_UTILS, PdfToLxmlWrapper=mock):
-            mock.return_value.process_input.return_value = LXML_CONTENT_1
+        with patch.multiple(PROCESSING_UTILS, get_shared_pdf_to_lxml_pool=mock):
+            pool = mock.return_value
+            pool.process_input.return_value = PdfToLxmlResult(LXML_CONTENT_1, {})
             lxml_content = convert_pdf_bytes_to_lxml(PDF_CONTENT_1, page_range=(1, 3))
-            mock.return_value.process_input.assert_called_with(
+            pool.process_input.assert_called_with(
                 PDF_CONTENT_1,
                 DEFAULT_PDF_TO_LXML_ARGS + ['-f', '1', '-l', '3']
             )
             assert lxml_content == LXML_CONTENT_1
 
+    def test_should_use_passed_in_pdf_to_lxml_pool(self):
+        pool = MagicMock()
+        pool.process_input.return_value = PdfToLxmlResult(LXML_CONTENT_1, {'process': 1.0})
+        lxml_content = convert_pdf_bytes_to_lxml(PDF_CONTENT_1, pdf_to_lxml_pool=pool)
+        assert pool.process_input.called
+        assert lxml_content == LXML_CONTENT_1
+
 
 class TestPageRange(object):
     def test_should_parse_single_page_number_as_range(self):
@@ -0,0 +1,98 @@
+from __future__ import absolute_import
+
+import hashlib
+import json
+import logging
+
+from apache_beam.io.filesystems import FileSystems
+from apache_beam.metrics.metric import Metrics
+
+from sciencebeam_utils.beam_utils.io import (
+    read_all_from_path,
+    save_file_content
+)
+
+from sciencebeam_gym.preprocess.annotation.target_annotation import (
+    CompiledXmlMapping,
+    serialize_target_annotations,
+    deserialize_target_annotations
+)
+
+
+# increment to invalidate previously cached target annotations (e.g. extraction changes)
+TARGET_ANNOTATION_CACHE_VERSION = 1
+
+
+def get_logger():
+    return logging.getLogger(__name__)
+
+
+class TargetAnnotationCacheCounters(object):
+    HIT = 'target_annotation_cache_hit_count'
+    MISS = 'target_annotation_cache_miss_count'
+    ERROR = 'target_annotation_cache_error_count'
+
+
+def get_xml_mapping_hash(xml_mapping):
+    if isinstance(xml_mapping, CompiledXmlMapping):
+        xml_mapping = xml_mapping.xml_mapping
+    return hashlib.sha256(json.dumps(
+        [TARGET_ANNOTATION_CACHE_VERSION, xml_mapping], sort_keys=True
+    ).encode('utf-8')).hexdigest()
+
+
+def get_xml_content_hash(xml_content):
+    return hashlib.sha256(xml_content).hexdigest()
+
+
+class TargetAnnotationCache(object):
+    """
+    Caches the target annotations extracted from xml content (e.g. in a bucket),
+    keyed by the hash of the xml content and the hash of the xml mapping.
+    Errors reading or writing the cache are logged and otherwise ignored.
+    """
+
+    def __init__(self, cache_path, xml_mapping):
+        self.cache_path = cache_path
+        self.xml_mapping_hash = get_xml_mapping_hash(xml_mapping)
+        self.hit_counter = Metrics.counter(
+            'TargetAnnotationCache', TargetAnnotationCacheCounters.HIT
+        )
+        self.miss_counter = Metrics.counter(
+            'TargetAnnotationCache', TargetAnnotationCacheCounters.MISS
+        )
+        self.error_counter = Metrics.counter(
+            'TargetAnnotationCache', TargetAnnotationCacheCounters.ERROR
+        )
+
+    def get_path(self, xml_content):
+        xml_content_hash = get_xml_content_hash(xml_content)
+        return FileSystems.join(
+            self.cache_path, self.xml_mapping_hash,
+            xml_content_hash[:2], xml_content_hash + '.json.gz'
+        )
+
+    def get(self, xml_content):
+        path = self.get_path(xml_content)
+        try:
+            if FileSystems.exists(path):
+                target_annotations = deserialize_target_annotations(read_all_from_path(path))
+                self.hit_counter.inc()
+                return target_annotations
+        except Exception as e:  # pylint: disable=broad-except
+            self.error_counter.inc()
+            get_logger().warning(
+                'failed to read cached target annotations: %s, %s', path, e, exc_info=e
+            )
+        self.miss_counter.inc()
+        return None
+
+    def put(self, xml_content, target_annotations):
+        path = self.get_path(xml_content)
+        try:
+            save_file_content(path, serialize_target_annotations(target_annotations))
+        except Exception as e:  # pylint: disable=broad-except
+            self.error_counter.inc()
+            get_logger().warning(
+                'failed to cache target annotations: %s, %s', path, e, exc_info=e
+            )
@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+
+from mock import patch, MagicMock
+
+from sciencebeam_gym.preprocess.annotation.target_annotation import (
+    TargetAnnotation,
+    compile_xml_mapping
+)
+
+from sciencebeam_gym.preprocess.target_annotation_cache import (
+    TargetAnnotationCache,
+    TargetAnnotationCacheCounters
+)
+
+import sciencebeam_gym.preprocess.target_annotation_cache as target_annotation_cache_module
+
+
+TAG1 = 'tag1'
+TAG2 = 'tag2'
+
+XML_CONTENT_1 = b'<root><a>value 1</a></root>'
+XML_CONTENT_2 = b'<root><a>value 2</a></root>'
+
+XML_MAPPING_1 = {'root': {TAG1: 'a'}}
+XML_MAPPING_2 = {'root': {TAG2: 'a'}}
+
+TARGET_ANNOTATIONS_1 = [
+    TargetAnnotation('value 1', TAG1, bonding=True, sub_annotations=[
+        TargetAnnotation('value', TAG2)
+    ])
+]
+
+
+def _to_comparable(target_annotations):
+    return [
+        (
+            t.name, t.value, t.bonding, t.require_next, t.match_multiple,
+            _to_comparable(t.sub_annotations or [])
+        )
+        for t in target_annotations
+    ]
+
+
+@contextmanager
+def patch_counters():
+    counters = {}
+
+    def counter(_, name):
+        return counters.setdefault(name, MagicMock(name=name))
+
+    with patch.object(target_annotation_cache_module, 'Metrics') as metrics_mock:
+        metrics_mock.counter.side_effect = counter
+        yield counters
+
+
+def _get_counter_inc_counts(counters):
+    return {
+        name: counters[name].inc.call_count
+        for name in [
+            TargetAnnotationCacheCounters.HIT,
+            TargetAnnotationCacheCounters.MISS,
+            TargetAnnotationCacheCounters.ERROR
+        ]
+    }
+
+
+class TestTargetAnnotationCache(object):
+    def test_should_return_none_if_not_cached(self, tmpdir):
+        cache = TargetAnnotationCache(str(tmpdir), XML_MAPPING_1)
+        assert cache.get(XML_CONTENT_1) is None
+
+    def test_should_return_previously_cached_target_annotations(self, tmpdir):
+        cache = TargetAnnotationCache(str(tmpdir), XML_MAPPING_1)
+        cache.put(XML_CONTENT_1, TARGET_ANNOTATIONS_1)
+        assert _to_comparable(cache.get(XML_CONTENT_1)) == _to_comparable(
+            TARGET_ANNOTATIONS_1
+        )
+        assert cache.get(XML_CONTENT_2) is None
+
+    def test_should_use_same_key_for_compiled_xml_mapping(self, tmpdir):
+        TargetAnnotationCache(str(tmpdir), XML_MAPPING_1).put(
+            XML_CONTENT_1, TARGET_ANNOTATIONS_1
+        )
+        cache = TargetAnnotationCache(str(tmpdir), compile_xml_mapping(XML_MAPPING_1))
+        assert cache.get(XML_CONTENT_1) is not None
+
+    def test_should_not_return_target_annotations_of_different_xml_mapping(self, tmpdir):
+        TargetAnnotationCache(str(tmpdir), XML_MAPPING_1).put(
+            XML_CONTENT_1, TARGET_ANNOTATIONS_1
+        )
+        cache = TargetAnnotationCache(str(tmpdir), XML_MAPPING_2)
+        assert cache.get(XML_CONTENT_1) is None
+
+    def test_should_increment_miss_counter_if_not_cached(self, tmpdir):
+        with patch_counters() as counters:
+            cache = TargetAnnotationCache(str(tmpdir), XML_MAPPING_1)
+            cache.get(XML_CONTENT_1)
+            assert _get_counter_inc_counts(counters) == {
+                TargetAnnotationCacheCounters.HIT: 0,
+                TargetAnnotationCacheCounters.MISS: 1,
+                TargetAnnotationCacheCounters.ERROR: 0
+            }
+
+    def test_should_increment_hit_counter_if_cached(self, tmpdir):
+        with patch_counters() as counters:
+            cache = TargetAnnotationCache(str(tmpdir), XML_MAPPING_1)
+            cache.put(XML_CONTENT_1, TARGET_ANNOTATIONS_1)
+            cache.get(XML_CONTENT_1)
+            assert _get_counter_inc_counts(counters) == {
+                TargetAnnotationCacheCounters.HIT: 1,
+                TargetAnnotationCacheCounters.MISS: 0,
+                TargetAnnotationCacheCounters.ERROR: 0
+            }
+
+    def test_should_increment_error_and_miss_counter_if_cache_entry_is_corrupt(self, tmpdir):
+        with patch_counters() as counters:
+            cache = TargetAnnotationCache(str(tmpdir), XML_MAPPING_1)
+            cache.put(XML_CONTENT_1, TARGET_ANNOTATIONS_1)
+            with open(cache.get_path(XML_CONTENT_1), 'wb') as f:
+                f.write(b'corrupt')
+            assert cache.get(XML_CONTENT_1) is None
+            assert _get_counter_inc_counts(counters) == {
+                TargetAnnotationCacheCounters.HIT: 0,
+                TargetAnnotationCacheCounters.MISS: 1,
+                TargetAnnotationCacheCounters.ERROR: 1
+            }
@@ -95,6 +95,14 @@ class AbstractStructuredDocument(object, with_metaclass(ABCMeta)):
                 other_structured_document, other_token
             )
 
+    def invalidate_index(self):
+        """
+        Should be called after changing the structure (pages, lines or tokens) or
+        the position attributes of the underlying document, if the implementation caches them.
+        Changes via set_tag or set_bounding_box do not require it.
+        """
+        pass
+
     def get_tag_prefix_and_value(self, parent, scope=None, level=None):
         return split_tag_prefix(self.get_tag(parent, scope=scope, level=level))
 
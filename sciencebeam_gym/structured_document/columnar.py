@@ -0,0 +1,788 @@
+from __future__ import absolute_import
+
+import json
+from copy import deepcopy
+
+import numpy as np
+
+from lxml import etree
+
+from sciencebeam_gym.utils.bounding_box import (
+    BoundingBox
+)
+
+from sciencebeam_gym.structured_document import (
+    AbstractStructuredDocument
+)
+
+from sciencebeam_gym.structured_document.lxml import (
+    LxmlStructuredDocument,
+    TAG_ATTRIB_NAME
+)
+
+from sciencebeam_gym.structured_document.svg import (
+    SvgStructuredDocument,
+    SvgStyleClasses,
+    SVG_NSMAP,
+    SVG_DOC,
+    SVG_G,
+    SVG_TEXT,
+    SVG_VIEWBOX_ATTRIB,
+    format_bounding_box
+)
+
+
+FONT_SIZE_ATTRIB_NAME = 'font-size'
+
+# the id of None in a StringTable
+NONE_STRING_ID = 0
+
+# separates the names of the attributes of an element (not valid within XML names)
+ATTRIB_NAME_SEP = ' '
+
+COLUMNAR_EXT = '.npz'
+
+NPZ_FORMAT_VERSION = 2
+
+# separates the strings of a string table within the npz container
+NPZ_STRING_SEP = u'\0'
+
+
+class ElementKinds(object):
+    PAGE = 'page'
+    LINE = 'line'
+    TOKEN = 'token'
+
+
+class StringTable(object):
+    """
+    Interns strings, mapping each distinct string to an integer id (None is always 0).
+    """
+
+    def __init__(self, strings=None):
+        self.strings = [None]
+        self.id_by_string = {}
+        for s in strings or []:
+            self.get_id(s)
+
+    def get_id(self, s):
+        if s is None:
+            return NONE_STRING_ID
+        string_id = self.id_by_string.get(s)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(s)
+            self.id_by_string[s] = string_id
+        return string_id
+
+    def get_ids(self, strings):
+        return np.array([self.get_id(s) for s in strings], dtype=np.int32)
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class ColumnarElement(object):
+    __slots__ = ['index']
+
+    def __init__(self, index):
+        self.index = index
+
+    def __eq__(self, other):
+        return type(self) == type(other) and self.index == other.index  # noqa: E721
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((type(self), self.index))
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, self.index)
+
+
+class ColumnarPage(ColumnarElement):
+    __slots__ = []
+
+
+class ColumnarLine(ColumnarElement):
+    __slots__ = []
+
+
+class ColumnarToken(ColumnarElement):
+    __slots__ = []
+
+
+def _to_bounding_box_row(bounding_box):
+    if bounding_box is None:
+        return [np.nan] * 4
+    return [bounding_box.x, bounding_box.y, bounding_box.width, bounding_box.height]
+
+
+def _to_bounding_box_array(bounding_boxes):
+    return np.array(
+        [_to_bounding_box_row(bounding_box) for bounding_box in bounding_boxes],
+        dtype=np.float64
+    ).reshape(-1, 4)
+
+
+def _from_bounding_box_row(row):
+    if np.isnan(row[0]):
+        return None
+    return BoundingBox(float(row[0]), float(row[1]), float(row[2]), float(row[3]))
+
+
+def _get_start_offsets(sorted_parent_indices, parent_count):
+    return np.searchsorted(sorted_parent_indices, np.arange(parent_count + 1))
+
+
+def _get_font_size(token):
+    attrib = getattr(token, 'attrib', None)
+    font_size = attrib.get(FONT_SIZE_ATTRIB_NAME) if attrib is not None else None
+    return float(font_size) if font_size else np.nan
+
+
+def _parse_float_or_none(s):
+    try:
+        return float(s)
+    except (TypeError, ValueError):
+        return None
+
+
+def _set_number_attrib(attrib, name, value):
+    # keeps the original formatting (e.g. "1" rather than "1.0") of unchanged values
+    if _parse_float_or_none(attrib.get(name)) != value:
+        attrib[name] = str(value)
+
+
+def _set_bounding_box_attribs(attrib, bounding_box, names=('x', 'y', 'width', 'height')):
+    values = _to_bounding_box_row(bounding_box)
+    for name, value in zip(['x', 'y', 'width', 'height'], values):
+        if name in names:
+            _set_number_attrib(attrib, name, value)
+
+
+def _sort_attrib(attrib, names):
+    position_by_name = {name: i for i, name in enumerate(names)}
+    items = list(attrib.items())
+    sorted_items = sorted(items, key=lambda item: position_by_name.get(item[0], len(names)))
+    if sorted_items != items:
+        attrib.clear()
+        for name, value in sorted_items:
+            attrib[name] = value
+
+
+def _is_lxml_tag_attrib_name(name):
+    return (
+        name == TAG_ATTRIB_NAME or
+        name.endswith('-' + TAG_ATTRIB_NAME) or
+        name.endswith('_' + TAG_ATTRIB_NAME)
+    )
+
+
+def _is_lxml_extra_attrib(kind, name):
+    # the original strings of the bounding box and font size attributes are kept as well
+    return kind != ElementKinds.TOKEN or not _is_lxml_tag_attrib_name(name)
+
+
+def _add_extra_attribs(attrib_by_name, attrib_names_by_index, index, node, kind, is_extra_attrib):
+    if is_extra_attrib is None:
+        return
+    for name, value in node.attrib.items():
+        if is_extra_attrib(kind, name):
+            attrib_by_name.setdefault(name, {})[index] = value
+    attrib_names_by_index[index] = ATTRIB_NAME_SEP.join(node.attrib.keys())
+
+
+def _iter_lxml_pages_lines_and_tokens(root):
+    # the same elements as the ones of the LxmlStructuredDocument
+    for page in root.findall('.//PAGE'):
+        lines = page.findall('.//TEXT')
+        yield page, lines, [line.findall('./TOKEN') for line in lines]
+
+
+def _get_lxml_skeleton(root):
+    """
+    Serialises the document without the attributes of the lines and tokens, and without
+    the token texts (which are held by the columns). The lines and tokens remain as
+    placeholders, everything else (e.g. metadata or blocks) is kept as is.
+    """
+    skeleton_root = deepcopy(root)
+    for _, lines, tokens_by_line in _iter_lxml_pages_lines_and_tokens(skeleton_root):
+        for line, tokens in zip(lines, tokens_by_line):
+            line.attrib.clear()
+            for token in tokens:
+                token.attrib.clear()
+                token.text = None
+    return etree.tostring(skeleton_root)
+
+
+def _slice_lxml_skeleton(lxml_skeleton, start, stop):
+    if lxml_skeleton is None:
+        return None
+    root = etree.fromstring(lxml_skeleton)
+    for page_index, page in enumerate(root.findall('.//PAGE')):
+        if page_index < start or page_index >= stop:
+            page.getparent().remove(page)
+    return etree.tostring(root)
+
+
+def _to_id_array(value_by_index, count, string_table):
+    ids = np.zeros(count, dtype=np.int32)
+    for index, value in value_by_index.items():
+        ids[index] = string_table.get_id(value)
+    return ids
+
+
+def _to_id_arrays(value_by_index_by_key, count, string_table):
+    return {
+        key: _to_id_array(value_by_index, count, string_table)
+        for key, value_by_index in value_by_index_by_key.items()
+    }
+
+
+def _to_byte_array(data):
+    if not data:
+        return np.zeros(0, dtype=np.uint8)
+    return np.frombuffer(data, dtype=np.uint8)
+
+
+def _from_byte_array(data):
+    return data.tobytes()
+
+
+def _encode_string_table(string_table):
+    return _to_byte_array(NPZ_STRING_SEP.join(string_table.strings[1:]).encode('utf-8'))
+
+
+def _decode_string_table(data, count):
+    if not count:
+        return StringTable()
+    return StringTable(_from_byte_array(data).decode('utf-8').split(NPZ_STRING_SEP))
+
+
+def _iter_tag_keys(structured_document, token):
+    scopes = structured_document.get_tag_by_scope(token).keys()
+    for scope in scopes:
+        yield scope, None
+    for scope in set(scopes) | {None}:
+        if structured_document.get_tag(token, scope=scope, level=2):
+            yield scope, 2
+
+
+class ColumnarStructuredDocument(AbstractStructuredDocument):
+    """
+    Structured document holding the page, line and token properties in NumPy arrays
+    (bounding boxes, font sizes, parent indices and interned text and tag ids),
+    rather than in an element tree. Pages, lines and tokens are referred to via
+    lightweight index handles. Tags are only supported on tokens.
+
+    Tokens are expected to be in line order and lines in page order.
+    The get_token_* methods allow vectorised access, e.g. to all tokens of a page.
+    """
+
+    def __init__(
+            self, page_bounding_boxes, line_page_indices, line_bounding_boxes,
+            token_line_indices, token_text_ids, text_table,
+            token_bounding_boxes, token_font_sizes,
+            token_tag_ids_by_key=None, tag_table=None,
+            attrib_ids_by_name_by_kind=None, attrib_table=None,
+            attrib_names_ids_by_kind=None, lxml_skeleton=None):
+
+        self.page_bounding_boxes = page_bounding_boxes
+        self.line_page_indices = line_page_indices
+        self.line_bounding_boxes = line_bounding_boxes
+        self.token_line_indices = token_line_indices
+        self.token_page_indices = line_page_indices[token_line_indices]
+        self.token_text_ids = token_text_ids
+        self.text_table = text_table
+        self.token_bounding_boxes = token_bounding_boxes
+        self.token_font_sizes = token_font_sizes
+        self.token_tag_ids_by_key = token_tag_ids_by_key or {}
+        self.tag_table = tag_table or StringTable()
+        # other attributes of the source elements (only kept when converting from LXML)
+        self.attrib_ids_by_name_by_kind = attrib_ids_by_name_by_kind or {}
+        self.attrib_table = attrib_table or StringTable()
+        # the (ordered) attribute names of each source element, see ATTRIB_NAME_SEP
+        self.attrib_names_ids_by_kind = attrib_names_ids_by_kind or {}
+        # the LXML document without the columns (only when converted from LXML)
+        self.lxml_skeleton = lxml_skeleton
+        self.page_line_starts = _get_start_offsets(
+            line_page_indices, len(page_bounding_boxes)
+        )
+        self.line_token_starts = _get_start_offsets(
+            token_line_indices, len(line_bounding_boxes)
+        )
+        self.page_token_starts = self.line_token_starts[self.page_line_starts]
+
+    @staticmethod
+    def from_structured_document(structured_document, is_extra_attrib=None):
+        """
+        Attributes of the source elements for which is_extra_attrib(kind, name) is true
+        will be kept as string columns (other than the ones already represented).
+        """
+        kinds = [ElementKinds.PAGE, ElementKinds.LINE, ElementKinds.TOKEN]
+        attrib_by_name_by_kind = {kind: {} for kind in kinds}
+        attrib_names_by_index_by_kind = {kind: {} for kind in kinds}
+        page_bounding_boxes = []
+        line_page_indices = []
+        line_bounding_boxes = []
+        token_line_indices = []
+        token_texts = []
+        token_bounding_boxes = []
+        token_font_sizes = []
+        token_tags_by_key = {}
+        for page_index, page in enumerate(structured_document.get_pages()):
+            page_bounding_boxes.append(structured_document.get_bounding_box(page))
+            _add_extra_attribs(
+                attrib_by_name_by_kind[ElementKinds.PAGE],
+                attrib_names_by_index_by_kind[ElementKinds.PAGE],
+                page_index, page, ElementKinds.PAGE, is_extra_attrib
+            )
+            for line in structured_document.get_lines_of_page(page):
+                line_index = len(line_page_indices)
+                line_page_indices.append(page_index)
+                line_bounding_boxes.append(structured_document.get_bounding_box(line))
+                _add_extra_attribs(
+                    attrib_by_name_by_kind[ElementKinds.LINE],
+                    attrib_names_by_index_by_kind[ElementKinds.LINE],
+                    line_index, line, ElementKinds.LINE, is_extra_attrib
+                )
+                for token in structured_document.get_tokens_of_line(line):
+                    token_index = len(token_line_indices)
+                    token_line_indices.append(line_index)
+                    token_texts.append(structured_document.get_text(token))
+                    token_bounding_boxes.append(structured_document.get_bounding_box(token))
+                    token_font_sizes.append(_get_font_size(token))
+                    _add_extra_attribs(
+                        attrib_by_name_by_kind[ElementKinds.TOKEN],
+                        attrib_names_by_index_by_kind[ElementKinds.TOKEN],
+                        token_index, token, ElementKinds.TOKEN, is_extra_attrib
+                    )
+                    for scope, level in _iter_tag_keys(structured_document, token):
+                        token_tags_by_key.setdefault((scope, level), {})[token_index] = (
+                            structured_document.get_tag(token, scope=scope, level=level)
+                        )
+        text_table = StringTable()
+        tag_table = StringTable()
+        attrib_table = StringTable()
+        count_by_kind = {
+            ElementKinds.PAGE: len(page_bounding_boxes),
+            ElementKinds.LINE: len(line_page_indices),
+            ElementKinds.TOKEN: len(token_line_indices)
+        }
+        return ColumnarStructuredDocument(
+            page_bounding_boxes=_to_bounding_box_array(page_bounding_boxes),
+            line_page_indices=np.array(line_page_indices, dtype=np.int32),
+            line_bounding_boxes=_to_bounding_box_array(line_bounding_boxes),
+            token_line_indices=np.array(token_line_indices, dtype=np.int32),
+            token_text_ids=text_table.get_ids(token_texts),
+            text_table=text_table,
+            token_bounding_boxes=_to_bounding_box_array(token_bounding_boxes),
+            token_font_sizes=np.array(token_font_sizes, dtype=np.float64),
+            token_tag_ids_by_key=_to_id_arrays(
+                token_tags_by_key, count_by_kind[ElementKinds.TOKEN], tag_table
+            ),
+            tag_table=tag_table,
+            attrib_ids_by_name_by_kind={
+                kind: _to_id_arrays(attrib_by_name, count_by_kind[kind], attrib_table)
+                for kind, attrib_by_name in attrib_by_name_by_kind.items()
+            },
+            attrib_table=attrib_table,
+            attrib_names_ids_by_kind={
+                kind: _to_id_array(attrib_names_by_index, count_by_kind[kind], attrib_table)
+                for kind, attrib_names_by_index in attrib_names_by_index_by_kind.items()
+                if attrib_names_by_index
+            }
+        )
+
+    @staticmethod
+    def from_lxml_root(root):
+        """
+        Keeps all of the attributes of the pages, lines and tokens, as well as the
+        other elements (e.g. metadata or blocks), see to_lxml_root.
+        """
+        structured_document = ColumnarStructuredDocument.from_structured_document(
+            LxmlStructuredDocument(root), is_extra_attrib=_is_lxml_extra_attrib
+        )
+        structured_document.lxml_skeleton = _get_lxml_skeleton(root)
+        return structured_document
+
+    @staticmethod
+    def from_svg_roots(page_roots):
+        return ColumnarStructuredDocument.from_structured_document(
+            SvgStructuredDocument(page_roots)
+        )
+
+    def slice_pages(self, start, stop):
+        """
+        Returns a new document with the pages from start to stop (zero based, exclusive),
+        sharing the string tables.
+        """
+        start = min(start, len(self.page_bounding_boxes))
+        stop = max(start, min(stop, len(self.page_bounding_boxes)))
+        line_start, line_stop = self.page_line_starts[start], self.page_line_starts[stop]
+        token_start = self.line_token_starts[line_start]
+        token_stop = self.line_token_starts[line_stop]
+        slice_by_kind = {
+            ElementKinds.PAGE: slice(start, stop),
+            ElementKinds.LINE: slice(line_start, line_stop),
+            ElementKinds.TOKEN: slice(token_start, token_stop)
+        }
+        token_slice = slice_by_kind[ElementKinds.TOKEN]
+        return ColumnarStructuredDocument(
+            page_bounding_boxes=self.page_bounding_boxes[start:stop].copy(),
+            line_page_indices=self.line_page_indices[line_start:line_stop] - start,
+            line_bounding_boxes=self.line_bounding_boxes[line_start:line_stop].copy(),
+            token_line_indices=self.token_line_indices[token_slice] - line_start,
+            token_text_ids=self.token_text_ids[token_slice].copy(),
+            text_table=self.text_table,
+            token_bounding_boxes=self.token_bounding_boxes[token_slice].copy(),
+            token_font_sizes=self.token_font_sizes[token_slice].copy(),
+            token_tag_ids_by_key={
+                key: tag_ids[token_slice].copy()
+                for key, tag_ids in self.token_tag_ids_by_key.items()
+            },
+            tag_table=self.tag_table,
+            attrib_ids_by_name_by_kind={
+                kind: {
+                    name: attrib_ids[slice_by_kind[kind]].copy()
+                    for name, attrib_ids in attrib_ids_by_name.items()
+                }
+                for kind, attrib_ids_by_name in self.attrib_ids_by_name_by_kind.items()
+            },
+            attrib_table=self.attrib_table,
+            attrib_names_ids_by_kind={
+                kind: attrib_names_ids[slice_by_kind[kind]].copy()
+                for kind, attrib_names_ids in self.attrib_names_ids_by_kind.items()
+            },
+            lxml_skeleton=_slice_lxml_skeleton(self.lxml_skeleton, start, stop)
+        )
+
+    def _get_bounding_box_array(self, parent):
+        if isinstance(parent, ColumnarToken):
+            return self.token_bounding_boxes
+        if isinstance(parent, ColumnarLine):
+            return self.line_bounding_boxes
+        if isinstance(parent, ColumnarPage):
+            return self.page_bounding_boxes
+        raise TypeError('unsupported element: %r' % parent)
+
+    def _validate_token(self, parent):
+        if not isinstance(parent, ColumnarToken):
+            raise TypeError('tags are only supported on tokens: %r' % parent)
+
+    def get_pages(self):
+        return [ColumnarPage(i) for i in range(len(self.page_bounding_boxes))]
+
+    def get_lines_of_page(self, page):
+        return [
+            ColumnarLine(i)
+            for i in range(
+                self.page_line_starts[page.index], self.page_line_starts[page.index + 1]
+            )
+        ]
+
+    def get_tokens_of_line(self, line):
+        return [
+            ColumnarToken(i)
+            for i in range(
+                self.line_token_starts[line.index], self.line_token_starts[line.index + 1]
+            )
+        ]
+
+    def get_x(self, parent):
+        x = self._get_bounding_box_array(parent)[parent.index, 0]
+        return None if np.isnan(x) else float(x)
+
+    def get_text(self, parent):
+        if not isinstance(parent, ColumnarToken):
+            return None
+        return self.text_table[self.token_text_ids[parent.index]]
+
+    def get_font_size(self, parent):
+        self._validate_token(parent)
+        font_size = self.token_font_sizes[parent.index]
+        return None if np.isnan(font_size) else float(font_size)
+
+    def get_tag(self, parent, scope=None, level=None):
+        self._validate_token(parent)
+        tag_ids = self.token_tag_ids_by_key.get((scope, level))
+        if tag_ids is None:
+            return None
+        return self.tag_table[tag_ids[parent.index]]
+
+    def set_tag(self, parent, tag, scope=None, level=None):
+        self._validate_token(parent)
+        self.get_token_tag_ids(scope=scope, level=level)[parent.index] = (
+            self.tag_table.get_id(tag)
+        )
+
+    def get_tag_by_scope(self, parent):
+        self._validate_token(parent)
+        return {
+            scope: self.tag_table[tag_ids[parent.index]]
+            for (scope, level), tag_ids in self.token_tag_ids_by_key.items()
+            if level is None and tag_ids[parent.index] != NONE_STRING_ID
+        }
+
+    def get_bounding_box(self, parent):
+        return _from_bounding_box_row(self._get_bounding_box_array(parent)[parent.index])
+
+    def set_bounding_box(self, parent, bounding_box):
+        self._get_bounding_box_array(parent)[parent.index] = _to_bounding_box_row(bounding_box)
+
+    def get_token_slice(self, page=None, line=None):
+        if line is not None:
+            return slice(
+                self.line_token_starts[line.index], self.line_token_starts[line.index + 1]
+            )
+        if page is not None:
+            return slice(
+                self.page_token_starts[page.index], self.page_token_starts[page.index + 1]
+            )
+        return slice(0, len(self.token_line_indices))
+
+    def get_token_bounding_boxes(self, page=None, line=None):
+        """
+        Returns the (view of the) bounding box array with the x, y, width, height columns.
+        """
+        return self.token_bounding_boxes[self.get_token_slice(page=page, line=line)]
+
+    def get_token_tag_ids(self, scope=None, level=None, page=None, line=None):
+        """
+        Returns the (view of the) tag id array, ids can be resolved via tag_table.
+        """
+        key = (scope, level)
+        tag_ids = self.token_tag_ids_by_key.get(key)
+        if tag_ids is None:
+            tag_ids = np.zeros(len(self.token_line_indices), dtype=np.int32)
+            self.token_tag_ids_by_key[key] = tag_ids
+        return tag_ids[self.get_token_slice(page=page, line=line)]
+
+    def get_token_texts(self, page=None, line=None):
+        return [
+            self.text_table[text_id]
+            for text_id in self.token_text_ids[self.get_token_slice(page=page, line=line)]
+        ]
+
+    def copy_tags_to(self, structured_document):
+        """
+        Copies the token tags to another structured document with the same tokens,
+        e.g. the one this document was created from.
+        """
+        for token_index, other_token in enumerate(structured_document.iter_all_tokens()):
+            for (scope, level), tag_ids in self.token_tag_ids_by_key.items():
+                structured_document.set_tag(
+                    other_token, self.tag_table[tag_ids[token_index]], scope=scope, level=level
+                )
+
+    def _copy_extra_attribs_to(self, kind, index, node):
+        for name, attrib_ids in self.attrib_ids_by_name_by_kind.get(kind, {}).items():
+            value = self.attrib_table[attrib_ids[index]]
+            if value is not None:
+                node.attrib[name] = value
+
+    def _sort_attrib_of(self, kind, index, node):
+        attrib_names_ids = self.attrib_names_ids_by_kind.get(kind)
+        if attrib_names_ids is None:
+            return
+        attrib_names = self.attrib_table[attrib_names_ids[index]]
+        if attrib_names:
+            _sort_attrib(node.attrib, attrib_names.split(ATTRIB_NAME_SEP))
+
+    def _copy_token_tags_to(self, structured_document, token_index, other_token):
+        for (scope, level), tag_ids in self.token_tag_ids_by_key.items():
+            tag = self.tag_table[tag_ids[token_index]]
+            if tag:
+                structured_document.set_tag(other_token, tag, scope=scope, level=level)
+
+    def _copy_token_properties_to(self, structured_document, token_index, other_token):
+        token = ColumnarToken(token_index)
+        bounding_box = self.get_bounding_box(token)
+        if bounding_box is not None:
+            structured_document.set_bounding_box(other_token, bounding_box)
+        font_size = self.get_font_size(token)
+        if font_size is not None:
+            other_token.attrib[FONT_SIZE_ATTRIB_NAME] = str(font_size)
+        self._copy_token_tags_to(structured_document, token_index, other_token)
+
+    def _copy_lxml_token_properties_to(self, structured_document, token_index, token_node):
+        token = ColumnarToken(token_index)
+        bounding_box = self.get_bounding_box(token)
+        if bounding_box is not None:
+            _set_bounding_box_attribs(token_node.attrib, bounding_box)
+        font_size = self.get_font_size(token)
+        if font_size is not None:
+            _set_number_attrib(token_node.attrib, FONT_SIZE_ATTRIB_NAME, font_size)
+        self._copy_token_tags_to(structured_document, token_index, token_node)
+
+    def _get_lxml_skeleton_root_and_pages(self):
+        if self.lxml_skeleton is None:
+            return etree.Element('DOCUMENT'), None
+        root = etree.fromstring(self.lxml_skeleton)
+        pages = list(_iter_lxml_pages_lines_and_tokens(root))
+        if len(pages) != len(self.page_bounding_boxes):
+            raise ValueError('lxml skeleton does not match the pages: %d != %d' % (
+                len(pages), len(self.page_bounding_boxes)
+            ))
+        return root, pages
+
+    def to_lxml_root(self):
+        """
+        Converts to a pdftoxml like document (pages, lines and tokens).
+        A document created via from_lxml_root is restored as it was (including the other
+        elements and the formatting of unchanged numbers), with the current tags
+        and bounding boxes.
+        """
+        root, skeleton_pages = self._get_lxml_skeleton_root_and_pages()
+        structured_document = LxmlStructuredDocument(root)
+        for page in self.get_pages():
+            if skeleton_pages is not None:
+                page_node, line_nodes, token_nodes_by_line = skeleton_pages[page.index]
+            else:
+                page_node = etree.SubElement(root, 'PAGE')
+            self._copy_extra_attribs_to(ElementKinds.PAGE, page.index, page_node)
+            bounding_box = self.get_bounding_box(page)
+            if bounding_box is not None:
+                _set_bounding_box_attribs(
+                    page_node.attrib, bounding_box, names=('width', 'height')
+                )
+            self._sort_attrib_of(ElementKinds.PAGE, page.index, page_node)
+            for line_offset, line in enumerate(self.get_lines_of_page(page)):
+                if skeleton_pages is not None:
+                    line_node = line_nodes[line_offset]
+                    token_nodes = token_nodes_by_line[line_offset]
+                else:
+                    line_node = etree.SubElement(page_node, 'TEXT')
+                self._copy_extra_attribs_to(ElementKinds.LINE, line.index, line_node)
+                bounding_box = self.get_bounding_box(line)
+                if bounding_box is not None:
+                    _set_bounding_box_attribs(line_node.attrib, bounding_box)
+                self._sort_attrib_of(ElementKinds.LINE, line.index, line_node)
+                for token_offset, token in enumerate(self.get_tokens_of_line(line)):
+                    if skeleton_pages is not None:
+                        token_node = token_nodes[token_offset]
+                    else:
+                        token_node = etree.SubElement(line_node, 'TOKEN')
+                    token_node.text = self.get_text(token)
+                    self._copy_extra_attribs_to(ElementKinds.TOKEN, token.index, token_node)
+                    self._copy_lxml_token_properties_to(
+                        structured_document, token.index, token_node
+                    )
+                    self._sort_attrib_of(ElementKinds.TOKEN, token.index, token_node)
+        return root
+
+    def to_svg_roots(self):
+        page_roots = []
+        structured_document = SvgStructuredDocument(page_roots)
+        for page in self.get_pages():
+            page_root = etree.Element(SVG_DOC, nsmap=SVG_NSMAP)
+            page_roots.append(page_root)
+            bounding_box = self.get_bounding_box(page)
+            if bounding_box is not None:
+                page_root.attrib[SVG_VIEWBOX_ATTRIB] = format_bounding_box(bounding_box)
+            for line in self.get_lines_of_page(page):
+                line_node = etree.SubElement(page_root, SVG_G)
+                line_node.attrib['class'] = SvgStyleClasses.LINE
+                bounding_box = self.get_bounding_box(line)
+                if bounding_box is not None:
+                    structured_document.set_bounding_box(line_node, bounding_box)
+                for token in self.get_tokens_of_line(line):
+                    token_node = etree.SubElement(line_node, SVG_TEXT)
+                    token_node.text = self.get_text(token)
+                    bounding_box = self.get_bounding_box(token)
+                    if bounding_box is not None:
+                        token_node.attrib['x'] = str(bounding_box.x)
+                        token_node.attrib['y'] = str(bounding_box.y)
+                    self._copy_token_properties_to(
+                        structured_document, token.index, token_node
+                    )
+        return page_roots
+
+    def save_npz(self, fp):
+        """
+        Saves the columns to a compressed npz container (file or filename), see load_npz.
+        """
+        tag_keys = list(self.token_tag_ids_by_key.keys())
+        attrib_names_by_kind = {
+            kind: list(attrib_ids_by_name.keys())
+            for kind, attrib_ids_by_name in self.attrib_ids_by_name_by_kind.items()
+        }
+        attrib_names_kinds = list(self.attrib_names_ids_by_kind.keys())
+        meta = {
+            'version': NPZ_FORMAT_VERSION,
+            'tag_keys': tag_keys,
+            'attrib_names_by_kind': attrib_names_by_kind,
+            'attrib_names_kinds': attrib_names_kinds,
+            'has_lxml_skeleton': self.lxml_skeleton is not None,
+            'string_counts': [
+                len(self.text_table) - 1, len(self.tag_table) - 1, len(self.attrib_table) - 1
+            ]
+        }
+        arrays = {
+            'meta': _to_byte_array(json.dumps(meta).encode('utf-8')),
+            'page_bounding_boxes': self.page_bounding_boxes,
+            'line_page_indices': self.line_page_indices,
+            'line_bounding_boxes': self.line_bounding_boxes,
+            'token_line_indices': self.token_line_indices,
+            'token_text_ids': self.token_text_ids,
+            'token_bounding_boxes': self.token_bounding_boxes,
+            'token_font_sizes': self.token_font_sizes,
+            'text_table': _encode_string_table(self.text_table),
+            'tag_table': _encode_string_table(self.tag_table),
+            'attrib_table': _encode_string_table(self.attrib_table)
+        }
+        for i, key in enumerate(tag_keys):
+            arrays['token_tag_ids_%d' % i] = self.token_tag_ids_by_key[key]
+        for kind, names in attrib_names_by_kind.items():
+            for i, name in enumerate(names):
+                arrays['%s_attrib_ids_%d' % (kind, i)] = (
+                    self.attrib_ids_by_name_by_kind[kind][name]
+                )
+        for kind in attrib_names_kinds:
+            arrays['%s_attrib_names_ids' % kind] = self.attrib_names_ids_by_kind[kind]
+        if self.lxml_skeleton is not None:
+            arrays['lxml_skeleton'] = _to_byte_array(self.lxml_skeleton)
+        np.savez_compressed(fp, **arrays)
+
+    @staticmethod
+    def load_npz(fp):
+        with np.load(fp, allow_pickle=False) as data:
+            meta = json.loads(_from_byte_array(data['meta']).decode('utf-8'))
+            if meta['version'] != NPZ_FORMAT_VERSION:
+                raise ValueError('unsupported npz format version: %s' % meta['version'])
+            text_count, tag_count, attrib_count = meta['string_counts']
+            return ColumnarStructuredDocument(
+                page_bounding_boxes=data['page_bounding_boxes'],
+                line_page_indices=data['line_page_indices'],
+                line_bounding_boxes=data['line_bounding_boxes'],
+                token_line_indices=data['token_line_indices'],
+                token_text_ids=data['token_text_ids'],
+                text_table=_decode_string_table(data['text_table'], text_count),
+                token_bounding_boxes=data['token_bounding_boxes'],
+                token_font_sizes=data['token_font_sizes'],
+                token_tag_ids_by_key={
+                    tuple(key): data['token_tag_ids_%d' % i]
+                    for i, key in enumerate(meta['tag_keys'])
+                },
+                tag_table=_decode_string_table(data['tag_table'], tag_count),
+                attrib_ids_by_name_by_kind={
+                    kind: {
+                        name: data['%s_attrib_ids_%d' % (kind, i)]
+                        for i, name in enumerate(names)
+                    }
+                    for kind, names in meta['attrib_names_by_kind'].items()
+                },
+                attrib_table=_decode_string_table(data['attrib_table'], attrib_count),
+                attrib_names_ids_by_kind={
+                    kind: data['%s_attrib_names_ids' % kind]
+                    for kind in meta['attrib_names_kinds']
+                },
+                lxml_skeleton=(
+                    _from_byte_array(data['lxml_skeleton']) if meta['has_lxml_skeleton'] else None
+                )
+            )
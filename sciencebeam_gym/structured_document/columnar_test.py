@@ -0,0 +1,302 @@
+from __future__ import absolute_import
+
+from io import BytesIO
+
+from lxml import etree
+from lxml.builder import E, ElementMaker
+
+from sciencebeam_gym.utils.bounding_box import (
+    BoundingBox
+)
+
+from sciencebeam_gym.structured_document import (
+    SimpleStructuredDocument,
+    SimplePage,
+    SimpleLine,
+    SimpleToken
+)
+
+from sciencebeam_gym.structured_document.lxml import (
+    LxmlStructuredDocument
+)
+
+from sciencebeam_gym.structured_document.svg import (
+    SvgStructuredDocument,
+    SVG_NS,
+    SVG_VIEWBOX_ATTRIB
+)
+
+from sciencebeam_gym.structured_document.columnar import (
+    ColumnarStructuredDocument,
+    ColumnarToken
+)
+
+SVG_E = ElementMaker(namespace=SVG_NS)
+
+TAG_1 = 'tag1'
+TAG_2 = 'tag2'
+
+SCOPE_1 = 'scope1'
+
+TEXT_1 = 'text 1'
+TEXT_2 = 'text 2'
+TEXT_3 = 'text 3'
+
+BOUNDING_BOX_1 = BoundingBox(10, 20, 30, 40)
+BOUNDING_BOX_2 = BoundingBox(50, 60, 70, 80)
+
+
+def _get_all_texts(structured_document):
+    return [
+        structured_document.get_text(t)
+        for t in structured_document.iter_all_tokens()
+    ]
+
+
+def _get_all_tags(structured_document, scope=None, level=None):
+    return [
+        structured_document.get_tag(t, scope=scope, level=level)
+        for t in structured_document.iter_all_tokens()
+    ]
+
+
+def _create_simple_document():
+    return SimpleStructuredDocument([
+        SimplePage([
+            SimpleLine([
+                SimpleToken(TEXT_1, tag=TAG_1, bounding_box=BOUNDING_BOX_1),
+                SimpleToken(TEXT_2)
+            ])
+        ], bounding_box=BOUNDING_BOX_2),
+        SimplePage([
+            SimpleLine([SimpleToken(TEXT_3, tag=TAG_2, tag_scope=SCOPE_1)]),
+            SimpleLine([SimpleToken(TEXT_1, tag=TAG_1)])
+        ])
+    ])
+
+
+def _create_lxml_root():
+    return E.DOCUMENT(
+        E.PAGE(
+            E.TEXT(
+                E.TOKEN(
+                    TEXT_1, {'tag': TAG_1, 'level2_tag': TAG_2, 'font-size': '11.0'},
+                    x='10.0', y='20.0', width='30.0', height='40.0', bold='yes'
+                ),
+                E.TOKEN(TEXT_2, x='50.0', y='20.0', width='30.0', height='40.0'),
+                x='10.0', y='20.0', width='70.0', height='40.0', id='p1_t1'
+            ),
+            width='100.0', height='200.0', number='1'
+        ),
+        E.PAGE(
+            E.TEXT(
+                E.TOKEN(TEXT_3, x='1.0', y='2.0', width='3.0', height='4.0'),
+                x='1.0', y='2.0', width='3.0', height='4.0'
+            ),
+            width='100.0', height='200.0', number='2'
+        )
+    )
+
+
+PDFTOXML_LIKE_CONTENT = (
+    b'<DOCUMENT>\n'
+    b'  <METADATA><TITLE>some title</TITLE></METADATA>\n'
+    b'  <PAGE width="595.276" height="841.89" number="1" id="p1">\n'
+    b'    <IMAGE id="p1_i1" x="0" y="0" width="10" height="10"/>\n'
+    b'    <BLOCK id="p1_b1">\n'
+    b'      <TEXT width="86.4563" height="11" id="p1_t1" x="56.6929" y="1">\n'
+    b'        <TOKEN sid="p1_s1" font-size="10" tag="tag1" bold="no" x="56.6929" y="1"'
+    b' width="20.123456789012345" height="11">text 1</TOKEN>\n'
+    b'        <TOKEN sid="p1_s2" font-size="10.0" x="80" y="1.0" width="30" height="11"'
+    b'>text 2</TOKEN>\n'
+    b'      </TEXT>\n'
+    b'    </BLOCK>\n'
+    b'    <TEXT x="1" y="20" width="3" height="4"><TOKEN x="1" y="20" width="3" height="4"'
+    b'>text 3</TOKEN></TEXT>\n'
+    b'  </PAGE>\n'
+    b'  <PAGE width="595.276" height="841.89" number="2"/>\n'
+    b'</DOCUMENT>'
+)
+
+
+def _to_canonical_xml(root):
+    return etree.tostring(root, method='c14n')
+
+
+class TestColumnarStructuredDocument(object):
+    def test_should_convert_pages_lines_and_tokens_of_simple_document(self):
+        doc = ColumnarStructuredDocument.from_structured_document(
+            _create_simple_document()
+        )
+        pages = doc.get_pages()
+        assert len(pages) == 2
+        assert [len(doc.get_lines_of_page(page)) for page in pages] == [1, 2]
+        assert _get_all_texts(doc) == [TEXT_1, TEXT_2, TEXT_3, TEXT_1]
+        assert doc.get_bounding_box(pages[0]) == BOUNDING_BOX_2
+        assert doc.get_bounding_box(pages[1]) is None
+
+    def test_should_convert_tags_and_bounding_boxes_of_simple_document(self):
+        doc = ColumnarStructuredDocument.from_structured_document(
+            _create_simple_document()
+        )
+        tokens = list(doc.iter_all_tokens())
+        assert _get_all_tags(doc) == [TAG_1, None, None, TAG_1]
+        assert _get_all_tags(doc, scope=SCOPE_1) == [None, None, TAG_2, None]
+        assert doc.get_tag_by_scope(tokens[2]) == {SCOPE_1: TAG_2}
+        assert doc.get_bounding_box(tokens[0]) == BOUNDING_BOX_1
+        assert doc.get_bounding_box(tokens[1]) is None
+
+    def test_should_intern_texts_and_tags(self):
+        doc = ColumnarStructuredDocument.from_structured_document(
+            _create_simple_document()
+        )
+        assert len(doc.text_table) == 1 + 3
+        assert len(doc.tag_table) == 1 + 2
+
+    def test_should_set_tag_and_bounding_box(self):
+        doc = ColumnarStructuredDocument.from_structured_document(
+            _create_simple_document()
+        )
+        token = ColumnarToken(1)
+        doc.set_tag(token, TAG_2)
+        doc.set_sub_tag(token, TAG_1, scope=SCOPE_1)
+        doc.set_bounding_box(token, BOUNDING_BOX_2)
+        assert doc.get_tag(token) == TAG_2
+        assert doc.get_sub_tag(token, scope=SCOPE_1) == TAG_1
+        assert doc.get_bounding_box(token) == BOUNDING_BOX_2
+
+    def test_should_not_change_original_when_changing_clone(self):
+        doc = ColumnarStructuredDocument.from_structured_document(
+            _create_simple_document()
+        )
+        cloned_doc = doc.clone()
+        cloned_doc.set_tag(ColumnarToken(0), TAG_2)
+        assert doc.get_tag(ColumnarToken(0)) == TAG_1
+        assert cloned_doc.get_tag(ColumnarToken(0)) == TAG_2
+
+    def test_should_provide_vectorised_access_to_tokens_of_page(self):
+        doc = ColumnarStructuredDocument.from_structured_document(
+            _create_simple_document()
+        )
+        page = doc.get_pages()[1]
+        assert doc.get_token_texts(page=page) == [TEXT_3, TEXT_1]
+        assert doc.get_token_bounding_boxes(page=page).shape == (2, 4)
+        tag_ids = doc.get_token_tag_ids(page=page)
+        assert [doc.tag_table[tag_id] for tag_id in tag_ids] == [None, TAG_1]
+        tag_ids[:] = doc.tag_table.get_id(TAG_2)
+        assert _get_all_tags(doc) == [TAG_1, None, TAG_2, TAG_2]
+
+    def test_should_copy_tags_to_original_document(self):
+        original_doc = _create_simple_document()
+        doc = ColumnarStructuredDocument.from_structured_document(original_doc)
+        doc.set_tag(ColumnarToken(0), None)
+        doc.set_tag(ColumnarToken(1), TAG_2)
+        doc.copy_tags_to(original_doc)
+        assert _get_all_tags(original_doc) == [None, TAG_2, None, TAG_1]
+        assert _get_all_tags(original_doc, scope=SCOPE_1) == [None, None, TAG_2, None]
+
+    def test_should_convert_from_and_to_lxml(self):
+        doc = ColumnarStructuredDocument.from_lxml_root(_create_lxml_root())
+        tokens = list(doc.iter_all_tokens())
+        assert doc.get_font_size(tokens[0]) == 11.0
+        assert doc.get_sub_tag(tokens[0]) == TAG_2
+
+        lxml_doc = LxmlStructuredDocument(doc.to_lxml_root())
+        lxml_tokens = list(lxml_doc.iter_all_tokens())
+        assert _get_all_texts(lxml_doc) == [TEXT_1, TEXT_2, TEXT_3]
+        assert _get_all_tags(lxml_doc) == [TAG_1, None, None]
+        assert lxml_doc.get_sub_tag(lxml_tokens[0]) == TAG_2
+        assert lxml_doc.get_bounding_box(lxml_tokens[0]) == BOUNDING_BOX_1
+        assert lxml_tokens[0].attrib['font-size'] == '11.0'
+        assert lxml_doc.get_bounding_box(lxml_doc.get_pages()[0]) == BoundingBox(0, 0, 100, 200)
+        assert _to_canonical_xml(lxml_doc.root) == _to_canonical_xml(_create_lxml_root())
+        assert (
+            ColumnarStructuredDocument.from_lxml_root(lxml_doc.root).get_token_texts() ==
+            doc.get_token_texts()
+        )
+
+    def test_should_convert_from_and_to_svg(self):
+        page_root = SVG_E.svg(
+            SVG_E.g(
+                SVG_E.text(TEXT_1, {'class': TAG_1, 'x': '10', 'y': '20', 'font-size': '10'}),
+                SVG_E.text(TEXT_2, {'x': '30', 'y': '20', 'font-size': '10'}),
+                {'class': 'line'}
+            ),
+            {SVG_VIEWBOX_ATTRIB: '0 0 100 200'}
+        )
+        original_doc = SvgStructuredDocument(page_root)
+        doc = ColumnarStructuredDocument.from_svg_roots([page_root])
+        svg_doc = SvgStructuredDocument(doc.to_svg_roots())
+        assert _get_all_texts(svg_doc) == [TEXT_1, TEXT_2]
+        assert _get_all_tags(svg_doc) == [TAG_1, None]
+        assert [svg_doc.get_bounding_box(t) for t in svg_doc.iter_all_tokens()] == [
+            original_doc.get_bounding_box(t) for t in original_doc.iter_all_tokens()
+        ]
+        assert svg_doc.get_bounding_box(svg_doc.get_pages()[0]) == BoundingBox(0, 0, 100, 200)
+
+    def test_should_select_pages_using_slice_pages(self):
+        doc = ColumnarStructuredDocument.from_lxml_root(_create_lxml_root())
+        doc.set_tag(ColumnarToken(2), TAG_2)
+        sliced_doc = doc.slice_pages(1, 2)
+        assert len(sliced_doc.get_pages()) == 1
+        assert _get_all_texts(sliced_doc) == [TEXT_3]
+        assert _get_all_tags(sliced_doc) == [TAG_2]
+        assert sliced_doc.to_lxml_root().find('PAGE').attrib['number'] == '2'
+
+
+class TestColumnarStructuredDocumentNpz(object):
+    def test_should_save_and_load_lxml_document_without_loss(self):
+        doc = ColumnarStructuredDocument.from_lxml_root(_create_lxml_root())
+        out = BytesIO()
+        doc.save_npz(out)
+        loaded_doc = ColumnarStructuredDocument.load_npz(BytesIO(out.getvalue()))
+        assert (
+            _to_canonical_xml(loaded_doc.to_lxml_root()) ==
+            _to_canonical_xml(_create_lxml_root())
+        )
+
+    def test_should_save_and_load_pdftoxml_like_document_without_any_change(self):
+        doc = ColumnarStructuredDocument.from_lxml_root(etree.fromstring(PDFTOXML_LIKE_CONTENT))
+        out = BytesIO()
+        doc.save_npz(out)
+        loaded_doc = ColumnarStructuredDocument.load_npz(BytesIO(out.getvalue()))
+        assert etree.tostring(loaded_doc.to_lxml_root()) == PDFTOXML_LIKE_CONTENT
+
+    def test_should_only_reformat_changed_bounding_box_and_keep_blocks(self):
+        doc = ColumnarStructuredDocument.from_lxml_root(etree.fromstring(PDFTOXML_LIKE_CONTENT))
+        doc.set_tag(ColumnarToken(1), TAG_2)
+        doc.set_bounding_box(ColumnarToken(1), BoundingBox(80, 1, 31.5, 11))
+        root = doc.to_lxml_root()
+        token_nodes = root.findall('.//TOKEN')
+        assert [token_nodes[1].attrib[k] for k in ['x', 'y', 'width', 'height', 'tag']] == [
+            '80', '1.0', '31.5', '11', TAG_2
+        ]
+        assert token_nodes[0].attrib['width'] == '20.123456789012345'
+        assert root.find('METADATA/TITLE').text == 'some title'
+        assert root.find('PAGE/BLOCK').attrib['id'] == 'p1_b1'
+        assert len(root.findall('PAGE/BLOCK/TEXT')) == 1
+
+    def test_should_keep_other_elements_of_selected_pages(self):
+        doc = ColumnarStructuredDocument.from_lxml_root(etree.fromstring(PDFTOXML_LIKE_CONTENT))
+        out = BytesIO()
+        doc.slice_pages(1, 2).save_npz(out)
+        loaded_doc = ColumnarStructuredDocument.load_npz(BytesIO(out.getvalue()))
+        root = loaded_doc.to_lxml_root()
+        assert [page.attrib['number'] for page in root.findall('PAGE')] == ['2']
+        assert root.find('METADATA/TITLE').text == 'some title'
+
+    def test_should_save_and_load_empty_document(self):
+        doc = ColumnarStructuredDocument.from_lxml_root(E.DOCUMENT())
+        out = BytesIO()
+        doc.save_npz(out)
+        loaded_doc = ColumnarStructuredDocument.load_npz(BytesIO(out.getvalue()))
+        assert loaded_doc.get_pages() == []
+
+    def test_should_save_and_load_empty_texts(self):
+        doc = ColumnarStructuredDocument.from_structured_document(SimpleStructuredDocument(
+            lines=[SimpleLine([SimpleToken(''), SimpleToken(TEXT_1), SimpleToken(None)])]
+        ))
+        out = BytesIO()
+        doc.save_npz(out)
+        loaded_doc = ColumnarStructuredDocument.load_npz(BytesIO(out.getvalue()))
+        assert _get_all_texts(loaded_doc) == ['', TEXT_1, None]
@@ -1,3 +1,6 @@
+from lxml import etree
+from lxml.builder import E
+
 from sciencebeam_utils.utils.xml import (
     set_or_remove_attrib
 )
@@ -14,6 +17,39 @@ from sciencebeam_gym.structured_document import (
 
 TAG_ATTRIB_NAME = 'tag'
 
+INDEX_ATTRIBUTE_NAMES = ['_pages', '_lines_by_page', '_tokens_by_line', '_bounding_box_by_node']
+
+
+def _remove_node(node):
+    parent = node.getparent()
+    if parent is not None:
+        parent.remove(node)
+
+
+def parse_lxml_root(source, page_range=None):
+    """
+    Parses the pdftoxml document (file or filename).
+    With a page range, only the pages within the range are kept (wrapped in a new DOCUMENT),
+    pages before the range are discarded as they are parsed
+    and parsing stops after the last page of the range.
+    """
+    if not page_range:
+        return etree.parse(source).getroot()
+    first_page_number = max(1, page_range[0])
+    last_page_number = page_range[1]
+    pages = []
+    page_number = 0
+    for _, node in etree.iterparse(source, tag='PAGE'):
+        page_number += 1
+        if page_number < first_page_number:
+            node.clear()
+            _remove_node(node)
+            continue
+        pages.append(node)
+        if page_number >= last_page_number:
+            break
+    return E.DOCUMENT(*pages)
+
 
 def get_node_bounding_box(t):
     return BoundingBox(
@@ -31,15 +67,43 @@ def _get_tag_attrib_name(scope, level):
 class LxmlStructuredDocument(AbstractStructuredDocument):
     def __init__(self, root):
         self.root = root
+        self.invalidate_index()
+
+    def invalidate_index(self):
+        self._pages = None
+        self._lines_by_page = {}
+        self._tokens_by_line = {}
+        self._bounding_box_by_node = {}
+
+    def __getstate__(self):
+        # the index refers to the elements and isn't copied (see clone)
+        state = self.__dict__.copy()
+        for key in INDEX_ATTRIBUTE_NAMES:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.invalidate_index()
 
     def get_pages(self):
-        return self.root.findall('.//PAGE')
+        if self._pages is None:
+            self._pages = self.root.findall('.//PAGE')
+        return self._pages
 
     def get_lines_of_page(self, page):
-        return page.findall('.//TEXT')
+        lines = self._lines_by_page.get(page)
+        if lines is None:
+            lines = page.findall('.//TEXT')
+            self._lines_by_page[page] = lines
+        return lines
 
     def get_tokens_of_line(self, line):
-        return line.findall('./TOKEN')
+        tokens = self._tokens_by_line.get(line)
+        if tokens is None:
+            tokens = line.findall('./TOKEN')
+            self._tokens_by_line[line] = tokens
+        return tokens
 
     def get_x(self, parent):
         return parent.attrib.get('x')
@@ -57,10 +121,16 @@ class LxmlStructuredDocument(AbstractStructuredDocument):
         return get_attrib_by_scope(parent.attrib, TAG_ATTRIB_NAME)
 
     def get_bounding_box(self, parent):
-        return get_node_bounding_box(parent)
+        try:
+            return self._bounding_box_by_node[parent]
+        except KeyError:
+            bounding_box = get_node_bounding_box(parent)
+            self._bounding_box_by_node[parent] = bounding_box
+            return bounding_box
 
     def set_bounding_box(self, parent, bounding_box):
         parent.attrib['x'] = str(bounding_box.x)
         parent.attrib['y'] = str(bounding_box.y)
         parent.attrib['width'] = str(bounding_box.width)
         parent.attrib['height'] = str(bounding_box.height)
+        self._bounding_box_by_node[parent] = bounding_box
@@ -1,5 +1,8 @@
 from __future__ import absolute_import
 
+from io import BytesIO
+
+from lxml import etree
 from lxml.builder import E
 
 from sciencebeam_gym.utils.bounding_box import (
@@ -7,7 +10,8 @@ from sciencebeam_gym.utils.bounding_box import (
 )
 
 from sciencebeam_gym.structured_document.lxml import (
-    LxmlStructuredDocument
+    LxmlStructuredDocument,
+    parse_lxml_root
 )
 
 TAG_1 = 'tag1'
@@ -16,6 +20,31 @@ TAG_2 = 'tag2'
 SCOPE_1 = 'scope1'
 
 
+def _get_lxml_content_with_pages(page_texts):
+    return etree.tostring(E.DOCUMENT(*[E.PAGE(text) for text in page_texts]))
+
+
+class TestParseLxmlRoot(object):
+    def test_should_parse_all_pages_without_page_range(self):
+        root = parse_lxml_root(BytesIO(_get_lxml_content_with_pages(['page 1', 'page 2'])))
+        assert [page.text for page in root.findall('PAGE')] == ['page 1', 'page 2']
+
+    def test_should_only_keep_pages_within_page_range(self):
+        root = parse_lxml_root(
+            BytesIO(_get_lxml_content_with_pages(['page 1', 'page 2', 'page 3', 'page 4'])),
+            page_range=(2, 3)
+        )
+        assert [page.text for page in root.findall('PAGE')] == ['page 2', 'page 3']
+
+    def test_should_stop_parsing_after_last_page_of_page_range(self):
+        lxml_content = (
+            b'<DOCUMENT><PAGE>page 1</PAGE><PAGE>page 2</PAGE><PAGE>page 3</PAGE>'
+            b'<PAGE>invalid</INVALID>'
+        )
+        root = parse_lxml_root(BytesIO(lxml_content), page_range=(1, 2))
+        assert [page.text for page in root.findall('PAGE')] == ['page 1', 'page 2']
+
+
 class TestLxmlStructuredDocument(object):
     def test_should_find_pages(self):
         pages = [
@@ -79,6 +108,31 @@ class TestLxmlStructuredDocument(object):
         )
         assert list(doc.get_tokens_of_line(line)) == tokens
 
+    def test_should_only_find_new_pages_after_invalidating_index(self):
+        root = E.DOCUMENT(E.PAGE())
+        doc = LxmlStructuredDocument(root)
+        assert len(doc.get_pages()) == 1
+        root.append(E.PAGE())
+        assert len(doc.get_pages()) == 1
+        doc.invalidate_index()
+        assert len(doc.get_pages()) == 2
+
+    def test_should_return_updated_bounding_box_after_setting_it(self):
+        token = E.TOKEN(x='10', y='11', width='100', height='101')
+        doc = LxmlStructuredDocument(E.DOCUMENT(E.PAGE(E.TEXT(token))))
+        assert doc.get_bounding_box(token) == BoundingBox(10, 11, 100, 101)
+        doc.set_bounding_box(token, BoundingBox(20, 21, 200, 201))
+        assert doc.get_bounding_box(token) == BoundingBox(20, 21, 200, 201)
+
+    def test_should_find_tokens_of_cloned_document(self):
+        doc = LxmlStructuredDocument(E.DOCUMENT(E.PAGE(E.TEXT(E.TOKEN()))))
+        assert len(list(doc.iter_all_tokens())) == 1
+        cloned_doc = doc.clone()
+        cloned_token = list(cloned_doc.iter_all_tokens())[0]
+        cloned_doc.set_tag(cloned_token, TAG_1)
+        assert cloned_token.getroottree().getroot() == cloned_doc.root
+        assert doc.get_tag(list(doc.iter_all_tokens())[0]) is None
+
     def test_should_calculate_default_bounding_box(self):
         token = E.TOKEN({
             'x': '10',
@@ -1,54 +1,72 @@
 from __future__ import absolute_import
 
+from io import BytesIO
+
 from lxml import etree
-from lxml.builder import E
 
 from apache_beam.io.filesystems import FileSystems
 
 from sciencebeam_gym.utils.pages_zip import (
-    load_pages
+    get_page_loaders
 )
 
 from sciencebeam_gym.structured_document.lxml import (
-    LxmlStructuredDocument
+    LxmlStructuredDocument,
+    parse_lxml_root
 )
 
 from sciencebeam_gym.structured_document.svg import (
-    SvgStructuredDocument
+    SvgStructuredDocument,
+    LazyPageList
+)
+
+from sciencebeam_gym.structured_document.columnar import (
+    ColumnarStructuredDocument,
+    COLUMNAR_EXT
 )
 
 
 class StructuredDocumentType(object):
     LXML = 'lxml'
     SVG_PAGES = 'svg-pages'
+    COLUMNAR = 'columnar'
 
 
 def get_structuctured_document_type(filename):
     if filename.endswith('.zip'):
         return StructuredDocumentType.SVG_PAGES
+    if filename.endswith(COLUMNAR_EXT):
+        return StructuredDocumentType.COLUMNAR
     return StructuredDocumentType.LXML
 
 
 def load_lxml_structured_document(filename, page_range=None):
     with FileSystems.open(filename) as f:
-        structured_document = LxmlStructuredDocument(etree.parse(f).getroot())
-        if page_range:
-            structured_document = LxmlStructuredDocument(
-                E.DOCUMENT(
-                    *structured_document.get_pages()[
-                        max(0, page_range[0] - 1):
-                        page_range[1]
-                    ]
-                )
-            )
-        return structured_document
-
-
-def load_svg_pages_structured_document(filename, page_range=None):
-    return SvgStructuredDocument([
-        etree.parse(svg_f).getroot()
-        for svg_f in load_pages(filename, page_range=page_range)
-    ])
+        return LxmlStructuredDocument(parse_lxml_root(f, page_range=page_range))
+
+
+def _parse_svg_page_root(svg_f):
+    return etree.parse(svg_f).getroot()
+
+
+def load_svg_pages_structured_document(filename, page_range=None, max_resident_pages=None):
+    """
+    Pages are parsed on first access (see LazyPageList for max_resident_pages).
+    """
+    return SvgStructuredDocument(LazyPageList(
+        get_page_loaders(filename, _parse_svg_page_root, page_range=page_range),
+        max_resident_pages=max_resident_pages
+    ))
+
+
+def load_columnar_structured_document(filename, page_range=None):
+    with FileSystems.open(filename) as f:
+        structured_document = ColumnarStructuredDocument.load_npz(BytesIO(f.read()))
+    if page_range:
+        structured_document = structured_document.slice_pages(
+            max(0, page_range[0] - 1), page_range[1]
+        )
+    return structured_document
 
 
 def load_structured_document(filename, page_range=None):
@@ -57,6 +75,8 @@ def load_structured_document(filename, page_range=None):
         return load_lxml_structured_document(filename, page_range=page_range)
     if structured_document_type == StructuredDocumentType.SVG_PAGES:
         return load_svg_pages_structured_document(filename, page_range=page_range)
+    if structured_document_type == StructuredDocumentType.COLUMNAR:
+        return load_columnar_structured_document(filename, page_range=page_range)
     raise RuntimeError('unsupported structured_document_type: %s (%s)' % (
         structured_document_type, filename
     ))
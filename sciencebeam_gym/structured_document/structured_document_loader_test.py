@@ -84,6 +84,23 @@ class TestLoadSvgPagesStructuredDocument(object):
                 ['page 2', 'page 3']
             )
 
+    def test_should_select_page_range_by_page_name(self):
+        with NamedTemporaryFile() as f:
+            with ZipFile(f, 'w') as zf:
+                for page_number in [10, 2, 1, 3]:
+                    zf.writestr(
+                        'page-%d.svg' % page_number,
+                        etree.tostring(E.svg('page %d' % page_number))
+                    )
+            f.flush()
+            structured_document = load_svg_pages_structured_document(
+                f.name, page_range=(2, 3), max_resident_pages=1
+            )
+            assert (
+                [x.text for x in structured_document.page_roots] ==
+                ['page 2', 'page 3']
+            )
+
 
 class TestGetStructuredDocumentType(object):
     def test_should_return_lxml_for_lxml_file(self):
@@ -95,6 +112,9 @@ class TestGetStructuredDocumentType(object):
     def test_should_return_lxml_for_svg_zip_file(self):
         assert get_structuctured_document_type('file.svg.zip') == StructuredDocumentType.SVG_PAGES
 
+    def test_should_return_columnar_for_npz_file(self):
+        assert get_structuctured_document_type('file.npz') == StructuredDocumentType.COLUMNAR
+
 
 class TestLoadStructuredDocument(object):
     def test_should_call_load_plain_file_list_if_file(self):
@@ -1,5 +1,7 @@
 from __future__ import absolute_import
 
+from io import BytesIO
+
 from lxml import etree
 
 from sciencebeam_utils.beam_utils.io import (
@@ -18,6 +20,15 @@ from sciencebeam_gym.structured_document.svg import (
     SvgStructuredDocument
 )
 
+from sciencebeam_gym.structured_document.tag_overlay import (
+    TagOverlayStructuredDocument
+)
+
+from sciencebeam_gym.structured_document.columnar import (
+    ColumnarStructuredDocument,
+    COLUMNAR_EXT
+)
+
 
 def save_lxml_structured_document(filename, lxml_structured_document):
     save_file_content(filename, etree.tostring(lxml_structured_document.root))
@@ -30,7 +41,23 @@ def save_svg_structured_document(filename, svg_structured_document):
     ))
 
 
+def save_columnar_structured_document(filename, structured_document):
+    if isinstance(structured_document, LxmlStructuredDocument):
+        structured_document = ColumnarStructuredDocument.from_lxml_root(structured_document.root)
+    elif not isinstance(structured_document, ColumnarStructuredDocument):
+        structured_document = ColumnarStructuredDocument.from_structured_document(
+            structured_document
+        )
+    out = BytesIO()
+    structured_document.save_npz(out)
+    save_file_content(filename, out.getvalue())
+
+
 def save_structured_document(filename, structured_document):
+    if isinstance(structured_document, TagOverlayStructuredDocument):
+        structured_document = structured_document.flush()
+    if filename.endswith(COLUMNAR_EXT):
+        return save_columnar_structured_document(filename, structured_document)
     if isinstance(structured_document, LxmlStructuredDocument):
         return save_lxml_structured_document(filename, structured_document)
     if isinstance(structured_document, SvgStructuredDocument):
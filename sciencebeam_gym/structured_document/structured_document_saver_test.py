@@ -16,9 +16,14 @@ import sciencebeam_gym.structured_document.structured_document_saver as structur
 from sciencebeam_gym.structured_document.structured_document_saver import (
     save_lxml_structured_document,
     save_svg_structured_document,
+    save_columnar_structured_document,
     save_structured_document
 )
 
+from sciencebeam_gym.structured_document.structured_document_loader import (
+    load_structured_document
+)
+
 FILE_1 = 'file1'
 
 
@@ -44,6 +49,23 @@ class TestSaveSvgStructuredDocument(object):
                 assert list(args[2]) == [etree.tostring(root)]
 
 
+class TestSaveColumnarStructuredDocument(object):
+    def test_should_save_lxml_structured_document_that_can_be_loaded(self, tmpdir):
+        filename = str(tmpdir.join('file.npz'))
+        root = E.DOCUMENT(E.PAGE(
+            E.TEXT(
+                E.TOKEN('token 1', {'tag': 'tag1'}, x='10.5', y='11', width='12', height='13'),
+                x='10.5', y='11', width='12', height='13'
+            ),
+            width='100', height='200'
+        ))
+        save_columnar_structured_document(filename, LxmlStructuredDocument(root))
+        structured_document = load_structured_document(filename)
+        tokens = list(structured_document.iter_all_tokens())
+        assert [structured_document.get_text(t) for t in tokens] == ['token 1']
+        assert [structured_document.get_tag(t) for t in tokens] == ['tag1']
+
+
 class TestSaveStructuredDocument(object):
     def test_should_call_save_lxml_structured_document(self):
         structured_document = LxmlStructuredDocument(E.DOCUMENT)
@@ -58,3 +80,10 @@ class TestSaveStructuredDocument(object):
         with patch.object(m, 'save_svg_structured_document') as save_svg_structured_document_mock:
             save_structured_document(FILE_1, structured_document)
             save_svg_structured_document_mock.assert_called_with(FILE_1, structured_document)
+
+    def test_should_call_save_columnar_structured_document_for_npz_file(self):
+        structured_document = LxmlStructuredDocument(E.DOCUMENT)
+        m = structured_document_saver
+        with patch.object(m, 'save_columnar_structured_document') as mock:
+            save_structured_document('file.npz', structured_document)
+            mock.assert_called_with('file.npz', structured_document)
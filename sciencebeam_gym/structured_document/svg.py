@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 from sciencebeam_utils.utils.xml import (
     set_or_remove_attrib
 )
@@ -29,6 +31,8 @@ SVGE_BOUNDING_BOX = SVGE_NS_PREFIX + 'bounding-box'
 
 SCOPED_TAG_ATTRIB_SUFFIX = 'tag'
 
+INDEX_ATTRIBUTE_NAMES = ['_lines_by_page', '_tokens_by_line', '_bounding_box_by_node']
+
 SVG_NSMAP = {
     None: SVG_NS,
     'svge': SVGE_NS
@@ -41,6 +45,10 @@ class SvgStyleClasses(object):
     LINE_NO = 'line_no'
 
 
+SVG_LINE_XPATH = './/{}[@class="{}"]'.format(SVG_G, SvgStyleClasses.LINE)
+SVG_TOKEN_XPATH = './{}'.format(SVG_TEXT)
+
+
 def format_bounding_box(bounding_box):
     return '%s %s %s %s' % (bounding_box.x, bounding_box.y, bounding_box.width, bounding_box.height)
 
@@ -78,21 +86,114 @@ def _get_tag_attrib_name(scope, level):
     )
 
 
+class LazyPageList(object):
+    """
+    List like sequence of page roots, loading each page on first access
+    (each page loader is a function returning the page root).
+
+    If max_resident_pages is set, the least recently accessed pages are unloaded
+    and reloaded when accessed again. Changes to unloaded pages (e.g. tags) are lost,
+    i.e. that is only suitable for documents that are just read.
+    """
+
+    def __init__(self, page_loaders, max_resident_pages=None):
+        self.page_loaders = page_loaders
+        self.max_resident_pages = max_resident_pages
+        self._page_by_index = OrderedDict()
+        self._unload_listeners = []
+
+    def add_unload_listener(self, listener):
+        self._unload_listeners.append(listener)
+
+    def get_resident_page_count(self):
+        return len(self._page_by_index)
+
+    def _get_page(self, index):
+        page = self._page_by_index.pop(index, None)
+        if page is None:
+            page = self.page_loaders[index]()
+        self._page_by_index[index] = page
+        if self.max_resident_pages and len(self._page_by_index) > self.max_resident_pages:
+            _, unloaded_page = self._page_by_index.popitem(last=False)
+            for listener in self._unload_listeners:
+                listener(unloaded_page)
+        return page
+
+    def __len__(self):
+        return len(self.page_loaders)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._get_page(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('page index out of range: %s' % index)
+        return self._get_page(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._get_page(index)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_unload_listeners'] = []
+        return state
+
+
 class SvgStructuredDocument(AbstractStructuredDocument):
     def __init__(self, root_or_roots):
-        if isinstance(root_or_roots, list):
+        if isinstance(root_or_roots, (list, LazyPageList)):
             self.page_roots = root_or_roots
         else:
             self.page_roots = [root_or_roots]
+        self.invalidate_index()
+        self._add_page_unload_listener()
+
+    def _add_page_unload_listener(self):
+        if isinstance(self.page_roots, LazyPageList):
+            self.page_roots.add_unload_listener(self._remove_page_from_index)
+
+    def _remove_page_from_index(self, page):
+        for line in self._lines_by_page.pop(page, []):
+            for token in self._tokens_by_line.pop(line, []):
+                self._bounding_box_by_node.pop(token, None)
+            self._bounding_box_by_node.pop(line, None)
+        self._bounding_box_by_node.pop(page, None)
+
+    def invalidate_index(self):
+        self._lines_by_page = {}
+        self._tokens_by_line = {}
+        self._bounding_box_by_node = {}
+
+    def __getstate__(self):
+        # the index refers to the elements and isn't copied (see clone)
+        state = self.__dict__.copy()
+        for key in INDEX_ATTRIBUTE_NAMES:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.invalidate_index()
+        self._add_page_unload_listener()
 
     def get_pages(self):
         return self.page_roots
 
     def get_lines_of_page(self, page):
-        return page.findall('.//{}[@class="{}"]'.format(SVG_G, SvgStyleClasses.LINE))
+        lines = self._lines_by_page.get(page)
+        if lines is None:
+            lines = page.findall(SVG_LINE_XPATH)
+            self._lines_by_page[page] = lines
+        return lines
 
     def get_tokens_of_line(self, line):
-        return line.findall('./{}'.format(SVG_TEXT))
+        tokens = self._tokens_by_line.get(line)
+        if tokens is None:
+            tokens = line.findall(SVG_TOKEN_XPATH)
+            self._tokens_by_line[line] = tokens
+        return tokens
 
     def get_x(self, parent):
         return parent.attrib.get('x')
@@ -118,7 +219,13 @@ class SvgStructuredDocument(AbstractStructuredDocument):
         return d
 
     def get_bounding_box(self, parent):
-        return get_node_bounding_box(parent)
+        try:
+            return self._bounding_box_by_node[parent]
+        except KeyError:
+            bounding_box = get_node_bounding_box(parent)
+            self._bounding_box_by_node[parent] = bounding_box
+            return bounding_box
 
     def set_bounding_box(self, parent, bounding_box):
         parent.attrib[SVGE_BOUNDING_BOX] = format_bounding_box(bounding_box)
+        self._bounding_box_by_node[parent] = bounding_box
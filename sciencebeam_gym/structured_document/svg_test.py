@@ -9,6 +9,7 @@ from sciencebeam_gym.utils.bounding_box import (
 from sciencebeam_gym.structured_document.svg import (
     SvgStructuredDocument,
     SvgStyleClasses,
+    LazyPageList,
     SVG_NS,
     SVG_VIEWBOX_ATTRIB,
     SVGE_BOUNDING_BOX,
@@ -26,7 +27,56 @@ TAG_2 = 'tag2'
 SCOPE_1 = 'scope1'
 
 
+def _create_page_loader(text, loaded_texts):
+    def load_page():
+        loaded_texts.append(text)
+        return E.svg(SVG_TEXT_LINE(SVG_TEXT(text)))
+    return load_page
+
+
+class TestLazyPageList(object):
+    def test_should_load_pages_on_first_access(self):
+        loaded_texts = []
+        pages = LazyPageList([
+            _create_page_loader('page 1', loaded_texts),
+            _create_page_loader('page 2', loaded_texts)
+        ])
+        assert len(pages) == 2
+        assert loaded_texts == []
+        page = pages[1]
+        assert pages[-1] is page
+        assert loaded_texts == ['page 2']
+        assert [p.findtext('.//{%s}text' % SVG_NS) for p in pages] == ['page 1', 'page 2']
+        assert loaded_texts == ['page 2', 'page 1']
+
+    def test_should_unload_least_recently_accessed_pages(self):
+        loaded_texts = []
+        pages = LazyPageList([
+            _create_page_loader('page 1', loaded_texts),
+            _create_page_loader('page 2', loaded_texts)
+        ], max_resident_pages=1)
+        unloaded_pages = []
+        pages.add_unload_listener(unloaded_pages.append)
+        page = pages[0]
+        assert pages[0] is page
+        assert pages[1] is not page
+        assert pages.get_resident_page_count() == 1
+        assert unloaded_pages == [page]
+        assert pages[0] is not page
+        assert loaded_texts == ['page 1', 'page 2', 'page 1']
+
+
 class TestSvgStructuredDocument(object):
+    def test_should_find_tokens_of_lazy_pages(self):
+        loaded_texts = []
+        doc = SvgStructuredDocument(LazyPageList([
+            _create_page_loader('page 1', loaded_texts),
+            _create_page_loader('page 2', loaded_texts)
+        ], max_resident_pages=1))
+        for _ in range(2):
+            assert [doc.get_text(t) for t in doc.iter_all_tokens()] == ['page 1', 'page 2']
+        assert len(doc.clone().get_pages()) == 2
+
     def test_should_return_root_as_pages(self):
         root = E.svg()
         doc = SvgStructuredDocument(root)
@@ -74,6 +124,25 @@ class TestSvgStructuredDocument(object):
         )
         assert list(doc.get_tokens_of_line(line)) == tokens
 
+    def test_should_only_find_new_lines_after_invalidating_index(self):
+        page = E.svg(SVG_TEXT_LINE(SVG_TEXT()))
+        doc = SvgStructuredDocument(page)
+        assert len(doc.get_lines_of_page(page)) == 1
+        page.append(SVG_TEXT_LINE(SVG_TEXT()))
+        assert len(doc.get_lines_of_page(page)) == 1
+        doc.invalidate_index()
+        assert len(doc.get_lines_of_page(page)) == 2
+
+    def test_should_find_tokens_of_cloned_document(self):
+        page = E.svg(SVG_TEXT_LINE(SVG_TEXT()))
+        doc = SvgStructuredDocument(page)
+        assert len(list(doc.iter_all_tokens())) == 1
+        cloned_doc = doc.clone()
+        cloned_token = list(cloned_doc.iter_all_tokens())[0]
+        cloned_doc.set_tag(cloned_token, TAG_1)
+        assert cloned_token.getroottree().getroot() == cloned_doc.get_pages()[0]
+        assert doc.get_tag(list(doc.iter_all_tokens())[0]) is None
+
     def test_should_tag_text_as_line_no(self):
         text = SVG_TEXT()
         doc = SvgStructuredDocument(
@@ -135,6 +204,18 @@ class TestSvgStructuredDocument(object):
         doc.set_bounding_box(text, bounding_box)
         assert text.attrib[SVGE_BOUNDING_BOX] == format_bounding_box(bounding_box)
 
+    def test_should_return_updated_bounding_box_after_setting_it(self):
+        bounding_box = BoundingBox(11, 12, 101, 102)
+        text = SVG_TEXT('a', {
+            'x': '10',
+            'y': '11',
+            'font-size': '100'
+        })
+        doc = SvgStructuredDocument(E.svg(SVG_TEXT_LINE(text)))
+        assert doc.get_bounding_box(text) == BoundingBox(10, 11, 80, 100)
+        doc.set_bounding_box(text, bounding_box)
+        assert doc.get_bounding_box(text) == bounding_box
+
     def test_should_use_viewbox_if_available(self):
         bounding_box = BoundingBox(11, 12, 101, 102)
         page = E.svg({
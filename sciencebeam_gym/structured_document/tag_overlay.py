@@ -0,0 +1,91 @@
+from __future__ import absolute_import
+
+from sciencebeam_gym.structured_document import (
+    AbstractStructuredDocument
+)
+
+
+class TagOverlayStructuredDocument(AbstractStructuredDocument):
+    """
+    Wraps a structured document, sharing its pages, lines and tokens,
+    while keeping the tags that are set in a side table (by token) rather than
+    changing the underlying elements. flush applies the tags to the underlying
+    document (e.g. before saving it).
+
+    Other changes, like set_bounding_box, are passed through to the underlying document.
+    """
+
+    def __init__(self, structured_document):
+        self.structured_document = structured_document
+        self._tags_by_token = {}
+
+    def clone(self):
+        """
+        Returns another overlay on the same underlying document, with a copy of the tags
+        (rather than copying the whole underlying document).
+        """
+        cloned_structured_document = TagOverlayStructuredDocument(self.structured_document)
+        cloned_structured_document._tags_by_token = {  # pylint: disable=protected-access
+            token: tags.copy()
+            for token, tags in self._tags_by_token.items()
+        }
+        return cloned_structured_document
+
+    def flush(self):
+        """
+        Applies the tags to the underlying document, and returns it.
+        """
+        for token, tags in self._tags_by_token.items():
+            for (scope, level), tag in tags.items():
+                self.structured_document.set_tag(token, tag, scope=scope, level=level)
+        self._tags_by_token = {}
+        return self.structured_document
+
+    def invalidate_index(self):
+        self.structured_document.invalidate_index()
+
+    def get_pages(self):
+        return self.structured_document.get_pages()
+
+    def get_lines_of_page(self, page):
+        return self.structured_document.get_lines_of_page(page)
+
+    def get_tokens_of_line(self, line):
+        return self.structured_document.get_tokens_of_line(line)
+
+    def get_x(self, parent):
+        return self.structured_document.get_x(parent)
+
+    def get_text(self, parent):
+        return self.structured_document.get_text(parent)
+
+    def get_tag(self, parent, scope=None, level=None):
+        tags = self._tags_by_token.get(parent)
+        if tags is not None:
+            key = (scope, level)
+            if key in tags:
+                return tags[key]
+        return self.structured_document.get_tag(parent, scope=scope, level=level)
+
+    def set_tag(self, parent, tag, scope=None, level=None):
+        self._tags_by_token.setdefault(parent, {})[(scope, level)] = tag
+
+    def get_tag_by_scope(self, parent):
+        tag_by_scope = self.structured_document.get_tag_by_scope(parent)
+        tags = self._tags_by_token.get(parent)
+        if tags:
+            tag_by_scope = dict(tag_by_scope)
+            for (scope, level), tag in tags.items():
+                if level is not None:
+                    continue
+                if tag:
+                    tag_by_scope[scope] = tag
+                else:
+                    tag_by_scope.pop(scope, None)
+        return tag_by_scope
+
+    def get_bounding_box(self, parent):
+        return self.structured_document.get_bounding_box(parent)
+
+    def set_bounding_box(self, parent, bounding_box):
+        self.structured_document.set_bounding_box(parent, bounding_box)
@@ -0,0 +1,70 @@
+from __future__ import absolute_import
+
+from sciencebeam_gym.structured_document import (
+    SimpleStructuredDocument,
+    SimpleLine,
+    SimpleToken
+)
+
+from sciencebeam_gym.structured_document.tag_overlay import (
+    TagOverlayStructuredDocument
+)
+
+TEXT_1 = 'text 1'
+
+TAG_1 = 'tag1'
+TAG_2 = 'tag2'
+
+SCOPE_1 = 'scope1'
+
+
+def _create_document():
+    return SimpleStructuredDocument(lines=[SimpleLine([
+        SimpleToken(TEXT_1, tag=TAG_1)
+    ])])
+
+
+def _get_first_token(structured_document):
+    return list(structured_document.iter_all_tokens())[0]
+
+
+class TestTagOverlayStructuredDocument(object):
+    def test_should_return_tags_of_underlying_document(self):
+        doc = TagOverlayStructuredDocument(_create_document())
+        token = _get_first_token(doc)
+        assert doc.get_text(token) == TEXT_1
+        assert doc.get_tag(token) == TAG_1
+        assert doc.get_tag_by_scope(token) == {None: TAG_1}
+
+    def test_should_set_tags_without_changing_underlying_document(self):
+        underlying_doc = _create_document()
+        doc = TagOverlayStructuredDocument(underlying_doc)
+        token = _get_first_token(doc)
+        doc.set_tag(token, TAG_2, scope=SCOPE_1)
+        doc.set_sub_tag(token, TAG_1)
+        doc.set_tag(token, None)
+        assert doc.get_tag(token) is None
+        assert doc.get_tag(token, scope=SCOPE_1) == TAG_2
+        assert doc.get_sub_tag(token) == TAG_1
+        assert doc.get_tag_by_scope(token) == {SCOPE_1: TAG_2}
+        assert underlying_doc.get_tag_by_scope(token) == {None: TAG_1}
+
+    def test_should_apply_tags_to_underlying_document_on_flush(self):
+        underlying_doc = _create_document()
+        doc = TagOverlayStructuredDocument(underlying_doc)
+        token = _get_first_token(doc)
+        doc.set_tag(token, TAG_2, scope=SCOPE_1)
+        doc.set_tag(token, TAG_2)
+        assert doc.flush() == underlying_doc
+        assert underlying_doc.get_tag_by_scope(token) == {None: TAG_2, SCOPE_1: TAG_2}
+
+    def test_should_clone_tags_but_not_underlying_document(self):
+        underlying_doc = _create_document()
+        doc = TagOverlayStructuredDocument(underlying_doc)
+        token = _get_first_token(doc)
+        doc.set_tag(token, TAG_2)
+        cloned_doc = doc.clone()
+        cloned_doc.set_tag(token, None)
+        assert cloned_doc.structured_document == underlying_doc
+        assert cloned_doc.get_tag(token) is None
+        assert doc.get_tag(token) == TAG_2
@@ -0,0 +1,64 @@
+from collections import deque
+
+
+class AhoCorasickAutomaton(object):
+    """
+    Multi-pattern string search, finding all (possibly overlapping) occurrences
+    of all of the patterns in a single pass over the text.
+    Empty patterns are ignored.
+    """
+
+    def __init__(self, patterns):
+        self.pattern_lengths = [len(pattern) for pattern in patterns]
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern_index, pattern in enumerate(patterns):
+            if pattern:
+                self._add_pattern(pattern_index, pattern)
+        self._build_fail_transitions()
+
+    def _add_pattern(self, pattern_index, pattern):
+        state = 0
+        for c in pattern:
+            next_state = self._goto[state].get(c)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][c] = next_state
+            state = next_state
+        self._output[state].append(pattern_index)
+
+    def _build_fail_transitions(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for c, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail_state = self._fail[state]
+                while fail_state and c not in self._goto[fail_state]:
+                    fail_state = self._fail[fail_state]
+                if state:
+                    self._fail[next_state] = self._goto[fail_state].get(c, 0)
+                self._output[next_state] = (
+                    self._output[next_state] + self._output[self._fail[next_state]]
+                )
+
+    def iter_matches(self, text):
+        """
+        Yields (start, end, pattern_index) for every occurrence of every pattern,
+        ordered by end index.
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        pattern_lengths = self.pattern_lengths
+        state = 0
+        for i, c in enumerate(text):
+            while state and c not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(c, 0)
+            for pattern_index in output[state]:
+                yield i + 1 - pattern_lengths[pattern_index], i + 1, pattern_index
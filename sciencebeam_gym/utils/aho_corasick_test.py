@@ -0,0 +1,48 @@
+from sciencebeam_gym.utils.aho_corasick import (
+    AhoCorasickAutomaton
+)
+
+
+def _find_all_naive(patterns, text):
+    return sorted(
+        (start, start + len(pattern), pattern_index)
+        for pattern_index, pattern in enumerate(patterns)
+        if pattern
+        for start in range(len(text) - len(pattern) + 1)
+        if text.startswith(pattern, start)
+    )
+
+
+class TestAhoCorasickAutomaton(object):
+    def test_should_not_find_anything_without_patterns(self):
+        assert list(AhoCorasickAutomaton([]).iter_matches('abc')) == []
+
+    def test_should_ignore_empty_pattern(self):
+        assert list(AhoCorasickAutomaton(['']).iter_matches('abc')) == []
+
+    def test_should_find_single_pattern(self):
+        assert list(AhoCorasickAutomaton(['bc']).iter_matches('abcd')) == [(1, 3, 0)]
+
+    def test_should_find_repeated_occurrences(self):
+        assert list(AhoCorasickAutomaton(['ab']).iter_matches('abxab')) == [
+            (0, 2, 0), (3, 5, 0)
+        ]
+
+    def test_should_find_overlapping_and_nested_patterns(self):
+        patterns = ['he', 'she', 'his', 'hers']
+        text = 'ushers'
+        assert sorted(AhoCorasickAutomaton(patterns).iter_matches(text)) == (
+            _find_all_naive(patterns, text)
+        )
+
+    def test_should_find_duplicate_patterns(self):
+        assert sorted(AhoCorasickAutomaton(['ab', 'ab']).iter_matches('ab')) == [
+            (0, 2, 0), (0, 2, 1)
+        ]
+
+    def test_should_match_naive_search(self):
+        patterns = ['aa', 'aab', 'ab', 'bab', 'b', 'abab', 'x']
+        text = 'aabababbaab'
+        assert sorted(AhoCorasickAutomaton(patterns).iter_matches(text)) == (
+            _find_all_naive(patterns, text)
+        )
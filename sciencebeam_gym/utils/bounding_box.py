@@ -1,10 +1,15 @@
 class BoundingRange(object):
+    __slots__ = ['start', 'length']
+
     def __init__(self, start, length):
         self.start = start
         self.length = length
         if length < 0:
             raise ValueError('length must not be less than zero, was: ' + str(length))
 
+    def __reduce__(self):
+        return BoundingRange, (self.start, self.length)
+
     def __str__(self):
         return '({}, {})'.format(self.start, self.length)
 
@@ -34,6 +39,8 @@ class BoundingRange(object):
 
 
 class BoundingBox(object):
+    __slots__ = ['x', 'y', 'width', 'height']
+
     def __init__(self, x, y, width, height):
         self.x = x
         self.y = y
@@ -44,6 +51,9 @@ class BoundingBox(object):
         if height < 0:
             raise ValueError('height must not be less than zero, was: ' + str(height))
 
+    def __reduce__(self):
+        return BoundingBox, (self.x, self.y, self.width, self.height)
+
     def __str__(self):
         return '({}, {}, {}, {})'.format(self.x, self.y, self.width, self.height)
 
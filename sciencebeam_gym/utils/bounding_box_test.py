@@ -1,3 +1,5 @@
+import pickle
+
 from sciencebeam_gym.utils.bounding_box import (
     BoundingBox
 )
@@ -31,6 +33,12 @@ class TestBoundingBox(object):
     def test_should_not_equal_none(self):
         assert not BoundingBox(11, 12, 101, 102).__eq__(None)
 
+    def test_should_pickle_and_unpickle(self):
+        assert (
+            pickle.loads(pickle.dumps(BoundingBox(11, 12, 101, 102))) ==
+            BoundingBox(11, 12, 101, 102)
+        )
+
     def test_should_include_another_bounding_box_to_the_bottom_right(self):
         assert (
             BoundingBox(10, 20, 50, 100).include(BoundingBox(100, 100, 200, 200)) ==
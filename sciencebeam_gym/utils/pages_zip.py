@@ -1,4 +1,7 @@
 import logging
+import re
+from functools import partial
+from io import BytesIO
 from zipfile import ZipFile, ZIP_DEFLATED
 
 from apache_beam.io.filesystems import FileSystems
@@ -13,20 +16,66 @@ def get_logger():
     return logging.getLogger(__name__)
 
 
+PAGE_FILENAME_PATTERN = re.compile(r'(?:^|/)page-(\d+)\.[^/]*$')
+
+
+def get_page_number_of_filename(member_filename):
+    m = PAGE_FILENAME_PATTERN.search(member_filename)
+    return int(m.group(1)) if m else None
+
+
+def get_page_filenames(filenames, page_range=None):
+    """
+    Returns the member filenames in the order of their page number (using the page-N name,
+    or the position if a name doesn't follow that pattern), optionally limited to the page range.
+    """
+    page_numbers_and_filenames = sorted(
+        [
+            (get_page_number_of_filename(member_filename) or 1 + i, member_filename)
+            for i, member_filename in enumerate(filenames)
+        ],
+        key=lambda x: x[0]
+    )
+    return [
+        member_filename
+        for page_number, member_filename in page_numbers_and_filenames
+        if not page_range or page_range[0] <= page_number <= page_range[1]
+    ]
+
+
 def load_pages(filename, page_range=None):
     with FileSystems.open(filename) as f:
         with ZipFile(f) as zf:
-            filenames = zf.namelist()
-            if page_range:
-                filenames = filenames[
-                    max(0, page_range[0] - 1):
-                    page_range[1]
-                ]
-            for member_filename in filenames:
+            for member_filename in get_page_filenames(zf.namelist(), page_range=page_range):
                 with zf.open(member_filename) as f:
                     yield f
 
 
+def read_pages_zip_content(filename):
+    with FileSystems.open(filename) as f:
+        return f.read()
+
+
+def load_page_from_zip_content(zip_content, member_filename, parse_fn):
+    with ZipFile(BytesIO(zip_content)) as zf:
+        with zf.open(member_filename) as f:
+            return parse_fn(f)
+
+
+def get_page_loaders(filename, parse_fn, page_range=None):
+    """
+    Reads the (compressed) zip content once and returns a function per page (in page range),
+    that will parse the page using parse_fn when called.
+    """
+    zip_content = read_pages_zip_content(filename)
+    with ZipFile(BytesIO(zip_content)) as zf:
+        filenames = get_page_filenames(zf.namelist(), page_range=page_range)
+    return [
+        partial(load_page_from_zip_content, zip_content, member_filename, parse_fn)
+        for member_filename in filenames
+    ]
+
+
 def save_pages(output_filename, ext, bytes_by_page):
     mkdirs_if_not_exists(dirname(output_filename))
     with FileSystems.create(output_filename) as f:
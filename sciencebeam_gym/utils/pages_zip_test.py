@@ -0,0 +1,32 @@
+from sciencebeam_gym.utils.pages_zip import (
+    get_page_number_of_filename,
+    get_page_filenames
+)
+
+
+class TestGetPageNumberOfFilename(object):
+    def test_should_parse_page_number(self):
+        assert get_page_number_of_filename('page-12.svg') == 12
+
+    def test_should_parse_page_number_within_directory(self):
+        assert get_page_number_of_filename('dir/page-12.svg') == 12
+
+    def test_should_return_none_for_other_filenames(self):
+        assert get_page_number_of_filename('other-12.svg') is None
+
+
+class TestGetPageFilenames(object):
+    def test_should_sort_by_page_number(self):
+        assert get_page_filenames(['page-10.svg', 'page-2.svg', 'page-1.svg']) == [
+            'page-1.svg', 'page-2.svg', 'page-10.svg'
+        ]
+
+    def test_should_select_page_range_by_page_number(self):
+        assert get_page_filenames(
+            ['page-10.svg', 'page-2.svg', 'page-1.svg', 'page-3.svg'], page_range=(2, 3)
+        ) == ['page-2.svg', 'page-3.svg']
+
+    def test_should_use_position_for_other_filenames(self):
+        assert get_page_filenames(['a.svg', 'b.svg', 'c.svg'], page_range=(2, 3)) == [
+            'b.svg', 'c.svg'
+        ]
@@ -9,7 +9,8 @@ from distutils.command.build import build  # pylint: disable=import-error, no-na
 from setuptools import (
     find_packages,
     setup,
-    Command
+    Command,
+    Extension
 )
 
 import numpy as np
@@ -83,6 +84,12 @@ setup(
         'setuptools>=18.0',
         'cython',
     ],
+    ext_modules=[
+        Extension(
+            'sciencebeam_gym.preprocess.annotation.text_normalisation_fast',
+            sources=['sciencebeam_gym/preprocess/annotation/text_normalisation_fast.pyx'],
+        ),
+    ],
     include_dirs=[np.get_include()],
     cmdclass={
         'build': CustomBuild,